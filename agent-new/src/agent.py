@@ -1,12 +1,24 @@
 from textwrap import dedent
-from typing import Optional
+from typing import Any, Awaitable, Optional, AsyncIterator, Callable, Hashable, Iterable, Union
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.ag_ui import StateDeps
 from ag_ui.core import EventType, StateSnapshotEvent
 from pydantic_ai.models.google import GoogleModel
+from collections import OrderedDict
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import deque
+from psycopg2 import extensions
+from psycopg2 import sql as pg_sql
 import psycopg2
 import httpx
+import asyncio
+import hashlib
+import json
+import threading
+import time
 import os
 import sys
 import re
@@ -17,56 +29,517 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 # =====
-# User Context Cache (for CopilotKit instructions parsing)
+# Database (pooled connections, queries run off the event loop)
 # =====
-# When CopilotKit passes user info in instructions, we cache it here
-# so tools can access it even when state.user is None
-_cached_user_context: dict = {}
+# Tools share one connection pool, and queries run on an executor with one
+# worker per connection, so a slow Neon query never stalls other streams.
+# ConnectionPool is a copy of the one in agent/tools/db.py - port fixes to both.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Seconds a caller waits for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Connections idle longer than this are pinged before reuse (Neon drops
+# connections when the compute suspends)
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "60"))
+# Connections older than this are recycled regardless of health
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+# Errors that mean the connection itself is unusable, not just the query
+_BROKEN_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the checkout timeout."""
+
+
+class _PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs."""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool with health checks, recycling and metrics."""
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        max_idle: float = DB_POOL_MAX_IDLE,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME,
+    ):
+        self.dsn = dsn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._size = 0  # open connections, idle + in use
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._latencies_ms: deque[float] = deque(maxlen=1000)
+
+        for _ in range(self.min_size):
+            try:
+                self._idle.append(self._open())
+                self._size += 1
+            except Exception as e:
+                print(f"[DB] Pool warm-up failed: {e}", file=sys.stderr)
+                break
 
-def extract_user_from_instructions(instructions: str) -> dict:
-    """Extract user info from CopilotKit instructions text."""
-    result = {"user_id": None, "name": None, "email": None}
+    def _open(self) -> _PooledConnection:
+        conn = psycopg2.connect(
+            self.dsn,
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+        )
+        self._created += 1
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled: _PooledConnection) -> None:
+        """Close a connection that is no longer usable. Caller holds no lock."""
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._recycled += 1
+            self._cond.notify()
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        """Check a connection before handing it out."""
+        conn = pooled.conn
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - pooled.created_at > self.max_lifetime:
+            return False
+        if now - pooled.last_used > self.max_idle:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def _acquire(self) -> _PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            pooled = None
+            should_open = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._waiting += 1
+                try:
+                    while not self._idle and self._size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeout(
+                                f"No database connection free after {self.timeout}s "
+                                f"({self._size}/{self.max_size} in use)"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+                if self._idle:
+                    pooled = self._idle.pop()  # LIFO keeps hot connections hot
+                else:
+                    self._size += 1  # reserve the slot before connecting
+                    should_open = True
+
+            if should_open:
+                try:
+                    pooled = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(pooled):
+                self._discard(pooled)
+                continue
+
+            latency_ms = (time.monotonic() - started) * 1000
+            with self._cond:
+                self._checkouts += 1
+                self._latencies_ms.append(latency_ms)
+            return pooled
+
+    def _release(self, pooled: _PooledConnection, broken: bool = False) -> None:
+        conn = pooled.conn
+        if not broken and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    broken = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    # Never hand the next caller someone else's open transaction
+                    conn.rollback()
+            except Exception:
+                broken = True
+
+        if broken or conn.closed or self._closed:
+            self._discard(pooled)
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block.
+
+        Uncommitted work is rolled back on return. Connections that raised a
+        connection-level error are dropped rather than returned to the pool.
+        """
+        pooled = self._acquire()
+        broken = False
+        try:
+            yield pooled.conn
+        except _BROKEN_CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._release(pooled, broken=broken)
+
+    def stats(self) -> dict:
+        """Snapshot of pool metrics for health checks and logging."""
+        with self._cond:
+            latencies = sorted(self._latencies_ms)
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "max_size": self.max_size,
+                "in_use": self._size - idle,
+                "idle": idle,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "checkout_ms_avg": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                "checkout_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 2) if latencies else 0.0,
+                "checkout_ms_max": round(latencies[-1], 2) if latencies else 0.0,
+            }
+
+    def close(self) -> None:
+        """Close all idle connections; in-use ones are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            try:
+                pooled.conn.close()
+            except Exception:
+                pass
+
+
+_db_pool: Optional[ConnectionPool] = None
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_lock = threading.Lock()
+
+
+def get_db_pool() -> ConnectionPool:
+    """Get or create the process-wide connection pool."""
+    global _db_pool
+    if _db_pool is None:
+        with _db_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(DATABASE_URL)
+    return _db_pool
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        with _db_lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX_SIZE, thread_name_prefix="db")
+    return _db_executor
+
+
+def _run_with_connection(fn, args: tuple):
+    """Run ``fn(conn, *args)``; retried once on a fresh connection if the connection broke."""
+    pool = get_db_pool()
+    for attempt in range(2):
+        try:
+            with pool.connection() as conn:
+                return fn(conn, *args)
+        except _BROKEN_CONNECTION_ERRORS as e:
+            if attempt:
+                raise
+            print(f"[DB] Connection failed ({e}), retrying on a new one", file=sys.stderr)
 
-    if not instructions:
-        return result
 
-    # Look for User ID pattern
-    import re
-    id_match = re.search(r'User ID:\s*([a-f0-9-]+)', instructions, re.IGNORECASE)
-    if id_match:
-        result["user_id"] = id_match.group(1)
+async def db_run(fn, *args):
+    """Run ``fn(conn, *args)`` with a pooled connection, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_db_executor(), _run_with_connection, fn, args)
 
-    # Look for User Name pattern
-    name_match = re.search(r'User Name:\s*([^\n]+)', instructions, re.IGNORECASE)
-    if name_match:
-        result["name"] = name_match.group(1).strip()
 
-    # Look for Email pattern
-    email_match = re.search(r'User Email:\s*([^\n]+)', instructions, re.IGNORECASE)
-    if email_match:
-        result["email"] = email_match.group(1).strip()
+def _fetch_all(conn, sql: str, params) -> list:
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def _fetch_one(conn, sql: str, params):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchone()
+
+
+async def db_fetch_all(sql: str, params=None) -> list:
+    """Run a read query and return all rows."""
+    return await db_run(_fetch_all, sql, params)
+
+
+async def db_fetch_one(sql: str, params=None):
+    """Run a read query and return the first row, or None."""
+    return await db_run(_fetch_one, sql, params)
+
+
+def _execute(conn, sql: str, params, returning: bool):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        result = cur.fetchone() if returning else cur.rowcount
+    conn.commit()
+    return result
+
+
+async def db_execute(sql: str, params=None, returning: bool = False):
+    """Run a write and commit. Returns the rowcount, or the first row if ``returning``."""
+    return await db_run(_execute, sql, params, returning)
+
+
+def close_db_pool() -> None:
+    """Close pooled connections (called on shutdown)."""
+    global _db_pool, _db_executor
+    with _db_lock:
+        if _db_executor is not None:
+            _db_executor.shutdown(wait=False)
+            _db_executor = None
+        if _db_pool is not None:
+            _db_pool.close()
+            _db_pool = None
+
+# =====
+# TTL cache (copy of agent/tools/cache.py - port fixes to both)
+# =====
+# Bounded LRU of expiring entries with single-flight get_or_load; a cancelled
+# caller never cancels the load other callers are waiting on.
+def _retrieve(task: asyncio.Task) -> None:
+    """Mark a load's error retrieved; callers re-raise it themselves (if any are left)."""
+    if not task.cancelled():
+        task.exception()
+
+
+class TTLCache:
+    """Bounded LRU of ``key -> value`` entries that expire after ``ttl`` seconds."""
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0  # misses that waited on another caller's load
+        self.loads = 0
+        self.errors = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for ``key``, or None. Does not count as a hit or miss."""
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when ``key`` is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _start(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start a load for ``key`` (synchronously registered, so no second one starts)."""
+        task = asyncio.create_task(self._load(key, loader))
+        task.add_done_callback(_retrieve)
+        self._inflight[key] = task
+        self.loads += 1
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception:
+            self.errors += 1
+            raise
+        else:
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for ``key``, calling ``loader()`` at most once per expiry."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            # Expired: serve stale and refresh once in the background
+            self.stale_hits += 1
+            if key not in self._inflight:
+                self._start(key, loader)  # errors: keep serving stale, the next caller retries
+            return entry[1]
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            inflight = self._start(key, loader)
+        return await asyncio.shield(inflight)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "loads": self.loads,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+# =====
+# Request User Context (for CopilotKit instructions parsing)
+# =====
+# When CopilotKit passes user info in instructions, we keep it for the
+# current request so tools can access it even when state.user is None.
+# A contextvar rather than a global, so concurrent requests on one worker
+# never see each other's user (the agent run inherits the request's context).
+_request_user_context: ContextVar[Optional[dict]] = ContextVar("request_user_context", default=None)
+
+def request_user_context() -> dict:
+    """User extracted for the current request ({} when none)."""
+    return _request_user_context.get() or {}
+
+def set_request_user_context(user: dict) -> None:
+    _request_user_context.set(user)
+
+# "User ID: / User Name: / User Email:" lines, found in one pass. Each field
+# takes its first occurrence; a key whose value doesn't parse is skipped.
+_INSTRUCTION_KEYS = re.compile(r'User (ID|Name|Email):\s*', re.IGNORECASE)
+_INSTRUCTION_VALUES = {
+    "id": re.compile(r'[a-f0-9-]+', re.IGNORECASE),
+    "name": re.compile(r'[^\n]+'),
+    "email": re.compile(r'[^\n]+'),
+}
+_INSTRUCTION_FIELDS = {"id": "user_id", "name": "name", "email": "email"}
+
+# CopilotKit resends the same system message every turn: parse each once,
+# keyed by a digest so prompts themselves aren't kept around
+_parsed_instructions = TTLCache("instructions", ttl=3600, max_entries=512)
+
+def _parse_instructions(instructions: str) -> dict:
+    result = {"user_id": None, "name": None, "email": None}
+    for key in _INSTRUCTION_KEYS.finditer(instructions):
+        label = key.group(1).lower()
+        field = _INSTRUCTION_FIELDS[label]
+        if result[field] is not None:
+            continue
+        value = _INSTRUCTION_VALUES[label].match(instructions, key.end())
+        if value:
+            result[field] = value.group().strip()
+        if all(result.values()):
+            break
+    return result
+
+def extract_user_from_instructions(instructions: str) -> dict:
+    """Extract user info from CopilotKit instructions text."""
+    if not instructions:
+        return {"user_id": None, "name": None, "email": None}
+
+    digest = hashlib.blake2b(instructions.encode(), digest_size=16).digest()
+    parsed = _parsed_instructions.get(digest)
+    if parsed is None:
+        parsed = _parse_instructions(instructions)
+        _parsed_instructions.set(digest, parsed)
+    result = dict(parsed)
 
     if result["user_id"]:
-        global _cached_user_context
-        _cached_user_context = result
-        print(f"📋 Cached user from instructions: {result['name']} ({result['user_id'][:8]}...)", file=sys.stderr)
+        set_request_user_context(result)
+        print(f"📋 Request user from instructions: {result['name']} ({result['user_id'][:8]}...)", file=sys.stderr)
 
     return result
 
 def get_effective_user_id(state_user) -> Optional[str]:
-    """Get user ID from state or cached instructions."""
+    """Get user ID from state or this request's instructions."""
     if state_user and state_user.id:
         return state_user.id
-    if _cached_user_context.get("user_id"):
-        return _cached_user_context["user_id"]
+    cached = request_user_context()
+    if cached.get("user_id"):
+        return cached["user_id"]
     return None
 
 def get_effective_user_name(state_user) -> Optional[str]:
-    """Get user name from state or cached instructions."""
+    """Get user name from state or this request's instructions."""
     if state_user and (state_user.firstName or state_user.name):
         return state_user.firstName or state_user.name
-    if _cached_user_context.get("name"):
-        return _cached_user_context["name"]
+    cached = request_user_context()
+    if cached.get("name"):
+        return cached["name"]
     return None
 
 
@@ -159,39 +632,205 @@ async def get_user_memory_context(user_id: Optional[str]) -> tuple[str, bool, li
         return ("", False, ["location", "role_preference", "experience"])
 
 
-async def store_conversation_message(session_id: str, user_id: str, role: str, content: str):
-    """Store message in Zep thread (auto-extracts facts like preferences)."""
-    if not ZEP_API_KEY:
-        return
+ZEP_WRITE_MAX_PENDING = int(os.environ.get("ZEP_WRITE_MAX_PENDING", "2000"))  # queued messages
+ZEP_WRITE_BATCH_WINDOW = float(os.environ.get("ZEP_WRITE_BATCH_WINDOW", "0.5"))  # seconds to gather a batch
+ZEP_WRITE_MAX_BATCH = int(os.environ.get("ZEP_WRITE_MAX_BATCH", "30"))  # messages per POST
+ZEP_WRITE_ENQUEUE_TIMEOUT = float(os.environ.get("ZEP_WRITE_ENQUEUE_TIMEOUT", "0.5"))
+ZEP_WRITE_CONCURRENCY = 4
+_ZEP_KNOWN_IDS_LIMIT = 50_000
 
-    try:
+
+class ZepWriteBehind:
+    """Bounded write-behind queue for Zep thread messages.
+
+    Messages are grouped per thread and flushed by one background worker as
+    batched ``messages`` POSTs. Users and threads already created by this
+    process are remembered, so the idempotent create calls are skipped.
+    When the queue is full, callers wait briefly for space and the message
+    is dropped (and counted) if none frees up - memory never grows unbounded.
+    Messages being sent still count against ZEP_WRITE_MAX_PENDING until their
+    POST finishes.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, tuple[str, list[dict]]] = {}  # thread -> (user, messages)
+        self._pending_count = 0
+        self._inflight_count = 0  # taken off the queue, POST not finished yet
+        self._known_users: OrderedDict[str, None] = OrderedDict()
+        self._known_threads: OrderedDict[str, None] = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats = {"enqueued": 0, "dropped": 0, "posts": 0, "stored": 0, "failed": 0, "creates_skipped": 0}
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = self._wakeup or asyncio.Event()
+            self._space = self._space or asyncio.Condition()
+            self._worker = asyncio.create_task(self._run())
+
+    async def enqueue(self, thread_id: str, user_id: str, role: str, content: str) -> bool:
+        """Queue one message. Returns False if it was dropped."""
+        if self._closing:
+            self.stats["dropped"] += 1
+            return False
+        self._ensure_worker()
+        if self._backlog() >= ZEP_WRITE_MAX_PENDING:
+            # Backpressure: give the worker a moment to drain before dropping
+            try:
+                async with self._space:
+                    await asyncio.wait_for(
+                        self._space.wait_for(lambda: self._backlog() < ZEP_WRITE_MAX_PENDING),
+                        timeout=ZEP_WRITE_ENQUEUE_TIMEOUT,
+                    )
+            except asyncio.TimeoutError:
+                self.stats["dropped"] += 1
+                print(f"[Zep] Write queue full, dropped {role} message for {user_id}", file=sys.stderr)
+                return False
+        _, messages = self._pending.setdefault(thread_id, (user_id, []))
+        messages.append({"role": role, "content": content})
+        self._pending_count += 1
+        self.stats["enqueued"] += 1
+        self._wakeup.set()
+        return True
+
+    def _backlog(self) -> int:
+        return self._pending_count + self._inflight_count
+
+    @staticmethod
+    def _created(response: httpx.Response) -> bool:
+        """Whether a create call left the user/thread in place (new or already there)."""
+        if response.is_success or response.status_code == 409:
+            return True
+        return response.status_code == 400 and "already exists" in response.text.lower()
+
+    @staticmethod
+    def _remember(known: OrderedDict, key: str) -> None:
+        known[key] = None
+        if len(known) > _ZEP_KNOWN_IDS_LIMIT:
+            known.popitem(last=False)
+
+    async def _flush_thread(self, client: httpx.AsyncClient, thread_id: str, user_id: str, messages: list[dict]) -> None:
+        try:
+            if user_id in self._known_users:
+                self.stats["creates_skipped"] += 1
+            else:
+                response = await client.post("/api/v2/users", json={"user_id": user_id})
+                if not self._created(response):
+                    # Auth errors and rate limits too: don't remember the id, retry next time
+                    self.stats["failed"] += len(messages)
+                    print(f"[Zep] Creating user {user_id} failed: {response.status_code}", file=sys.stderr)
+                    return
+                self._remember(self._known_users, user_id)
+
+            if thread_id in self._known_threads:
+                self.stats["creates_skipped"] += 1
+            else:
+                response = await client.post("/api/v2/threads", json={
+                    "thread_id": thread_id,
+                    "user_id": user_id,
+                    "metadata": {"source": "fractional-copilotkit"},
+                })
+                if not self._created(response):
+                    self.stats["failed"] += len(messages)
+                    print(f"[Zep] Creating thread {thread_id} failed: {response.status_code}", file=sys.stderr)
+                    return
+                self._remember(self._known_threads, thread_id)
+
+            # Add messages (Zep auto-extracts: "prefers CTO", "interested in London")
+            for start in range(0, len(messages), ZEP_WRITE_MAX_BATCH):
+                batch = messages[start:start + ZEP_WRITE_MAX_BATCH]
+                response = await client.post(f"/api/v2/threads/{thread_id}/messages", json={"messages": batch})
+                self.stats["posts"] += 1
+                if response.status_code >= 400:
+                    self.stats["failed"] += len(batch)
+                    print(f"[Zep] Storing {len(batch)} messages failed: {response.status_code}", file=sys.stderr)
+                else:
+                    self.stats["stored"] += len(batch)
+            print(f"[Zep] Stored {len(messages)} message(s) for user {user_id}", file=sys.stderr)
+        except Exception as e:
+            self.stats["failed"] += len(messages)
+            print(f"[Zep] Error storing messages: {e}", file=sys.stderr)
+
+    async def _release(self, count: int) -> None:
+        self._inflight_count -= count
+        async with self._space:
+            self._space.notify_all()
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._inflight_count += self._pending_count
+        self._pending_count = 0
         client = get_zep_client()
-        if not client:
+        if not client or not batch:
+            await self._release(sum(len(m) for _, m in batch.values()))
+            return
+        semaphore = asyncio.Semaphore(ZEP_WRITE_CONCURRENCY)
+
+        async def flush_one(thread_id: str, user_id: str, messages: list[dict]):
+            try:
+                async with semaphore:
+                    await self._flush_thread(client, thread_id, user_id, messages)
+            finally:
+                await self._release(len(messages))
+
+        await asyncio.gather(*(flush_one(t, u, m) for t, (u, m) in batch.items()))
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if not self._closing:
+                # Let a burst accumulate so each thread gets one POST
+                await asyncio.sleep(ZEP_WRITE_BATCH_WINDOW)
+            self._wakeup.clear()
+            await self._flush()
+            if self._closing and not self._pending:
+                return
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting messages and flush what is queued (called on shutdown)."""
+        self._closing = True
+        if self._worker is None:
             return
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._worker, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._worker.cancel()
+            print(f"[Zep] Shutdown flush timed out, {self._backlog()} message(s) lost", file=sys.stderr)
 
-        # Ensure user exists
-        await client.post("/api/v2/users", json={"user_id": user_id})
+    def snapshot(self) -> dict:
+        return {**self.stats, "pending": self._pending_count, "in_flight": self._inflight_count,
+                "threads_pending": len(self._pending)}
 
-        # Create/get thread
-        await client.post("/api/v2/threads", json={
-            "thread_id": session_id,
-            "user_id": user_id,
-            "metadata": {"source": "fractional-copilotkit"},
-        })
 
-        # Add message (Zep auto-extracts: "prefers CTO", "interested in London")
-        await client.post(f"/api/v2/threads/{session_id}/messages", json={
-            "messages": [{"role": role, "content": content}]
-        })
-        print(f"[Zep] Stored {role} message for user {user_id}", file=sys.stderr)
-    except Exception as e:
-        print(f"[Zep] Error storing message: {e}", file=sys.stderr)
+zep_writer = ZepWriteBehind()
+
+
+async def store_conversation_message(session_id: str, user_id: str, role: str, content: str):
+    """Store message in Zep thread (auto-extracts facts like preferences).
+
+    Queued on the write-behind worker, so this returns without waiting on Zep.
+    """
+    if not ZEP_API_KEY:
+        return
+    await zep_writer.enqueue(session_id, user_id, role, content)
+
+
+async def close_zep_client() -> None:
+    """Flush queued Zep writes and close the HTTP client (called on shutdown)."""
+    global _zep_client
+    await zep_writer.close()
+    if _zep_client is not None:
+        await _zep_client.aclose()
+        _zep_client = None
 
 
 # =====
 # Unread Messages Check
 # =====
-def get_unread_messages(user_id: Optional[str]) -> list[dict]:
+async def get_unread_messages(user_id: Optional[str]) -> list[dict]:
     """Fetch unread messages from recruiters/admins for this user.
 
     Returns list of unread messages with sender info.
@@ -200,11 +839,8 @@ def get_unread_messages(user_id: Optional[str]) -> list[dict]:
         return []
 
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-
         # Get unread messages with sender details
-        cur.execute("""
+        rows = await db_fetch_all("""
             SELECT
                 m.id,
                 m.from_user_id,
@@ -221,9 +857,6 @@ def get_unread_messages(user_id: Optional[str]) -> list[dict]:
             LIMIT 5
         """, (user_id,))
 
-        rows = cur.fetchall()
-        conn.close()
-
         messages = []
         for row in rows:
             messages.append({
@@ -247,6 +880,358 @@ def get_unread_messages(user_id: Optional[str]) -> list[dict]:
         return []
 
 
+# =====
+# Per-user Caches
+# =====
+# Single-flight loading mirrors ProfileSnapshotCache in
+# agent/tools/profile_snapshot.py - port fixes to both.
+class PerUserCache:
+    """Bounded user_id -> value map with a TTL and single-flight loading.
+
+    Concurrent misses for the same user share one ``_load``. ``invalidate``
+    bumps the user's generation, so a load that was in flight during an
+    invalidation is returned to its callers but not cached. Subclasses
+    implement ``_load``.
+    """
+
+    def __init__(self, ttl: float, max_users: int, enabled: bool = True):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.enabled = enabled
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def _load(self, user_id: str) -> Any:
+        raise NotImplementedError
+
+    async def get(self, user_id: str) -> Any:
+        if not self.enabled:
+            return await self._load(user_id)
+
+        entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        # Shielded: a cancelled caller must not cancel the load others await
+        return await asyncio.shield(self._inflight.get(user_id) or self._start(user_id))
+
+    def _start(self, user_id: str) -> asyncio.Task:
+        generation = self._generations.get(user_id, 0)
+        task = asyncio.create_task(self._load_and_store(user_id, generation))
+        task.add_done_callback(_retrieve)
+        self._inflight[user_id] = task
+        return task
+
+    async def _load_and_store(self, user_id: str, generation: int) -> Any:
+        try:
+            value = await self._load(user_id)
+        finally:
+            self._inflight.pop(user_id, None)
+            # The counter only matters while a load is in flight
+            invalidated = self._generations.pop(user_id, 0) != generation
+        if not invalidated:
+            self._entries[user_id] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *user_ids: Optional[str]) -> None:
+        for user_id in user_ids:
+            if not user_id:
+                continue
+            self.invalidations += 1
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            # Only in-flight loads need the counter; keep the map small
+            if user_id not in self._inflight:
+                self._generations.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.invalidate(*list(self._entries), *list(self._inflight))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "users": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# =====
+# Profile Snapshots (mirrors agent/tools/profile_snapshot.py)
+# =====
+# Each user's user_profile_items rows are loaded once into a ProfileSnapshot
+# and served from memory until a write invalidates it. save_user_preference
+# invalidates locally; with PROFILE_SNAPSHOT_CHANNEL set, writers also
+# pg_notify(channel, user_id) in the write's transaction and every process
+# (this service's workers and the agent service) LISTENs and drops that
+# user's snapshot. Without a channel only PROFILE_SNAPSHOT_TTL bounds
+# staleness, so it defaults to 5s (300s with a channel).
+# LISTEN needs a session-level connection: on Neon set
+# PROFILE_SNAPSHOT_LISTEN_URL to the direct (non "-pooler") endpoint.
+PROFILE_SNAPSHOT_ENABLED = os.environ.get("PROFILE_SNAPSHOT", "on").lower() != "off"
+PROFILE_SNAPSHOT_MAX_USERS = int(os.environ.get("PROFILE_SNAPSHOT_MAX_USERS", "5000"))
+PROFILE_SNAPSHOT_CHANNEL = os.environ.get("PROFILE_SNAPSHOT_CHANNEL", "")
+PROFILE_SNAPSHOT_TTL = float(os.environ.get("PROFILE_SNAPSHOT_TTL", "300" if PROFILE_SNAPSHOT_CHANNEL else "5"))
+PROFILE_SNAPSHOT_LISTEN_URL = os.environ.get("PROFILE_SNAPSHOT_LISTEN_URL", "") or DATABASE_URL
+_LISTEN_MAX_BACKOFF = 60.0
+
+
+class ProfileItem:
+    """One user_profile_items row."""
+
+    __slots__ = ("item_type", "value", "metadata")
+
+    def __init__(self, item_type: str, value: str, metadata: Optional[dict]):
+        self.item_type = item_type
+        self.value = value
+        self.metadata = metadata or {}
+
+
+class ProfileSnapshot:
+    """A user's profile items, newest first, and the same grouped by type. Read-only."""
+
+    __slots__ = ("user_id", "ordered", "items")
+
+    def __init__(self, user_id: str, rows: list):
+        """``rows`` are ``(item_type, value, metadata)``, newest first."""
+        self.user_id = user_id
+        self.ordered: tuple[ProfileItem, ...] = tuple(ProfileItem(*row) for row in rows)
+        grouped: dict[str, list[ProfileItem]] = {}
+        for item in self.ordered:
+            grouped.setdefault(item.item_type, []).append(item)
+        self.items: dict[str, tuple[ProfileItem, ...]] = {t: tuple(v) for t, v in grouped.items()}
+
+    def values_by_type(self) -> dict[str, list[str]]:
+        return {t: [item.value for item in items] for t, items in self.items.items()}
+
+
+class ProfileSnapshotCache(PerUserCache):
+    """user_id -> ProfileSnapshot, loaded from user_profile_items."""
+
+    def __init__(self):
+        super().__init__(PROFILE_SNAPSHOT_TTL, PROFILE_SNAPSHOT_MAX_USERS, PROFILE_SNAPSHOT_ENABLED)
+
+    async def _load(self, user_id: str) -> ProfileSnapshot:
+        rows = await db_fetch_all("""
+            SELECT item_type, value, metadata
+            FROM user_profile_items
+            WHERE user_id = %s
+            ORDER BY created_at DESC
+        """, (user_id,))
+        return ProfileSnapshot(user_id, rows)
+
+
+# Copy of ProfileChangeListener in agent/tools/profile_snapshot.py - port fixes to both
+class ProfileChangeListener:
+    """LISTENs on PROFILE_SNAPSHOT_CHANNEL and calls ``on_change(user_id)`` per notification.
+
+    ``on_change(None)`` means "anything may have changed": it is sent on every
+    (re)connect, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, on_change: Callable[[Optional[str]], None],
+                 channel: str = PROFILE_SNAPSHOT_CHANNEL, url: str = PROFILE_SNAPSHOT_LISTEN_URL):
+        self.on_change = on_change
+        self.channel = channel
+        self.url = url
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.channel and self.url)
+
+    def notify_statements(self, user_id: str) -> list[tuple]:
+        """Statements to run in a write's transaction so other processes hear about it."""
+        if not self.channel:
+            return []
+        return [("SELECT pg_notify(%s, %s)", (self.channel, user_id))]
+
+    def _connect(self):
+        conn = psycopg2.connect(self.url, connect_timeout=DB_CONNECT_TIMEOUT,
+                                keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(pg_sql.SQL("LISTEN {}").format(pg_sql.Identifier(self.channel)))
+        return conn
+
+    async def _listen(self) -> None:
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
+        while True:
+            try:
+                conn = await loop.run_in_executor(None, self._connect)
+            except Exception as e:
+                print(f"[ProfileSnapshot] LISTEN connect failed, retrying in {backoff:.0f}s: {e}", file=sys.stderr)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _LISTEN_MAX_BACKOFF)
+                continue
+            backoff = 1.0
+
+            lost = loop.create_future()
+
+            def on_readable():
+                try:
+                    conn.poll()
+                except Exception as e:
+                    if not lost.done():
+                        lost.set_exception(e)
+                    return
+                while conn.notifies:
+                    note = conn.notifies.pop(0)
+                    self.notifications += 1
+                    self.on_change(note.payload or None)
+
+            fd = conn.fileno()
+            loop.add_reader(fd, on_readable)
+            self.connected = True
+            self.on_change(None)
+            print(f"[ProfileSnapshot] Listening on {self.channel}", file=sys.stderr)
+            try:
+                await lost
+            except Exception as e:
+                print(f"[ProfileSnapshot] LISTEN connection lost: {e}", file=sys.stderr)
+            finally:
+                self.connected = False
+                loop.remove_reader(fd)
+                conn.close()
+            self.reconnects += 1
+
+    async def start(self) -> None:
+        if not self.enabled:
+            if PROFILE_SNAPSHOT_ENABLED:
+                print("[ProfileSnapshot] WARNING: PROFILE_SNAPSHOT_CHANNEL is not set; profile writes "
+                      f"from other processes show up only after PROFILE_SNAPSHOT_TTL ({PROFILE_SNAPSHOT_TTL:g}s)",
+                      file=sys.stderr)
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "channel": self.channel or None,
+            "connected": self.connected,
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+        }
+
+
+profile_snapshots = ProfileSnapshotCache()
+
+
+def _on_profile_change(user_id: Optional[str]) -> None:
+    # The per-user context cache embeds profile items too
+    if user_id is None:
+        profile_snapshots.clear()
+        user_context_cache.clear()
+    else:
+        profile_snapshots.invalidate(user_id)
+        user_context_cache.invalidate(user_id)
+
+
+profile_listener = ProfileChangeListener(_on_profile_change)
+
+
+async def get_profile_items(user_id: Optional[str]) -> dict[str, list[str]]:
+    """Saved profile items (location, role_preference, skill, ...) by type, newest first."""
+    if not user_id or not DATABASE_URL:
+        return {}
+
+    try:
+        return (await profile_snapshots.get(user_id)).values_by_type()
+    except Exception as e:
+        print(f"[Profile] Error fetching profile items: {e}", file=sys.stderr)
+        return {}
+
+
+# =====
+# Per-user Context Cache
+# =====
+USER_CONTEXT_TTL = float(os.environ.get("USER_CONTEXT_TTL", "30"))  # seconds
+_USER_CONTEXT_MAX_USERS = 5000
+
+
+class UserContext(BaseModel):
+    """Per-user data the system prompt needs on every run."""
+    memory: str = ""
+    profile_complete: bool = False
+    missing_fields: list[str] = Field(default_factory=list)
+    unread_messages: list[dict] = Field(default_factory=list)
+    profile_items: dict[str, list[str]] = Field(default_factory=dict)
+
+
+class UserContextCache(PerUserCache):
+    """Short-TTL cache of UserContext, one entry per user.
+
+    Multi-step tool runs and back-to-back voice turns reuse one fetch.
+    Tools that change the underlying data call ``invalidate``.
+    """
+
+    def __init__(self):
+        super().__init__(USER_CONTEXT_TTL, _USER_CONTEXT_MAX_USERS)
+
+    async def _load(self, user_id: str) -> UserContext:
+        (memory, complete, missing), unread, items = await asyncio.gather(
+            get_user_memory_context(user_id),
+            get_unread_messages(user_id),
+            get_profile_items(user_id),
+        )
+        # Preferences saved in Neon count even before Zep has extracted them
+        saved = {"location": "location", "role_preference": "role_preference", "experience": "skill"}
+        missing = [field for field in missing if not items.get(saved.get(field, field))]
+        return UserContext(memory=memory, profile_complete=complete or not missing,
+                           missing_fields=missing, unread_messages=unread, profile_items=items)
+
+
+user_context_cache = UserContextCache()
+_prefetch_tasks: set[asyncio.Task] = set()
+
+
+def prefetch_user_context(user_id: Optional[str]) -> None:
+    """Start loading a user's context at request entry.
+
+    Memory, unread messages and profile items are fetched concurrently while
+    the request is still being parsed; add_user_context then awaits the same
+    in-flight load (or the cached result) instead of starting its own.
+    """
+    if not user_id:
+        return
+    task = asyncio.create_task(user_context_cache.get(user_id))
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_done)
+
+
+def _prefetch_done(task: asyncio.Task) -> None:
+    _prefetch_tasks.discard(task)
+    # Errors surface again in add_user_context; just mark this one retrieved
+    if not task.cancelled():
+        task.exception()
+
+
 # =====
 # Entity Extraction for Graph
 # =====
@@ -517,38 +1502,43 @@ async def add_user_context(ctx: RunContext[StateDeps[AppState]]) -> str:
   user = state.user
   print(f"🧑 Full state: jobs={len(state.jobs)}, query={state.search_query}, user={user}", file=sys.stderr)
 
-  # Get effective user info (from state OR cached from CopilotKit instructions)
+  # Get effective user info (from state OR this request's CopilotKit instructions)
   user_id = get_effective_user_id(user)
   name = get_effective_user_name(user)
 
   if not name and not user_id:
-    print("🧑 No user logged in (no state, no cached instructions)", file=sys.stderr)
+    print("🧑 No user logged in (no state, no instructions)", file=sys.stderr)
     return "The user is not logged in. Encourage them to sign in for a personalized experience."
 
-  # If we have cached user from instructions but no state.user
-  if not user and _cached_user_context.get("name"):
-    name = _cached_user_context["name"]
-    user_id = _cached_user_context.get("user_id")
-    print(f"🧑 Using cached user from instructions: {name}", file=sys.stderr)
+  # If we have the request's user from instructions but no state.user
+  cached = request_user_context()
+  if not user and cached.get("name"):
+    name = cached["name"]
+    user_id = cached.get("user_id")
+    print(f"🧑 Using request user from instructions: {name}", file=sys.stderr)
   elif name:
     print(f"🧑 Greeting user: {name}", file=sys.stderr)
 
-  # Get Zep memory (preferences, interests from past conversations)
+  # Zep memory (preferences, interests from past conversations) and unread
+  # messages from recruiters/coaches - fetched together, cached per user
   zep_memory = ""
   profile_complete = False
   missing_fields: list[str] = []
+  unread_messages = []
+  profile_items: dict[str, list[str]] = {}
   if user_id:
-    zep_memory, profile_complete, missing_fields = await get_user_memory_context(user_id)
+    # Usually already in flight from prefetch_user_context at request entry
+    user_context = await user_context_cache.get(user_id)
+    zep_memory = user_context.memory
+    profile_complete = user_context.profile_complete
+    missing_fields = user_context.missing_fields
+    unread_messages = user_context.unread_messages
+    profile_items = user_context.profile_items
     if zep_memory:
       print(f"🧠 Zep memory injected for user {user_id}, complete={profile_complete}", file=sys.stderr)
     if missing_fields:
       print(f"📋 Missing profile fields: {missing_fields}", file=sys.stderr)
 
-  # Check for unread messages from recruiters/coaches
-  unread_messages = []
-  if user_id:
-    unread_messages = get_unread_messages(user_id)
-
   # Build context-aware prompt
   prompt_parts = [
     f"IMPORTANT: The user's name is {name}. Always greet them by name and be personal!",
@@ -591,6 +1581,14 @@ User can say "yes read it", "tell me more", or "later" to handle it.
     prompt_parts.append(zep_memory)
     prompt_parts.append("\nUse the above memories to personalize your responses. Reference their interests!")
 
+  if profile_items:
+    labels = {"location": "Location", "role_preference": "Target role", "skill": "Skills", "company": "Companies"}
+    saved_lines = [
+      f"- {labels.get(item_type, item_type.replace('_', ' ').title())}: {', '.join(values[:5])}"
+      for item_type, values in profile_items.items()
+    ]
+    prompt_parts.append("\n## Saved profile:\n" + "\n".join(saved_lines))
+
   # PROACTIVE ONBOARDING - if profile is incomplete, guide the user
   if not profile_complete and missing_fields:
     onboarding_prompts = {
@@ -622,7 +1620,7 @@ CRITICAL: Before recommending jobs, you MUST gather this info naturally:
 
 REMEMBER: Their answers will be stored automatically. Just have a natural conversation!
 """)
-  elif not zep_memory:
+  elif not zep_memory and not profile_items:
     # New user with no memory at all
     prompt_parts.append(f"""
 
@@ -675,17 +1673,17 @@ If they ask about specific roles, filter within {location} first.""")
 # Tools
 # =====
 @agent.tool
-def get_user_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_user_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Get the current user's profile information.
   Call this when user asks 'what is my name', 'who am I', 'my profile', etc.
   Returns their name, email, and preferences."""
   state = ctx.deps.state
   user = state.user
 
-  # Use effective user info (from state or cached from CopilotKit instructions)
+  # Use effective user info (from state or this request's CopilotKit instructions)
   user_id = get_effective_user_id(user)
   name = get_effective_user_name(user)
-  email = _cached_user_context.get("email") if not user else user.email
+  email = request_user_context().get("email") if not user else user.email
 
   if not user_id and not name:
     return {"logged_in": False, "message": "User is not logged in"}
@@ -699,7 +1697,7 @@ def get_user_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def get_page_info(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_page_info(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Get information about the current page the user is viewing.
   Call this when user asks 'what page', 'where am I', 'current page', etc."""
   state = ctx.deps.state
@@ -848,10 +1846,12 @@ async def save_user_preference(ctx: RunContext[StateDeps[AppState]], preference_
       normalized_value = normalized_value.title()  # Ensure proper case
       print(f"💾 Accepting custom location: {normalized_value}", file=sys.stderr)
 
-  try:
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
+  def write_preference(conn):
+    """Replace (single-value) or add the item in one transaction.
 
+    Returns (old_value, no_change, inserted_row).
+    """
+    cur = conn.cursor()
     old_value = None
 
     # For single-value fields, check if one exists and replace it
@@ -869,8 +1869,7 @@ async def save_user_preference(ctx: RunContext[StateDeps[AppState]], preference_
         if old_value.lower() == normalized_value.lower():
           # Same value, no change needed
           cur.close()
-          conn.close()
-          return {"saved": False, "message": f"Already set to {normalized_value}", "no_change": True}
+          return old_value, True, None
 
         # Delete old value (replace)
         cur.execute("""
@@ -886,11 +1885,20 @@ async def save_user_preference(ctx: RunContext[StateDeps[AppState]], preference_
       ON CONFLICT (user_id, item_type, value) DO UPDATE SET updated_at = NOW()
       RETURNING id
     """, (user.id, item_type, normalized_value, '{"source": "voice_detected"}', False))
+    result = cur.fetchone()
 
+    # Other workers and the agent service drop their snapshot on commit
+    for statement, params in profile_listener.notify_statements(user.id):
+      cur.execute(statement, params)
     conn.commit()
-    result = cur.fetchone()
     cur.close()
-    conn.close()
+    return old_value, False, result
+
+  try:
+    old_value, no_change, result = await db_run(write_preference)
+    if no_change:
+      return {"saved": False, "message": f"Already set to {normalized_value}", "no_change": True}
+    profile_snapshots.invalidate(user.id)
 
     print(f"💾 Saved to Neon: {item_type}={normalized_value} (id={result[0] if result else 'updated'})", file=sys.stderr)
 
@@ -937,6 +1945,7 @@ async def save_user_preference(ctx: RunContext[StateDeps[AppState]], preference_
       response["replaced"] = old_value
       response["message"] = f"Changed {item_type} from {old_value} to {normalized_value}"
 
+    user_context_cache.invalidate(user.id)
     print(f"💾 Saved preference: {item_type}={normalized_value} for user {user.id}", file=sys.stderr)
     return response
 
@@ -945,7 +1954,7 @@ async def save_user_preference(ctx: RunContext[StateDeps[AppState]], preference_
     return {"saved": False, "error": str(e)}
 
 @agent.tool
-def get_jobs(ctx: RunContext[StateDeps[AppState]]) -> list[dict]:
+async def get_jobs(ctx: RunContext[StateDeps[AppState]]) -> list[dict]:
   """Get the current list of jobs in state."""
   return [j.model_dump() for j in ctx.deps.state.jobs]
 
@@ -988,13 +1997,10 @@ async def search_jobs(ctx: RunContext[StateDeps[AppState]], query: str) -> dict:
     print(f"🔍 Using page context location: {found_location}", file=sys.stderr)
 
   # Build query
-  conn = psycopg2.connect(DATABASE_URL)
-  cur = conn.cursor()
-
   if found_role and found_location:
     # Search by both role and location
     print(f"🔍 Filtering by role={found_role}, location={found_location}", file=sys.stderr)
-    cur.execute("""
+    rows = await db_fetch_all("""
       SELECT title, company, location, salary_min, salary_max, description, role_type
       FROM test_jobs
       WHERE (title ILIKE %s OR role_type ILIKE %s) AND location ILIKE %s
@@ -1004,7 +2010,7 @@ async def search_jobs(ctx: RunContext[StateDeps[AppState]], query: str) -> dict:
   elif found_role:
     # Search by role only
     print(f"🔍 Filtering by role={found_role}", file=sys.stderr)
-    cur.execute("""
+    rows = await db_fetch_all("""
       SELECT title, company, location, salary_min, salary_max, description, role_type
       FROM test_jobs
       WHERE title ILIKE %s OR role_type ILIKE %s
@@ -1014,7 +2020,7 @@ async def search_jobs(ctx: RunContext[StateDeps[AppState]], query: str) -> dict:
   elif found_location:
     # Search by location only
     print(f"🔍 Filtering by location={found_location}", file=sys.stderr)
-    cur.execute("""
+    rows = await db_fetch_all("""
       SELECT title, company, location, salary_min, salary_max, description, role_type
       FROM test_jobs
       WHERE location ILIKE %s
@@ -1031,16 +2037,13 @@ async def search_jobs(ctx: RunContext[StateDeps[AppState]], query: str) -> dict:
     else:
       search_term = "%"
       print(f"🔍 Showing all jobs", file=sys.stderr)
-    cur.execute("""
+    rows = await db_fetch_all("""
       SELECT title, company, location, salary_min, salary_max, description, role_type
       FROM test_jobs
       ORDER BY id DESC
       LIMIT %s
     """, (limit,))
 
-  rows = cur.fetchall()
-  cur.close()
-  conn.close()
   print(f"🔍 Found {len(rows)} jobs", file=sys.stderr)
 
   # Update state for JobsCard sidebar
@@ -1096,19 +2099,14 @@ async def search_jobs(ctx: RunContext[StateDeps[AppState]], query: str) -> dict:
   }
 
 @agent.tool
-def show_jobs_chart(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def show_jobs_chart(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Show an interactive bar chart of job distribution by role type."""
   print("📊 Generating role distribution chart")
-  conn = psycopg2.connect(DATABASE_URL)
-  cur = conn.cursor()
-  cur.execute("""
+  rows = await db_fetch_all("""
     SELECT role_type, COUNT(*) as count
     FROM test_jobs
     GROUP BY role_type ORDER BY count DESC
   """)
-  rows = cur.fetchall()
-  cur.close()
-  conn.close()
   print(f"📊 Chart data: {rows}")
   return {
     "chartData": [{"name": r[0], "jobs": r[1], "fill": ["#6366f1", "#8b5cf6", "#a855f7", "#d946ef", "#ec4899", "#f43f5e", "#f97316", "#eab308"][i % 8]} for i, r in enumerate(rows)],
@@ -1117,19 +2115,14 @@ def show_jobs_chart(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def show_location_chart(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def show_location_chart(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Show a pie chart of jobs by geographic location."""
   print("🌍 Generating location chart")
-  conn = psycopg2.connect(DATABASE_URL)
-  cur = conn.cursor()
-  cur.execute("""
+  rows = await db_fetch_all("""
     SELECT location, COUNT(*) as count
     FROM test_jobs
     GROUP BY location ORDER BY count DESC
   """)
-  rows = cur.fetchall()
-  cur.close()
-  conn.close()
   print(f"🌍 Location data: {rows}")
   return {
     "chartData": [{"name": r[0], "jobs": r[1]} for r in rows],
@@ -1138,7 +2131,7 @@ def show_location_chart(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def show_salary_insights(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def show_salary_insights(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Show salary range insights by executive role type as an area chart."""
   print("💰 Generating salary insights")
   # Simulated market data based on industry standards
@@ -1159,30 +2152,20 @@ def show_salary_insights(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def show_market_dashboard(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def show_market_dashboard(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Show a comprehensive market dashboard with multiple metrics."""
   print("📈 Generating market dashboard")
-  conn = psycopg2.connect(DATABASE_URL)
-  cur = conn.cursor()
-
-  cur.execute("SELECT COUNT(*) FROM test_jobs")
-  total_jobs = cur.fetchone()[0]
-
-  cur.execute("SELECT COUNT(DISTINCT company) FROM test_jobs")
-  total_companies = cur.fetchone()[0]
-
-  cur.execute("SELECT AVG(salary_max) FROM test_jobs WHERE salary_max IS NOT NULL")
-  avg_salary = cur.fetchone()[0] or 150000
-
-  cur.execute("""
-    SELECT role_type, COUNT(*) as cnt
-    FROM test_jobs
-    GROUP BY role_type ORDER BY cnt DESC LIMIT 5
-  """)
-  top_roles = cur.fetchall()
-
-  cur.close()
-  conn.close()
+  # AVG() skips NULL salaries, so one pass covers all three metrics
+  totals, top_roles = await asyncio.gather(
+    db_fetch_one("SELECT COUNT(*), COUNT(DISTINCT company), AVG(salary_max) FROM test_jobs"),
+    db_fetch_all("""
+      SELECT role_type, COUNT(*) as cnt
+      FROM test_jobs
+      GROUP BY role_type ORDER BY cnt DESC LIMIT 5
+    """),
+  )
+  total_jobs, total_companies, avg_salary = totals
+  avg_salary = avg_salary or 150000
   print(f"📈 Dashboard: {total_jobs} jobs, {total_companies} companies")
 
   return {
@@ -1198,7 +2181,7 @@ def show_market_dashboard(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def get_featured_articles(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_featured_articles(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Get featured articles about fractional executive work with images."""
   print("📰 Getting featured articles")
   articles = [
@@ -1234,21 +2217,16 @@ def get_featured_articles(ctx: RunContext[StateDeps[AppState]]) -> dict:
   return {"articles": articles, "title": "Featured Insights"}
 
 @agent.tool
-def show_a2ui_job_card(ctx: RunContext[StateDeps[AppState]], role: str) -> dict:
+async def show_a2ui_job_card(ctx: RunContext[StateDeps[AppState]], role: str) -> dict:
   """Show a rich A2UI job card widget for a specific role. Returns A2UI JSON format."""
   print(f"🎨 Generating A2UI card for: {role}")
 
-  conn = psycopg2.connect(DATABASE_URL)
-  cur = conn.cursor()
-  cur.execute("""
+  row = await db_fetch_one("""
     SELECT title, company, location, salary_min, salary_max, description
     FROM test_jobs
     WHERE title ILIKE %s OR role_type ILIKE %s
     LIMIT 1
   """, (f"%{role}%", f"%{role}%"))
-  row = cur.fetchone()
-  cur.close()
-  conn.close()
   print(f"🎨 Found job: {row}")
 
   if not row:
@@ -1298,7 +2276,7 @@ async def show_user_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
   state = ctx.deps.state
   user = state.user
 
-  # Use effective user ID (from state or cached instructions)
+  # Use effective user ID (from state or this request's instructions)
   user_id = get_effective_user_id(user)
   user_name = get_effective_user_name(user) or "You"
 
@@ -1320,24 +2298,15 @@ async def show_user_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
     "skill": "skill",
   }
 
-  # PRIMARY: Fetch profile from Neon database (same source as profile panel)
+  # PRIMARY: Profile from Neon (same source as profile panel), via the user's snapshot
   try:
     if DATABASE_URL:
-      conn = psycopg2.connect(DATABASE_URL)
-      cur = conn.cursor()
-      cur.execute("""
-        SELECT item_type, value, metadata
-        FROM user_profile_items
-        WHERE user_id = %s
-        ORDER BY created_at DESC
-      """, (user_id,))
-      items = cur.fetchall()
-      cur.close()
-      conn.close()
+      items = (await profile_snapshots.get(user_id)).ordered
 
       print(f"🌌 Found {len(items)} profile items in Neon")
 
-      for item_type, value, metadata in items:
+      for item in items:
+        item_type, value, metadata = item.item_type, item.value, item.metadata
         node_type = TYPE_MAPPING.get(item_type, "fact")
 
         # Skip if already exists (dedupe)
@@ -1390,24 +2359,15 @@ async def show_user_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def show_a2ui_stats_widget(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def show_a2ui_stats_widget(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Show an A2UI statistics widget with live market data."""
   print("📊 Generating A2UI stats widget")
 
-  conn = psycopg2.connect(DATABASE_URL)
-  cur = conn.cursor()
-
-  cur.execute("SELECT COUNT(*) FROM test_jobs")
-  total = cur.fetchone()[0]
-
-  cur.execute("SELECT COUNT(DISTINCT company) FROM test_jobs")
-  companies = cur.fetchone()[0]
-
-  cur.execute("SELECT AVG(salary_max) FROM test_jobs WHERE salary_max IS NOT NULL")
-  avg_salary = cur.fetchone()[0] or 150000
-
-  cur.close()
-  conn.close()
+  # AVG() skips NULL salaries, so one pass covers all three metrics
+  total, companies, avg_salary = await db_fetch_one(
+    "SELECT COUNT(*), COUNT(DISTINCT company), AVG(salary_max) FROM test_jobs"
+  )
+  avg_salary = avg_salary or 150000
   print(f"📊 Stats: {total} jobs, {companies} companies")
 
   return {
@@ -1449,7 +2409,7 @@ def show_a2ui_stats_widget(ctx: RunContext[StateDeps[AppState]]) -> dict:
   }
 
 @agent.tool
-def set_ambient_scene(ctx: RunContext[StateDeps[AppState]], location: str = None, role: str = None) -> dict:
+async def set_ambient_scene(ctx: RunContext[StateDeps[AppState]], location: str = None, role: str = None) -> dict:
   """Change the ambient background scene based on conversation context.
   Call this when the user mentions a specific location or role type to create an immersive experience.
 
@@ -1519,7 +2479,7 @@ def set_ambient_scene(ctx: RunContext[StateDeps[AppState]], location: str = None
 # Messaging Tools
 # =====
 @agent.tool
-def get_my_messages(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_my_messages(ctx: RunContext[StateDeps[AppState]]) -> dict:
   """Get the user's unread messages from recruiters and coaches.
   Call this when user asks 'what messages', 'my inbox', 'any messages', 'read messages', etc.
 
@@ -1528,13 +2488,13 @@ def get_my_messages(ctx: RunContext[StateDeps[AppState]]) -> dict:
   state = ctx.deps.state
   user = state.user
 
-  # Use effective user ID (from state or cached from CopilotKit instructions)
+  # Use effective user ID (from state or this request's CopilotKit instructions)
   user_id = get_effective_user_id(user)
 
   if not user_id:
     return {"messages": [], "error": "User not logged in"}
 
-  messages = get_unread_messages(user_id)
+  messages = await get_unread_messages(user_id)
 
   return {
     "unread_count": len(messages),
@@ -1544,7 +2504,7 @@ def get_my_messages(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
-def read_full_message(ctx: RunContext[StateDeps[AppState]], message_id: int) -> dict:
+async def read_full_message(ctx: RunContext[StateDeps[AppState]], message_id: int) -> dict:
   """Read the full content of a specific message and mark it as read.
   Call this when user wants to hear/see a complete message.
 
@@ -1557,7 +2517,7 @@ def read_full_message(ctx: RunContext[StateDeps[AppState]], message_id: int) ->
   state = ctx.deps.state
   user = state.user
 
-  # Use effective user ID (from state or cached from CopilotKit instructions)
+  # Use effective user ID (from state or this request's CopilotKit instructions)
   user_id = get_effective_user_id(user)
 
   if not user_id:
@@ -1566,8 +2526,7 @@ def read_full_message(ctx: RunContext[StateDeps[AppState]], message_id: int) ->
   if not DATABASE_URL:
     return {"error": "Database not configured"}
 
-  try:
-    conn = psycopg2.connect(DATABASE_URL)
+  def read_and_mark(conn):
     cur = conn.cursor()
 
     # Get full message
@@ -1581,16 +2540,20 @@ def read_full_message(ctx: RunContext[StateDeps[AppState]], message_id: int) ->
     """, (message_id, user_id))
 
     row = cur.fetchone()
+    if row:
+      # Mark as read
+      cur.execute("""
+        UPDATE messages SET read_at = NOW() WHERE id = %s
+      """, (message_id,))
+      conn.commit()
+    cur.close()
+    return row
+
+  try:
+    row = await db_run(read_and_mark)
     if not row:
-      conn.close()
       return {"error": "Message not found"}
-
-    # Mark as read
-    cur.execute("""
-      UPDATE messages SET read_at = NOW() WHERE id = %s
-    """, (message_id,))
-    conn.commit()
-    conn.close()
+    user_context_cache.invalidate(user_id)
 
     print(f"📬 Read message {message_id} for user {user_id}", file=sys.stderr)
 
@@ -1612,7 +2575,7 @@ def read_full_message(ctx: RunContext[StateDeps[AppState]], message_id: int) ->
 
 
 @agent.tool
-def reply_to_message(ctx: RunContext[StateDeps[AppState]], to_user_id: str, content: str) -> dict:
+async def reply_to_message(ctx: RunContext[StateDeps[AppState]], to_user_id: str, content: str) -> dict:
   """Send a reply message to a recruiter or coach.
   Call this when user wants to respond to a message.
 
@@ -1626,7 +2589,7 @@ def reply_to_message(ctx: RunContext[StateDeps[AppState]], to_user_id: str, cont
   state = ctx.deps.state
   user = state.user
 
-  # Use effective user ID (from state or cached from CopilotKit instructions)
+  # Use effective user ID (from state or this request's CopilotKit instructions)
   user_id = get_effective_user_id(user)
 
   if not user_id:
@@ -1639,19 +2602,15 @@ def reply_to_message(ctx: RunContext[StateDeps[AppState]], to_user_id: str, cont
     return {"sent": False, "error": "Message too short"}
 
   try:
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-
     # Insert reply
-    cur.execute("""
+    row = await db_execute("""
       INSERT INTO messages (from_user_id, to_user_id, content)
       VALUES (%s, %s, %s)
       RETURNING id
-    """, (user_id, to_user_id, content.strip()))
+    """, (user_id, to_user_id, content.strip()), returning=True)
 
-    new_id = cur.fetchone()[0]
-    conn.commit()
-    conn.close()
+    new_id = row[0]
+    user_context_cache.invalidate(user_id, to_user_id)
 
     print(f"📬 Sent reply {new_id} from {user_id} to {to_user_id}", file=sys.stderr)
 
@@ -1667,6 +2626,388 @@ def reply_to_message(ctx: RunContext[StateDeps[AppState]], to_user_id: str, cont
     return {"sent": False, "error": str(e)}
 
 
+# =====
+# Request identity (copy of agent/tools/request_identity.py - port fixes to both)
+# =====
+# AG-UI requests carry the user in state.user; CopilotKit instructions carry
+# "User ID:" in a system message. UserIdentityMiddleware follows the JSON
+# structure of each body chunk as the handler reads it, so nothing is
+# buffered or parsed twice. When the last chunk has been read it calls
+# on_identity(state_user, instructions).
+# state.user is a small flat profile; anything bigger is not it
+MAX_USER_OBJECT = 4096
+# Values worth keeping while scanning: keys, message roles and contents
+_CAPTURED_VALUES = (b"role", b"content")
+
+_TOKEN = re.compile(rb'[{}\[\]:,"]')
+_STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.S)
+
+
+def _closing_quote(data: bytes, pos: int) -> tuple[int, bool]:
+    """Offset of the ``"`` ending the string whose bytes start at ``pos``.
+
+    Returns ``(offset, False)``, or ``(len(data), escaped)`` when the string
+    runs past ``data`` (``escaped``: it ends on a backslash whose escaped
+    byte is in the next chunk).
+    """
+    quote = data.find(b'"', pos)
+    if quote >= 0 and data.find(b"\\", pos, quote) < 0:
+        return quote, False  # the common case: no escapes before the quote
+    end = _STRING_REST.match(data, pos).end()
+    if end < len(data) and data[end] == 0x22:
+        return end, False
+    return len(data), end < len(data)
+
+
+def _decode(raw: bytes) -> Optional[str]:
+    if b"\\" not in raw:
+        return raw.decode("utf-8", "replace")
+    try:
+        return json.loads(b'"' + raw + b'"')
+    except ValueError:
+        return None
+
+
+class _Frame:
+    """One open object or array while scanning."""
+
+    __slots__ = ("is_object", "key", "expect_key", "role", "content")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        self.key: Optional[bytes] = None
+        self.expect_key = is_object
+        self.role: Optional[str] = None
+        self.content: Optional[str] = None
+
+
+class UserIdentityScanner:
+    """Incremental scan of a JSON body for ``state.user`` and instructions.
+
+    A small tokenizer follows the body's structure across chunks, jumping
+    from bracket to bracket and over whole strings, and keeps only object
+    keys, ``role`` and ``content`` strings and the ``state.user`` object. A
+    string that runs past the end of a chunk is followed to its closing
+    quote however long it is, and ``user`` only counts directly under the
+    top-level ``state``. Scanning stops once both values are found.
+    """
+
+    def __init__(self, markers: Iterable[str] = ("User ID:",)):
+        self.markers = tuple(markers)
+        self.state_user: Optional[dict] = None
+        self.instructions: Optional[str] = None
+        self._stack: list[_Frame] = []
+        # A string split across chunks: whether we are in one, whether the
+        # last chunk ended on an escaping backslash, and its bytes if wanted
+        self._in_string = False
+        self._escaped = False
+        self._string: Optional[bytearray] = None
+        self._string_is_key = False
+        self._user: Optional[bytearray] = None  # state.user bytes so far
+        self._user_depth = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.state_user is not None and self.instructions is not None
+
+    def feed(self, chunk: bytes) -> None:
+        if self.complete or not chunk:
+            return
+        size = len(chunk)
+        pos = self._continue_string(chunk, 0) if self._in_string else 0
+        user_from = 0
+        stack = self._stack
+        while not self._in_string:
+            match = _TOKEN.search(chunk, pos)
+            if match is None:
+                pos = size
+                break
+            pos = match.end()
+            token = chunk[match.start()]
+            if token == 0x22:  # "
+                end, _ = _closing_quote(chunk, pos)
+                if end == size:  # runs past this chunk
+                    self._start_string()
+                    pos = self._continue_string(chunk, pos)
+                    break
+                is_key, wanted = self._string_target()
+                if wanted:
+                    self._end_string(chunk[pos:end], is_key)
+                pos = end + 1
+            elif token == 0x7B:  # {
+                if self._at_state_user():
+                    self._user, self._user_depth, user_from = bytearray(), 0, match.start()
+                if self._user is not None:
+                    self._user_depth += 1
+                stack.append(_Frame(True))
+            elif token == 0x7D:  # }
+                frame = stack.pop() if stack else None
+                if self._user is not None:
+                    self._user_depth -= 1
+                    if self._user_depth == 0:
+                        self._user += chunk[user_from:pos]
+                        self._finish_user()
+                if frame is not None and frame.role == "system" and frame.content is not None:
+                    self.instructions = self.instructions or frame.content
+                if self.complete:
+                    return
+            elif token == 0x5B:  # [
+                if self._user is not None:
+                    self._user_depth += 1
+                stack.append(_Frame(False))
+            elif token == 0x5D:  # ]
+                if self._user is not None:
+                    self._user_depth -= 1
+                if stack:
+                    stack.pop()
+            elif stack and stack[-1].is_object:
+                if token == 0x3A:  # :
+                    stack[-1].expect_key = False
+                else:  # ,
+                    stack[-1].expect_key, stack[-1].key = True, None
+        if self._user is not None:
+            self._user += chunk[user_from:pos]
+            if len(self._user) > MAX_USER_OBJECT:
+                self._user = None
+
+    def _at_state_user(self) -> bool:
+        stack = self._stack
+        return (self.state_user is None and self._user is None and len(stack) == 2
+                and stack[0].is_object and stack[0].key == b"state"
+                and stack[1].is_object and stack[1].key == b"user")
+
+    def _string_target(self) -> tuple[bool, bool]:
+        """(is the string starting now an object key, do we need its value)."""
+        top = self._stack[-1] if self._stack else None
+        if top is None or not top.is_object:
+            return False, False
+        if top.expect_key:
+            return True, True
+        # A user or assistant message's text is never needed
+        return False, top.key in _CAPTURED_VALUES and top.role in (None, "system")
+
+    def _start_string(self) -> None:
+        self._in_string = True
+        self._string_is_key, wanted = self._string_target()
+        self._string = bytearray() if wanted else None
+
+    def _continue_string(self, chunk: bytes, pos: int) -> int:
+        """Follow a split string through ``chunk``; returns the offset after it."""
+        start = pos
+        if self._escaped:
+            self._escaped = False
+            pos += 1
+        end, escaped = _closing_quote(chunk, pos)
+        if self._string is not None:
+            self._string += chunk[start:end]
+        if end == len(chunk):
+            self._escaped = escaped
+            return end
+        self._in_string = False
+        raw, self._string = self._string, None
+        if raw is not None:
+            self._end_string(bytes(raw), self._string_is_key)
+        return end + 1
+
+    def _end_string(self, raw: bytes, is_key: bool) -> None:
+        top = self._stack[-1]
+        if is_key:
+            top.key = raw
+            return
+        text = _decode(raw)
+        if text is None:
+            return
+        if top.key == b"role":
+            top.role = text
+        elif any(marker in text for marker in self.markers):
+            top.content = text
+
+    def _finish_user(self) -> None:
+        raw, self._user = self._user, None
+        try:
+            user = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(user, dict) and user.get("id"):
+            self.state_user = user
+
+
+class UserIdentityMiddleware:
+    """Pure-ASGI middleware that runs UserIdentityScanner over POST bodies."""
+
+    def __init__(self, app, on_identity: Callable[[Optional[dict], Optional[str]], None],
+                 markers: Iterable[str] = ("User ID:",)):
+        self.app = app
+        self.on_identity = on_identity
+        self.markers = tuple(markers)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        scanner = UserIdentityScanner(self.markers)
+        reported = False
+
+        async def scanning_receive():
+            nonlocal reported
+            message = await receive()
+            if message["type"] == "http.request" and not reported:
+                scanner.feed(message.get("body", b""))
+                if not message.get("more_body"):
+                    reported = True
+                    scope.setdefault("state", {})["user_identity"] = (scanner.state_user, scanner.instructions)
+                    if scanner.state_user is not None or scanner.instructions is not None:
+                        try:
+                            self.on_identity(scanner.state_user, scanner.instructions)
+                        except Exception as e:
+                            print(f"[Middleware] Error extracting user: {e}", file=sys.stderr)
+            return message
+
+        await self.app(scope, scanning_receive, send)
+
+
+# =====
+# SSE chunk encoding (copy of agent/tools/sse.py - port fixes to both)
+# =====
+# Chunk frames are built from a prefix/suffix precomputed once per response;
+# only the delta text is JSON-escaped per frame (orjson when installed).
+# Deltas that arrive close together are coalesced into one frame, bounded by
+# SSE_COALESCE_BYTES of escaped text and SSE_COALESCE_MS of delay; the first
+# delta always goes out on its own, immediately.
+
+# Faster JSON is optional (pip install orjson)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+SSE_COALESCE_BYTES = int(os.environ.get("SSE_COALESCE_BYTES", "512"))
+SSE_COALESCE_MS = float(os.environ.get("SSE_COALESCE_MS", "20"))
+
+DONE_FRAME = b"data: [DONE]\n\n"
+
+
+def _json_bytes(value) -> bytes:
+    """Compact UTF-8 JSON."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _json_escape(text: str) -> bytes:
+    """``text`` as the inside of a JSON string (no surrounding quotes).
+
+    Escaped pieces concatenate to the escape of the concatenated text, which
+    is what lets the encoder buffer already-escaped deltas.
+    """
+    return _json_bytes(text)[1:-1]
+
+
+class SSEEncoder:
+    """Frames text deltas as ``chat.completion.chunk`` events for one response."""
+
+    __slots__ = ("_prefix", "_first_prefix", "_suffix", "_finish", "_started",
+                 "max_bytes", "max_delay")
+
+    def __init__(self, msg_id: str, model: str, created: Optional[int] = None,
+                 first_role: Optional[str] = None,
+                 max_bytes: int = SSE_COALESCE_BYTES, max_delay_ms: float = SSE_COALESCE_MS):
+        head = (b'data: {"id":' + _json_bytes(msg_id)
+                + b',"object":"chat.completion.chunk","created":'
+                + str(int(time.time()) if created is None else created).encode()
+                + b',"model":' + _json_bytes(model)
+                + b',"choices":[{"index":0,"delta":{"content":"')
+        self._prefix = head
+        self._suffix = b'"},"finish_reason":null}]}\n\n'
+        # The first chunk can carry the role (OpenAI sends it once, up front)
+        self._first_prefix = head
+        self._started = False
+        if first_role:
+            self._first_prefix = head[:-len(b'"content":"')] + b'"role":' + _json_bytes(first_role) + b',"content":"'
+        self._finish = (b'data: {"id":' + _json_bytes(msg_id)
+                        + b',"object":"chat.completion.chunk",'
+                        + b'"choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}\n\n'
+                        + DONE_FRAME)
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay_ms / 1000
+
+    def frame(self, escaped: bytes) -> bytes:
+        """One chunk event for already-escaped delta text."""
+        prefix = self._prefix if self._started else self._first_prefix
+        self._started = True
+        return prefix + escaped + self._suffix
+
+    def chunk(self, text: str) -> bytes:
+        return self.frame(_json_escape(text))
+
+    def finish(self) -> bytes:
+        """The ``finish_reason: "stop"`` chunk followed by ``[DONE]``."""
+        return self._finish
+
+    async def encode(self, deltas: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        """Frames for a stream of text deltas, coalesced within the budgets."""
+        if self.max_delay <= 0 or self.max_bytes <= 0:
+            async for text in deltas:
+                if text:
+                    yield self.chunk(text)
+            yield self._finish
+            return
+
+        # A separate task drains ``deltas`` so a slow producer (e.g. a tool
+        # call mid-reply) never holds buffered text past the delay budget.
+        queue: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        async def pump():
+            try:
+                async for text in deltas:
+                    if text:
+                        queue.put_nowait(text)
+            finally:
+                queue.put_nowait(end)
+
+        producer = asyncio.create_task(pump())
+        loop = asyncio.get_running_loop()
+        buffered: list[bytes] = []
+        size = 0
+        deadline = 0.0
+        try:
+            while True:
+                if buffered:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                    except asyncio.TimeoutError:
+                        yield self.frame(b"".join(buffered))
+                        buffered.clear()
+                        size = 0
+                        continue
+                else:
+                    item = await queue.get()
+                if item is end:
+                    break
+                escaped = _json_escape(item)
+                if not self._started:
+                    yield self.frame(escaped)  # first token goes out right away
+                    continue
+                if not buffered:
+                    deadline = loop.time() + self.max_delay
+                buffered.append(escaped)
+                size += len(escaped)
+                if size >= self.max_bytes:
+                    yield self.frame(b"".join(buffered))
+                    buffered.clear()
+                    size = 0
+            if buffered:
+                yield self.frame(b"".join(buffered))
+            await producer  # surface producer errors
+            yield self._finish
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+
 # =====
 # Unified FastAPI App with AG-UI + CLM endpoints
 # =====
@@ -1692,38 +3033,25 @@ main_app.add_middleware(
 )
 
 
-# Middleware to extract user info from CopilotKit instructions
-@main_app.middleware("http")
-async def extract_user_middleware(request: Request, call_next):
-    """Extract user context from CopilotKit instructions before processing."""
-    # Only process POST requests that might contain messages
-    if request.method == "POST":
-        try:
-            # Read and restore body
-            body_bytes = await request.body()
-            if body_bytes:
-                body = json.loads(body_bytes)
-                messages = body.get("messages", [])
-
-                # Look for system messages with user context
-                for msg in messages:
-                    role = msg.get("role", "")
-                    content = msg.get("content", "")
-
-                    if role == "system" and "User ID:" in content:
-                        extracted = extract_user_from_instructions(content)
-                        if extracted.get("user_id"):
-                            print(f"🔐 Middleware extracted user: {extracted.get('name')} ({extracted.get('user_id')[:8]}...)", file=sys.stderr)
-
-                # Reconstruct request with body
-                async def receive():
-                    return {"type": "http.request", "body": body_bytes}
-
-                request = Request(request.scope, receive)
-        except Exception as e:
-            print(f"[Middleware] Error extracting user: {e}", file=sys.stderr)
+def remember_request_user(state_user: Optional[dict], instructions: Optional[str]) -> None:
+    """Extract user context from CopilotKit instructions and warm their context.
+
+    Runs inside the handler's body read, so the user is set in the request's
+    own context and inherited by the agent run.
+    """
+    prefetch_id = state_user.get("id") if state_user else None
+    if instructions:
+        extracted = extract_user_from_instructions(instructions)
+        if extracted.get("user_id"):
+            print(f"🔐 Middleware extracted user: {extracted.get('name')} ({extracted.get('user_id')[:8]}...)", file=sys.stderr)
+            prefetch_id = prefetch_id or extracted["user_id"]
+
+    # Warm memory/unread/profile while the AG-UI run is set up
+    prefetch_user_context(prefetch_id)
 
-    return await call_next(request)
+
+# Scans POST bodies as the handlers read them - no buffering, no extra JSON parse
+main_app.add_middleware(UserIdentityMiddleware, on_identity=remember_request_user, markers=("User ID:",))
 
 
 def parse_session_id(session_id: str | None) -> dict:
@@ -1775,103 +3103,268 @@ def extract_session_id(request: Request, body: dict) -> str | None:
     return request.query_params.get("custom_session_id")
 
 
-async def stream_sse_response(content: str, msg_id: str):
-    """Stream OpenAI-compatible SSE chunks - required by Hume EVI."""
-    words = content.split(' ')
-    for i, word in enumerate(words):
-        chunk = {
-            "id": msg_id,
-            "object": "chat.completion.chunk",
-            "created": 1700000000,
-            "model": "fractional-agent",
-            "choices": [{
-                "index": 0,
-                "delta": {
-                    "content": word + (' ' if i < len(words) - 1 else ''),
-                    "role": "assistant" if i == 0 else None
-                },
-                "finish_reason": None
-            }]
-        }
-        yield f"data: {json.dumps(chunk)}\n\n"
-        await asyncio.sleep(0.01)  # Small delay for natural streaming
-
-    # Final chunk
-    final = {
-        "id": msg_id,
-        "object": "chat.completion.chunk",
-        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
-    }
-    yield f"data: {json.dumps(final)}\n\n"
-    yield "data: [DONE]\n\n"
+async def stream_sse_response(content: Union[str, AsyncIterator[str]], msg_id: str):
+    """Stream OpenAI-compatible SSE chunks - required by Hume EVI.
+
+    ``content`` is finished text (fast paths) or an async iterator of text
+    deltas from stream_agent_for_clm, framed by SSEEncoder as they arrive.
+    """
+    encoder = SSEEncoder(msg_id, model="fractional-agent", created=1700000000, first_role="assistant")
+    if isinstance(content, str):
+        yield encoder.chunk(content)
+        yield encoder.finish()
+        return
+    async for frame in encoder.encode(content):
+        yield frame
 
 
-async def run_agent_for_clm(user_message: str, state: AppState, conversation_history: list = None) -> str:
-    """Run the Pydantic AI agent and return the text response.
+def build_message_history(conversation_history: list = None) -> list:
+    """Convert OpenAI-style messages (minus the current one) to Pydantic AI history."""
+    from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+    message_history = []
+    if conversation_history:
+        for msg in conversation_history[:-1]:  # Exclude last (current) message
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            if isinstance(content, str) and content.strip():
+                if role == "user":
+                    message_history.append(
+                        ModelRequest(parts=[UserPromptPart(content=content)])
+                    )
+                elif role == "assistant":
+                    message_history.append(
+                        ModelResponse(parts=[TextPart(content=content)])
+                    )
+    return message_history
+
+
+def _text_delta(event) -> str:
+    """Text carried by a model stream event ('' for tool calls, thinking, etc.)."""
+    from pydantic_ai.messages import PartStartEvent, PartDeltaEvent, TextPart, TextPartDelta
+
+    if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+        return event.part.content
+    if isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+        return event.delta.content_delta
+    return ""
+
+
+async def stream_agent_for_clm(user_message: str, state: AppState, conversation_history: list = None,
+                               fallback_text: str = "") -> AsyncIterator[str]:
+    """Run the Pydantic AI agent and yield its text as the model produces it.
+
+    Model requests are streamed and their text forwarded immediately; tool
+    calls run in between without emitting anything, and the next model
+    response continues the same reply. If nothing was sent when the run ends
+    (error or empty output) ``fallback_text`` is yielded instead.
 
     Args:
         user_message: The latest user message
         state: Current app state with user profile
         conversation_history: List of previous messages for context
+        fallback_text: Reply to send if the agent produced no text
     """
-    try:
-        from pydantic_ai.ag_ui import StateDeps
-        from pydantic_ai.messages import ModelMessage, ModelRequest, UserPromptPart
-
-        deps = StateDeps(state)
-
-        # Build message history for multi-turn context
-        message_history = []
-        if conversation_history:
-            for msg in conversation_history[:-1]:  # Exclude last (current) message
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                if isinstance(content, str) and content.strip():
-                    # Convert to Pydantic AI message format
-                    if role == "user":
-                        message_history.append(
-                            ModelRequest(parts=[UserPromptPart(content=content)])
-                        )
-                    elif role == "assistant":
-                        # For assistant messages, we need ModelResponse
-                        from pydantic_ai.messages import ModelResponse, TextPart
-                        message_history.append(
-                            ModelResponse(parts=[TextPart(content=content)])
-                        )
+    from pydantic_ai.messages import ToolCallPart
 
+    started = time.monotonic()
+    first_token = None
+    sent = 0
+    try:
+        message_history = build_message_history(conversation_history)
         print(f"[CLM] Running agent with {len(message_history)} history messages", file=sys.stderr)
 
-        # Run agent with history
-        result = await agent.run(
+        async with agent.iter(
             user_message,
-            deps=deps,
+            deps=StateDeps(state),
             message_history=message_history if message_history else None
-        )
-
-        # Extract text from result
-        if hasattr(result, 'data') and result.data:
-            return str(result.data)
-        elif hasattr(result, 'output'):
-            return str(result.output)
-        else:
-            return str(result)
+        ) as run:
+            async for node in run:
+                if Agent.is_model_request_node(node):
+                    separate = sent > 0  # continuing after a tool phase
+                    async with node.stream(run.ctx) as request_stream:
+                        async for event in request_stream:
+                            text = _text_delta(event)
+                            if not text:
+                                continue
+                            if separate and not text[0].isspace():
+                                text = " " + text
+                            separate = False
+                            if first_token is None:
+                                first_token = time.monotonic() - started
+                            sent += len(text)
+                            yield text
+                elif Agent.is_call_tools_node(node):
+                    tools = [p.tool_name for p in node.model_response.parts if isinstance(p, ToolCallPart)]
+                    if tools:
+                        print(f"[CLM] Running tools: {', '.join(tools)}", file=sys.stderr)
     except Exception as e:
         print(f"[CLM] Agent error: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
-        return ""
+
+    if not sent:
+        if fallback_text:
+            yield fallback_text
+        return
+    print(f"[CLM] Streamed {sent} chars, first token after {first_token:.2f}s, "
+          f"done after {time.monotonic() - started:.2f}s", file=sys.stderr)
+
+
+# =====
+# Intent routing (CLM fast path)
+# =====
+# Short, deterministic questions are answered straight from data instead of
+# running the model. All patterns compile into one anchored regex with a named
+# group per intent; they only match when the whole message is the question
+# (plus filler like "hey" or "please"), anything more goes to the agent.
+# normalize_query and IntentRouter are a copy of agent/tools/intents.py - port
+# fixes to both; the patterns, templates and answers are this service's own.
+INTENT_PATTERNS: dict[str, list[str]] = {
+    "user_name": [
+        r"what(?: is|s)? my name",
+        r"who am i",
+        r"what am i called",
+        r"do you know (?:my name|who i am)",
+    ],
+    "current_page": [
+        r"(?:what|which) page (?:am i|are we|is this)(?: on| looking at)?",
+        r"what(?: is|s)? (?:this|the current|the) page",
+        r"where are we",
+        r"current page",
+    ],
+    "job_count": [
+        r"how many (?:jobs|roles|positions|openings)"
+        r"(?: are there| do you have| are (?:listed|available|open))?"
+        r"(?: (?:here|right now|in total|altogether|on (?:this|the) (?:page|site)))?",
+    ],
+    "my_location": [
+        r"what(?: is|s)? my (?:preferred )?location",
+        r"where am i (?:based|located)",
+        r"what location (?:did i (?:pick|choose|set|save)|have i (?:picked|chosen|set|saved)|am i in)",
+    ],
+    "list_categories": [
+        r"(?:list|show|name|give)(?: me)?(?: all)?(?: the| your)? (?:job |role )?(?:categories|role types)",
+        r"what (?:job |role )?(?:categories|role types) (?:are there|do you have|are available|exist)",
+        r"what (?:are )?(?:the|your) (?:job |role )?(?:categories|role types)",
+        r"what (?:kinds?|types?) of (?:roles|jobs) (?:are there|do you have)",
+    ],
+}
+
+_INTENT_FILLER_BEFORE = r"(?:(?:hey|hi|hello|ok|okay|so|um|uh|and|please|can you tell me|could you tell me|tell me|do you know)\s+)*"
+_INTENT_FILLER_AFTER = r"(?:\s+(?:please|then|again|now))*"
+
+# Per-intent answers; the "unknown" variants are used when the data is missing
+INTENT_TEMPLATES = {
+    "user_name": {
+        "known": "Your name is {name}! I remembered that from when you logged in.",
+        "unknown": "I don't know your name yet. You can tell me, or sign in so I can remember you!",
+    },
+    "current_page": {
+        "known": "We're on the {location} jobs page. There are {jobs} fractional executive positions here. Want me to show you the roles?",
+        "unknown": "We're on the main fractional jobs page. Which location interests you - London, Manchester, or somewhere else?",
+    },
+    "job_count": {
+        "page": "There are {count} fractional executive positions on the {location} page. Want me to show you the roles?",
+        "known": "There are {count} fractional executive roles listed right now. Want me to narrow them down by role or location?",
+    },
+    "my_location": {
+        "known": "Your preferred location is {location}. Want me to find roles there?",
+        "unknown": "You haven't told me where you'd like to work yet. Where are you based?",
+        "signed_out": "I don't know where you're based yet. Sign in and tell me, and I'll remember it!",
+    },
+    "list_categories": {
+        "known": "We have {roles} roles. Which one interests you?",
+    },
+}
+
+
+def normalize_query(text: str) -> str:
+    """Lower-case, drop punctuation and apostrophes, collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", "", text.lower()).split())
 
 
-def is_name_question(query: str) -> bool:
-    """Check if user is asking about their name."""
-    q = query.lower()
-    return any(phrase in q for phrase in ['my name', 'who am i', 'what am i called'])
+def _spoken_list(values: list[str]) -> str:
+    if len(values) <= 1:
+        return "".join(values)
+    return f"{', '.join(values[:-1])} and {values[-1]}"
 
 
-def is_page_question(query: str) -> bool:
-    """Check if user is asking about the current page."""
-    q = query.lower()
-    return any(phrase in q for phrase in ['what page', 'where are we', 'which page', 'current page'])
+class IntentRouter:
+    """Classifies a message as one of ``intents`` or None with a single regex."""
+
+    def __init__(self, intents: dict[str, list[str]] = INTENT_PATTERNS):
+        groups = "|".join(
+            f"(?P<{name}>{'|'.join(patterns)})" for name, patterns in intents.items()
+        )
+        self._pattern = re.compile(f"{_INTENT_FILLER_BEFORE}(?:{groups}){_INTENT_FILLER_AFTER}")
+        self.routed = {name: 0 for name in intents}
+        self.passed = 0
+
+    def classify(self, text: str) -> Optional[str]:
+        match = self._pattern.fullmatch(normalize_query(text or ""))
+        if match is None:
+            self.passed += 1
+            return None
+        self.routed[match.lastgroup] += 1
+        return match.lastgroup
+
+    def stats(self) -> dict:
+        routed = sum(self.routed.values())
+        total = routed + self.passed
+        return {
+            "routed": dict(self.routed),
+            "passed_to_agent": self.passed,
+            "route_ratio": round(routed / total, 3) if total else 0.0,
+        }
+
+
+intent_router = IntentRouter()
+
+
+async def answer_intent(intent: str, first_name: Optional[str], user_id: Optional[str],
+                        page_context: Optional[dict]) -> Optional[str]:
+    """Reply for ``intent`` from data, or None to let the agent handle it."""
+    templates = INTENT_TEMPLATES[intent]
+    location = page_context.get("location") if page_context else None
+    try:
+        if intent == "user_name":
+            if first_name:
+                return templates["known"].format(name=first_name)
+            return templates["unknown"]
+
+        if intent == "current_page":
+            if location:
+                return templates["known"].format(location=location, jobs=page_context.get("total_jobs", "several"))
+            return templates["unknown"]
+
+        if intent == "job_count":
+            if location and page_context.get("total_jobs"):
+                return templates["page"].format(count=page_context["total_jobs"], location=location)
+            row = await db_fetch_one("SELECT COUNT(*) FROM test_jobs")
+            return templates["known"].format(count=row[0]) if row else None
+
+        if intent == "my_location":
+            if not user_id:
+                return templates["signed_out"]
+            saved = (await user_context_cache.get(user_id)).profile_items.get("location")
+            if not saved:
+                return templates["unknown"]
+            return templates["known"].format(location=saved[0])
+
+        if intent == "list_categories":
+            rows = await db_fetch_all("""
+                SELECT role_type, COUNT(*) AS cnt
+                FROM test_jobs
+                WHERE role_type IS NOT NULL
+                GROUP BY role_type ORDER BY cnt DESC
+            """)
+            if not rows:
+                return None
+            return templates["known"].format(roles=_spoken_list([r[0] for r in rows]))
+    except Exception as e:
+        print(f"[CLM] Could not answer {intent}, passing to agent: {e}", file=sys.stderr)
+    return None
 
 
 @main_app.post("/chat/completions")
@@ -1890,6 +3383,9 @@ async def clm_endpoint(request: Request):
     user_id = parsed["user_id"]
     page_context = parsed["page_context"]
 
+    # Start memory/unread/profile fetches now; the prompt builder awaits them
+    prefetch_user_context(user_id)
+
     print(f"[CLM] User: {first_name or 'anon'}, ID: {user_id or 'none'}", file=sys.stderr)
     if page_context:
         print(f"[CLM] Page: {page_context}", file=sys.stderr)
@@ -1905,25 +3401,15 @@ async def clm_endpoint(request: Request):
 
     print(f"[CLM] Query: {user_msg[:80]}...", file=sys.stderr)
 
-    # Handle name question directly (fast path)
-    if is_name_question(user_msg):
-        if first_name:
-            response_text = f"Your name is {first_name}! I remembered that from when you logged in."
-        else:
-            response_text = "I don't know your name yet. You can tell me, or sign in so I can remember you!"
-        msg_id = f"chatcmpl-{hash(user_msg) % 100000}"
-        return StreamingResponse(stream_sse_response(response_text, msg_id), media_type="text/event-stream")
-
-    # Handle page question directly (fast path)
-    if is_page_question(user_msg):
-        if page_context and page_context.get("location"):
-            loc = page_context["location"]
-            jobs = page_context.get("total_jobs", "several")
-            response_text = f"We're on the {loc} jobs page. There are {jobs} fractional executive positions here. Want me to show you the roles?"
-        else:
-            response_text = "We're on the main fractional jobs page. Which location interests you - London, Manchester, or somewhere else?"
-        msg_id = f"chatcmpl-{hash(user_msg) % 100000}"
-        return StreamingResponse(stream_sse_response(response_text, msg_id), media_type="text/event-stream")
+    # Answer deterministic questions from data without running the model
+    intent = intent_router.classify(user_msg)
+    if intent:
+        response_text = await answer_intent(intent, first_name, user_id, page_context)
+        print(f"[CLM] Fast path '{intent}': {'answered' if response_text else 'passed to agent'}",
+              file=sys.stderr)
+        if response_text:
+            msg_id = f"chatcmpl-{hash(user_msg) % 100000}"
+            return StreamingResponse(stream_sse_response(response_text, msg_id), media_type="text/event-stream")
 
     # Build state for agent
     user_profile = UserProfile(
@@ -1944,41 +3430,50 @@ async def clm_endpoint(request: Request):
         page_context=page_ctx,
     )
 
-    # Run the agent with conversation history
-    response_text = await run_agent_for_clm(user_msg, state, conversation_history=messages)
-
     # Fallback if agent fails
-    if not response_text:
-        if first_name:
-            response_text = f"Hi {first_name}! I can help you find fractional executive roles. What type of position interests you - CTO, CFO, CMO, COO, or CHRO?"
-        else:
-            response_text = "I can help you find fractional executive roles. What type of position interests you?"
-
-    print(f"[CLM] Response: {response_text[:80]}...", file=sys.stderr)
+    if first_name:
+        fallback_text = f"Hi {first_name}! I can help you find fractional executive roles. What type of position interests you - CTO, CFO, CMO, COO, or CHRO?"
+    else:
+        fallback_text = "I can help you find fractional executive roles. What type of position interests you?"
 
-    # Store to Zep (fire and forget)
+    # Store to Zep (queued on the write-behind worker, flushed in batches)
+    thread_id = f"voice_{session_id or 'unknown'}"
     if user_id and user_msg:
-        asyncio.create_task(store_conversation_message(
-            session_id=f"voice_{session_id or 'unknown'}",
-            user_id=user_id,
-            role="user",
-            content=user_msg
-        ))
-        asyncio.create_task(store_conversation_message(
-            session_id=f"voice_{session_id or 'unknown'}",
-            user_id=user_id,
-            role="assistant",
-            content=response_text
-        ))
+        await store_conversation_message(thread_id, user_id, "user", user_msg)
+
+    async def respond():
+        # Stream the agent run as it happens; keep the text for Zep once it's done
+        parts = []
+        async for text in stream_agent_for_clm(user_msg, state, messages, fallback_text):
+            parts.append(text)
+            yield text
+        response_text = "".join(parts)
+        print(f"[CLM] Response: {response_text[:80]}...", file=sys.stderr)
+        if user_id and user_msg:
+            await store_conversation_message(thread_id, user_id, "assistant", response_text)
 
     # Return SSE streaming response (required by Hume EVI)
     msg_id = f"chatcmpl-{hash(user_msg) % 100000}"
     return StreamingResponse(
-        stream_sse_response(response_text, msg_id),
+        stream_sse_response(respond(), msg_id),
         media_type="text/event-stream"
     )
 
 
+@main_app.on_event("startup")
+async def startup_event():
+    """Start listening for profile changes made by other processes."""
+    await profile_listener.start()
+
+
+@main_app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued Zep writes and release pooled database connections."""
+    await profile_listener.stop()
+    await close_zep_client()
+    close_db_pool()
+
+
 @main_app.get("/chat/completions")
 async def clm_health():
     return {"status": "ok", "message": "Use POST for chat completions"}
@@ -1986,7 +3481,10 @@ async def clm_health():
 
 @main_app.get("/")
 async def health():
-    return {"status": "ok", "service": "fractional-quest-agent", "endpoints": ["/chat/completions (CLM)", "/* (AG-UI)"]}
+    return {"status": "ok", "service": "fractional-quest-agent", "endpoints": ["/chat/completions (CLM)", "/* (AG-UI)"],
+            "zep_writes": zep_writer.snapshot(), "user_context_cache": user_context_cache.stats(),
+            "intents": intent_router.stats(), "db_pool": _db_pool.stats() if _db_pool else {},
+            "profile_snapshots": {**profile_snapshots.stats(), "listener": profile_listener.stats()}}
 
 
 # Mount AG-UI app for CopilotKit (catch-all)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# src/agent.py reads these at import time; tests never reach real services
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,128 @@
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+import src.agent as agent
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    conns = []
+
+    def connect(*args, **kwargs):
+        conns.append(FakeConn())
+        return conns[-1]
+
+    monkeypatch.setattr(agent.psycopg2, "connect", connect)
+    return conns
+
+
+@pytest.fixture
+def pool(monkeypatch, opened):
+    pool = agent.ConnectionPool("postgresql://test", min_size=0, max_size=2, timeout=0.05)
+    monkeypatch.setattr(agent, "get_db_pool", lambda: pool)
+    return pool
+
+
+def test_broken_connection_is_discarded_and_retried_once(pool, opened):
+    calls = []
+
+    def fn(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return "ok"
+
+    assert agent._run_with_connection(fn, ()) == "ok"
+    assert calls == opened and opened[0].closed and not opened[1].closed
+    assert pool.stats()["recycled"] == 1
+
+
+def test_second_failure_is_raised(pool, opened):
+    def fn(conn):
+        raise psycopg2.InterfaceError("connection already closed")
+
+    with pytest.raises(psycopg2.InterfaceError):
+        agent._run_with_connection(fn, ())
+    assert len(opened) == 2 and all(conn.closed for conn in opened)
+    assert pool.stats()["size"] == 0
+
+
+def test_query_errors_are_not_retried(pool, opened):
+    def fn(conn):
+        raise psycopg2.errors.UndefinedTable("no such table")
+
+    with pytest.raises(psycopg2.ProgrammingError):
+        agent._run_with_connection(fn, ())
+    assert len(opened) == 1 and not opened[0].closed
+    assert pool.stats()["idle"] == 1
+
+
+def test_idle_connection_that_died_is_replaced(pool, opened):
+    with pool.connection() as conn:
+        pass
+    conn.dead = True
+    pool.max_idle = 0
+    assert agent._run_with_connection(lambda conn: conn, ()) is opened[1]
+    assert opened[0].closed
+
+
+def test_old_connections_are_recycled(pool, opened):
+    with pool.connection():
+        pass
+    pool.max_lifetime = 0
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    assert pool.stats()["recycled"] == 1
+
+
+def test_open_transaction_is_rolled_back_on_return(pool, opened):
+    with pool.connection() as conn:
+        conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    assert conn.rollbacks == 1
+    with pool.connection() as again:
+        assert again is conn
+
+
+def test_checkout_times_out_when_pool_is_exhausted(pool):
+    with pool.connection(), pool.connection():
+        with pytest.raises(agent.PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.stats()["timeouts"] == 1
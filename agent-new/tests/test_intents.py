@@ -0,0 +1,40 @@
+import asyncio
+
+import src.agent as agent
+
+
+def test_router_routes_whole_questions_only():
+    router = agent.IntentRouter()
+    assert router.classify("Hey, what's my name?") == "user_name"
+    assert router.classify("how many roles are there right now please") == "job_count"
+    assert router.classify("what kinds of roles do you have") == "list_categories"
+    assert router.classify("what's my name and find me CTO roles") is None
+    assert router.stats()["passed_to_agent"] == 1
+
+
+def test_answers_from_page_context_and_data(monkeypatch):
+    async def fetch_one(sql, params=None):
+        return (42,)
+
+    async def fetch_all(sql, params=None):
+        return [("CTO", 9), ("CFO", 4), ("CMO", 1)]
+
+    monkeypatch.setattr(agent, "db_fetch_one", fetch_one)
+    monkeypatch.setattr(agent, "db_fetch_all", fetch_all)
+    page = {"location": "London", "total_jobs": 12}
+    assert "12" in asyncio.run(agent.answer_intent("job_count", None, None, page))
+    assert "42" in asyncio.run(agent.answer_intent("job_count", None, None, None))
+    assert "CTO, CFO and CMO" in asyncio.run(agent.answer_intent("list_categories", None, None, None))
+    assert "Sam" in asyncio.run(agent.answer_intent("user_name", "Sam", None, None))
+    assert asyncio.run(agent.answer_intent("my_location", None, None, None)) == \
+        agent.INTENT_TEMPLATES["my_location"]["signed_out"]
+
+
+def test_data_errors_pass_to_the_agent(monkeypatch):
+    async def failing(sql, params=None):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(agent, "db_fetch_one", failing)
+    monkeypatch.setattr(agent, "db_fetch_all", failing)
+    assert asyncio.run(agent.answer_intent("job_count", None, None, None)) is None
+    assert asyncio.run(agent.answer_intent("list_categories", None, None, None)) is None
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+import src.agent as agent
+
+INSTRUCTIONS = "You are a recruiter.\nUser ID: u-1\nUser Name: Dan"
+
+
+def _scan(data: bytes, size: int) -> agent.UserIdentityScanner:
+    scanner = agent.UserIdentityScanner()
+    for i in range(0, len(data), size):
+        scanner.feed(data[i:i + size])
+    return scanner
+
+
+@pytest.mark.parametrize("size", [3, 999, 1 << 20])
+def test_long_instructions_and_state_user(size):
+    prompt = "Be helpful. " * 4000 + INSTRUCTIONS
+    data = json.dumps({
+        "messages": [{"role": "assistant", "toolCalls": [{"args": {"user": {"id": "decoy"}}}]},
+                     {"content": prompt, "role": "system"}],
+        "state": {"user": {"id": "u-1", "name": "Dan"}},
+    }).encode()
+    scanner = _scan(data, size)
+    assert scanner.instructions == prompt
+    assert scanner.state_user == {"id": "u-1", "name": "Dan"}
+
+
+def test_user_outside_state_is_ignored():
+    data = json.dumps({"context": {"user": {"id": "x"}}, "state": {"page": {"user": {"id": "y"}}}}).encode()
+    assert _scan(data, 7).state_user is None
@@ -0,0 +1,112 @@
+import asyncio
+
+import src.agent as agent
+
+
+class CountingCache(agent.PerUserCache):
+    def __init__(self, ttl=60, max_users=10, enabled=True, delay=0.01):
+        super().__init__(ttl, max_users, enabled)
+        self.delay = delay
+        self.loads = []
+
+    async def _load(self, user_id):
+        self.loads.append(user_id)
+        await asyncio.sleep(self.delay)
+        return {"user": user_id, "load": len(self.loads)}
+
+
+def test_concurrent_misses_share_one_load():
+    cache = CountingCache()
+
+    async def run():
+        return await asyncio.gather(*(cache.get("u1") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert cache.loads == ["u1"]
+    assert all(r is results[0] for r in results)
+    assert asyncio.run(cache.get("u1")) is results[0]
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidation_during_load_is_not_cached():
+    cache = CountingCache()
+
+    async def run():
+        task = asyncio.create_task(cache.get("u1"))
+        await asyncio.sleep(0)
+        cache.invalidate("u1")
+        first = await task
+        return first, await cache.get("u1")
+
+    first, second = asyncio.run(run())
+    assert first["load"] == 1 and second["load"] == 2
+    assert cache._generations == {}
+
+
+def test_cancelled_caller_does_not_cancel_shared_load():
+    cache = CountingCache()
+
+    async def run():
+        first = asyncio.create_task(cache.get("u1"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get("u1"))
+        await asyncio.sleep(0)
+        first.cancel()
+        value = await second
+        assert first.cancelled()
+        return value
+
+    assert asyncio.run(run())["load"] == 1
+    assert cache.loads == ["u1"]
+    assert cache.stats()["users"] == 1
+
+
+def test_clear_ttl_capacity_and_disabled():
+    cache = CountingCache(max_users=2, delay=0)
+    for user_id in ("u1", "u2", "u3"):
+        asyncio.run(cache.get(user_id))
+    assert list(cache._entries) == ["u2", "u3"]
+    cache.clear()
+    assert cache.stats()["users"] == 0
+
+    cache = CountingCache(ttl=0, delay=0)
+    asyncio.run(cache.get("u1"))
+    asyncio.run(cache.get("u1"))
+    assert cache.loads == ["u1", "u1"]
+
+    cache = CountingCache(enabled=False, delay=0)
+    asyncio.run(cache.get("u1"))
+    assert cache.stats()["users"] == 0
+
+
+def test_profile_snapshot_cache_loads_from_profile_items(monkeypatch):
+    queries = []
+
+    async def fetch_all(sql, params=None):
+        queries.append(params)
+        return [("skill", "casting", None), ("location", "Berlin", {"remote": True}), ("skill", "editing", None)]
+
+    monkeypatch.setattr(agent, "db_fetch_all", fetch_all)
+    cache = agent.ProfileSnapshotCache()
+    snapshot = asyncio.run(cache.get("u1"))
+    assert snapshot.values_by_type() == {"skill": ["casting", "editing"], "location": ["Berlin"]}
+    assert [item.value for item in snapshot.ordered] == ["casting", "Berlin", "editing"]
+    asyncio.run(cache.get("u1"))
+    assert queries == [("u1",)]
+
+
+def test_instructions_are_parsed_once_per_prompt(monkeypatch):
+    parsed = []
+    parse = agent._parse_instructions
+
+    def counting_parse(instructions):
+        parsed.append(instructions)
+        return parse(instructions)
+
+    monkeypatch.setattr(agent, "_parse_instructions", counting_parse)
+    monkeypatch.setattr(agent, "_parsed_instructions", agent.TTLCache("instructions", ttl=60, max_entries=2))
+    prompt = "User Name: Sam\nUser ID: 1234abcd-5678\nUser Email: sam@example.com"
+    for _ in range(3):
+        assert agent.extract_user_from_instructions(prompt)["user_id"] == "1234abcd-5678"
+    assert parsed == [prompt]
+    assert agent._parsed_instructions.stats()["entries"] == 1
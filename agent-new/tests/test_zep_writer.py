@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import pytest
+
+import src.agent as agent
+
+
+def _client(handler):
+    return httpx.AsyncClient(base_url="https://zep.test", transport=httpx.MockTransport(handler))
+
+
+def _flush(writer, client, messages=1):
+    async def run():
+        return await writer._flush_thread(client, "t1", "u1", [{"role": "user", "content": "hi"}] * messages)
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("status, body", [(201, ""), (409, ""), (400, '{"message": "user already exists"}')])
+def test_existing_or_created_ids_are_remembered(status, body):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("/messages"):
+            return httpx.Response(200)
+        return httpx.Response(status, text=body)
+
+    writer = agent.ZepWriteBehind()
+    _flush(writer, _client(handler))
+    _flush(writer, _client(handler))
+    assert calls.count("/api/v2/users") == 1
+    assert calls.count("/api/v2/threads") == 1
+    assert writer.stats["stored"] == 2
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 429, 503])
+def test_failed_creates_are_retried_and_counted(status):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(status, text="nope")
+
+    writer = agent.ZepWriteBehind()
+    _flush(writer, _client(handler), messages=2)
+    _flush(writer, _client(handler), messages=2)
+    assert calls == ["/api/v2/users", "/api/v2/users"]
+    assert not writer._known_users
+    assert writer.stats["failed"] == 4
+
+
+def test_in_flight_messages_count_against_the_limit(monkeypatch):
+    monkeypatch.setattr(agent, "ZEP_WRITE_MAX_PENDING", 2)
+    monkeypatch.setattr(agent, "ZEP_WRITE_BATCH_WINDOW", 0)
+    monkeypatch.setattr(agent, "ZEP_WRITE_ENQUEUE_TIMEOUT", 0.01)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(201)
+
+        monkeypatch.setattr(agent, "get_zep_client", lambda: _client(handler))
+        writer = agent.ZepWriteBehind()
+        assert await writer.enqueue("t1", "u1", "user", "a")
+        assert await writer.enqueue("t1", "u1", "user", "b")
+        await asyncio.sleep(0.01)  # worker took both; their POSTs are blocked
+        assert writer.snapshot()["in_flight"] == 2
+        assert not await writer.enqueue("t2", "u2", "user", "c")
+        release.set()
+        await asyncio.sleep(0.01)
+        assert writer.snapshot()["in_flight"] == 0
+        assert await writer.enqueue("t2", "u2", "user", "d")
+        await writer.close()
+        return writer.stats
+
+    stats = asyncio.run(run())
+    assert stats["dropped"] == 1
+    assert stats["stored"] == 3
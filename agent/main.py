@@ -7,74 +7,114 @@ Endpoints:
 """
 
 import os
-import json
 import uuid
 import time
 import asyncio
 import re
 import sys
-from typing import Optional, List
+import hashlib
+from contextvars import ContextVar
+from typing import Optional, List, AsyncIterator, Union
 from textwrap import dedent
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, Request, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import StreamingResponse
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.ag_ui import StateDeps
+from pydantic_ai.messages import PartStartEvent, PartDeltaEvent, TextPart, TextPartDelta, ToolCallPart
 from pydantic_ai.models.google import GoogleModel
 
 from tools.job_search import search_jobs, get_available_categories, get_available_countries, get_job_by_id
+from tools.job_search import lookup_cache as job_lookup_cache
 from tools.company_lookup import lookup_company
+from tools import db, job_catalog, company_store, profile_snapshot
+from tools.cache import TTLCache
+from tools.sse import SSEEncoder
+from tools.intents import router as intent_router, answer as answer_intent
+from tools.response_cache import response_cache, AGUIResponseCache
+from tools.run_memo import RunMemo, invalidates
+from tools.request_identity import UserIdentityMiddleware
 from tools.user_context import (
     get_user_profile, save_user_profile,
     get_user_job_interests, save_job_interest,
     get_conversation_memory, search_user_memories,
     get_full_user_context,
+    init_zep_client, close_zep_client,
     # Profile items (skills, role, location coaching)
     ensure_profile_items_table, get_profile_items,
-    save_profile_item, delete_profile_item,
+    get_profile_summary,
+    save_profile_item, save_profile_items, delete_profile_item,
     get_profile_completeness as get_profile_completeness_db
 )
 
 
 # =====
-# User Context Cache (for CopilotKit instructions parsing)
+# Request User Context (for CopilotKit instructions parsing)
 # =====
-# When CopilotKit passes user info in instructions, we cache it here
-# so tools can access it even when state.user is None
-_cached_user_context: dict = {}
+# When CopilotKit passes user info in instructions, we keep it for the
+# current request so tools can access it even when state.user is None.
+# A contextvar, not a global: concurrent requests on one worker each see
+# only their own user (tasks started by the request inherit it).
+_request_user_context: ContextVar[Optional[dict]] = ContextVar("request_user_context", default=None)
 
 
-def extract_user_from_instructions(instructions: str) -> dict:
-    """Extract user info from CopilotKit instructions or Hume system prompt."""
-    result = {"user_id": None, "name": None, "email": None}
+def request_user_context() -> dict:
+    """User extracted for the current request ({} when none)."""
+    return _request_user_context.get() or {}
+
+
+def set_request_user_context(user: dict) -> None:
+    _request_user_context.set(user)
 
-    if not instructions:
-        return result
 
-    # Look for User ID pattern - multiple formats
-    # "User ID: xxx" or "ID: xxx"
-    id_match = re.search(r'(?:User\s+)?ID:\s*([a-zA-Z0-9-]+)', instructions, re.IGNORECASE)
-    if id_match:
-        result["user_id"] = id_match.group(1)
+# "User ID: / Name: / Email:" (with or without "User "), found in one pass.
+# Each field takes its first occurrence; a key whose value doesn't parse is
+# skipped, as if it weren't there.
+_INSTRUCTION_KEYS = re.compile(r'(?:User\s+)?(ID|Name|Email):\s*', re.IGNORECASE)
+_INSTRUCTION_VALUES = {
+    "id": re.compile(r'[a-zA-Z0-9-]+'),
+    "name": re.compile(r'[^\n]+'),
+    "email": re.compile(r'[^\n]+'),
+}
+_INSTRUCTION_FIELDS = {"id": "user_id", "name": "name", "email": "email"}
 
-    # Look for User Name pattern - multiple formats
-    # "User Name: xxx" or "Name: xxx"
-    name_match = re.search(r'(?:User\s+)?Name:\s*([^\n]+)', instructions, re.IGNORECASE)
-    if name_match:
-        result["name"] = name_match.group(1).strip()
+# CopilotKit resends the same system message every turn: parse each once
+_parsed_instructions = TTLCache("instructions", ttl=3600, max_entries=512)
+
+
+def _parse_instructions(instructions: str) -> dict:
+    result = {"user_id": None, "name": None, "email": None}
+    for key in _INSTRUCTION_KEYS.finditer(instructions):
+        label = key.group(1).lower()
+        field = _INSTRUCTION_FIELDS[label]
+        if result[field] is not None:
+            continue
+        value = _INSTRUCTION_VALUES[label].match(instructions, key.end())
+        if value:
+            result[field] = value.group().strip()
+        if all(result.values()):
+            break
+    return result
 
-    # Look for Email pattern
-    email_match = re.search(r'(?:User\s+)?Email:\s*([^\n]+)', instructions, re.IGNORECASE)
-    if email_match:
-        result["email"] = email_match.group(1).strip()
+
+def extract_user_from_instructions(instructions: str) -> dict:
+    """Extract user info from CopilotKit instructions or Hume system prompt."""
+    if not instructions:
+        return {"user_id": None, "name": None, "email": None}
+
+    digest = hashlib.blake2b(instructions.encode(), digest_size=16).digest()
+    parsed = _parsed_instructions.get(digest)
+    if parsed is None:
+        parsed = _parse_instructions(instructions)
+        _parsed_instructions.set(digest, parsed)
+    result = dict(parsed)
 
     if result["user_id"] or result["name"]:
-        global _cached_user_context
-        _cached_user_context = result
+        set_request_user_context(result)
         name_display = result['name'] or 'Unknown'
         id_display = result['user_id'][:8] + '...' if result['user_id'] else 'N/A'
         print(f"[Cache] Cached user: {name_display} ({id_display})", file=sys.stderr)
@@ -86,8 +126,9 @@ def get_effective_user_id(state_user) -> Optional[str]:
     """Get user ID from state or cached instructions."""
     if state_user and state_user.id:
         return state_user.id
-    if _cached_user_context.get("user_id"):
-        return _cached_user_context["user_id"]
+    cached = request_user_context()
+    if cached.get("user_id"):
+        return cached["user_id"]
     return None
 
 
@@ -95,8 +136,9 @@ def get_effective_user_name(state_user) -> Optional[str]:
     """Get user name from state or cached instructions."""
     if state_user and (state_user.firstName or state_user.name):
         return state_user.firstName or state_user.name
-    if _cached_user_context.get("name"):
-        return _cached_user_context["name"]
+    cached = request_user_context()
+    if cached.get("name"):
+        return cached["name"]
     return None
 
 
@@ -104,8 +146,9 @@ def get_effective_user_email(state_user) -> Optional[str]:
     """Get user email from state or cached instructions."""
     if state_user and state_user.email:
         return state_user.email
-    if _cached_user_context.get("email"):
-        return _cached_user_context["email"]
+    cached = request_user_context()
+    if cached.get("email"):
+        return cached["email"]
     return None
 
 
@@ -144,6 +187,31 @@ class AppState(BaseModel):
     search_query: str = ""
     user: Optional[UserProfile] = None
     page: Optional[PageContext] = None
+    # Read-only lookups memoized for this run (never sent to the frontend)
+    _memo: RunMemo = PrivateAttr(default_factory=RunMemo)
+
+    @property
+    def memo(self) -> RunMemo:
+        return self._memo
+
+
+async def memo_profile_items(ctx: RunContext[StateDeps[AppState]], user_id: str) -> dict:
+    """get_profile_items, queried at most once per run until a profile write."""
+    return await ctx.deps.state.memo.load(
+        ("profile_items", user_id), lambda: get_profile_items(user_id), tags=("profile",)
+    )
+
+
+async def memo_profile_summary(ctx: RunContext[StateDeps[AppState]], user_id: str) -> dict:
+    """get_profile_summary (per-type counts and values), queried at most once per run until a profile write."""
+    return await ctx.deps.state.memo.load(
+        ("profile_summary", user_id), lambda: get_profile_summary(user_id), tags=("profile",)
+    )
+
+
+async def memo_profile_completeness(ctx: RunContext[StateDeps[AppState]], user_id: str) -> dict:
+    """Profile completeness computed from the run's memoized profile items."""
+    return await get_profile_completeness_db(user_id, items=await memo_profile_items(ctx, user_id))
 
 
 # =====
@@ -171,6 +239,7 @@ agent = Agent(
         | "Find/show jobs" | search_esports_jobs |
         | "Save this job" | save_job_to_favorites |
         | "I know Python" / skills | save_user_skill (→ Repo) |
+        | "Python, SQL and design" | save_user_skills (→ Repo) |
         | "Looking for CTO roles" | save_role_preference (→ Repo) |
         | "I'm based in London" | save_location_preference (→ Repo) |
         | "I have 5 years experience" | save_experience_level (→ Velo) |
@@ -203,7 +272,7 @@ agent = Agent(
         - **Questions**:
           1. "Where are you based?" (save_location_preference)
           2. "What role are you targeting?" (save_role_preference)
-          3. "What are your top 3 skills?" (save_user_skill - call 3 times)
+          3. "What are your top 3 skills?" (save_user_skills - all in one call)
         - **Complete message**: "🏛️ REPO UNLOCKED! Your foundation is SOLID!"
 
         ### TRINITY - Your Soul (Purple) 🔮
@@ -242,6 +311,7 @@ agent = Agent(
         ### SAVING DATA
         When user mentions info, save it SILENTLY then confirm briefly:
         - "I know Python" → save_user_skill("Python") → "Got it, Python added to Repo!"
+        - "Python, SQL and Figma" → save_user_skills(["Python", "SQL", "Figma"]) → "Three skills added to Repo!"
         - "I'm in London" → save_location_preference("London") → "London set for Repo!"
         - "Looking for CTO" → save_role_preference("CTO") → "CTO role locked in for Repo!"
         - "5 years experience" → save_experience_level(5) → "5 years noted for Velo!"
@@ -275,7 +345,7 @@ agent = Agent(
 
 
 @agent.tool
-def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None, category: str = None, country: str = None) -> dict:
+async def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None, category: str = None, country: str = None) -> dict:
     """Search for esports jobs. Use this when user asks for jobs or positions.
 
     Args:
@@ -284,7 +354,7 @@ def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None,
         country: Country filter
     """
     print(f"[Tool] Searching: query={query}, category={category}, country={country}", file=sys.stderr)
-    results = search_jobs(query=query, category=category, country=country, limit=5)
+    results = await search_jobs(query=query, category=category, country=country, limit=5)
 
     # Update state
     jobs = [Job(
@@ -308,7 +378,7 @@ def search_esports_jobs(ctx: RunContext[StateDeps[AppState]], query: str = None,
 
 
 @agent.tool
-def lookup_esports_company(ctx: RunContext[StateDeps[AppState]], company_name: str) -> dict:
+async def lookup_esports_company(ctx: RunContext[StateDeps[AppState]], company_name: str) -> dict:
     """Get information about an esports company.
 
     Args:
@@ -335,21 +405,21 @@ def lookup_esports_company(ctx: RunContext[StateDeps[AppState]], company_name: s
 
 
 @agent.tool
-def get_categories(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_categories(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get list of available job categories in esports."""
-    categories = get_available_categories()
+    categories = await get_available_categories()
     return {"categories": categories, "count": len(categories)}
 
 
 @agent.tool
-def get_countries(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_countries(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get list of countries with available esports jobs."""
-    countries = get_available_countries()
+    countries = await get_available_countries()
     return {"countries": countries, "count": len(countries)}
 
 
 @agent.tool
-def get_my_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_my_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get the current user's profile info (name, email, id).
 
     ALWAYS call this tool when user asks: "what is my name", "what is my email", "who am I", etc.
@@ -368,15 +438,16 @@ def get_my_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
             "message": f"User is {user.firstName or user.name}"
         }
 
-    # Try from cached context (extracted by middleware)
-    if _cached_user_context.get("user_id"):
-        print(f"[Tool] get_my_profile from cache: {_cached_user_context.get('name')}", file=sys.stderr)
+    # Try from this request's context (extracted by middleware)
+    cached = request_user_context()
+    if cached.get("user_id"):
+        print(f"[Tool] get_my_profile from request context: {cached.get('name')}", file=sys.stderr)
         return {
             "found": True,
-            "name": _cached_user_context.get("name"),
-            "email": _cached_user_context.get("email"),
-            "id": _cached_user_context.get("user_id"),
-            "message": f"User is {_cached_user_context.get('name')}"
+            "name": cached.get("name"),
+            "email": cached.get("email"),
+            "id": cached.get("user_id"),
+            "message": f"User is {cached.get('name')}"
         }
 
     return {
@@ -386,7 +457,7 @@ def get_my_profile(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
-def get_current_page(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_current_page(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get information about the page the user is currently viewing.
 
     ALWAYS call this when user asks about jobs or content to understand their context.
@@ -416,7 +487,7 @@ def get_current_page(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
-def get_my_full_context(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_my_full_context(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get complete user context including profile, job interests, and conversation history.
 
     Call this when you need to understand the user's background, skills, or past interactions.
@@ -426,12 +497,15 @@ def get_my_full_context(ctx: RunContext[StateDeps[AppState]]) -> dict:
         return {"found": False, "message": "User not logged in"}
 
     print(f"[Tool] Getting full context for: {user_id}", file=sys.stderr)
-    context = get_full_user_context(user_id)
+    context = await ctx.deps.state.memo.load(
+        ("full_context", user_id), lambda: get_full_user_context(user_id), tags=("profile", "interests")
+    )
     return {"found": True, "context": context}
 
 
 @agent.tool
-def update_my_skills(ctx: RunContext[StateDeps[AppState]], skills: list[str]) -> dict:
+@invalidates("profile")
+async def update_my_skills(ctx: RunContext[StateDeps[AppState]], skills: list[str]) -> dict:
     """Update the user's skills profile.
 
     Args:
@@ -445,12 +519,13 @@ def update_my_skills(ctx: RunContext[StateDeps[AppState]], skills: list[str]) ->
     email = get_effective_user_email(ctx.deps.state.user)
     name = get_effective_user_name(ctx.deps.state.user)
 
-    result = save_user_profile(user_id, email=email, name=name, skills=skills)
+    result = await save_user_profile(user_id, email=email, name=name, skills=skills)
     return result
 
 
 @agent.tool
-def save_job_to_favorites(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
+@invalidates("interests")
+async def save_job_to_favorites(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
     """Save a job to user's favorites/interests.
 
     Args:
@@ -461,12 +536,12 @@ def save_job_to_favorites(ctx: RunContext[StateDeps[AppState]], job_id: str) ->
         return {"success": False, "message": "User not logged in"}
 
     print(f"[Tool] Saving job {job_id} for user {user_id}", file=sys.stderr)
-    result = save_job_interest(user_id, job_id, interest_type="favorited")
+    result = await save_job_interest(user_id, job_id, interest_type="favorited")
     return result
 
 
 @agent.tool
-def get_my_saved_jobs(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_my_saved_jobs(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get jobs the user has saved or shown interest in.
 
     Returns list of jobs user has interacted with.
@@ -476,12 +551,14 @@ def get_my_saved_jobs(ctx: RunContext[StateDeps[AppState]]) -> dict:
         return {"found": False, "message": "User not logged in"}
 
     print(f"[Tool] Getting saved jobs for: {user_id}", file=sys.stderr)
-    result = get_user_job_interests(user_id, limit=10)
+    result = await ctx.deps.state.memo.load(
+        ("job_interests", user_id), lambda: get_user_job_interests(user_id, limit=10), tags=("interests",)
+    )
     return result
 
 
 @agent.tool
-def recall_past_conversations(ctx: RunContext[StateDeps[AppState]], topic: str = None) -> dict:
+async def recall_past_conversations(ctx: RunContext[StateDeps[AppState]], topic: str = None) -> dict:
     """Search past conversations for relevant context.
 
     Args:
@@ -494,9 +571,9 @@ def recall_past_conversations(ctx: RunContext[StateDeps[AppState]], topic: str =
     print(f"[Tool] Recalling conversations for {user_id}, topic: {topic}", file=sys.stderr)
 
     if topic:
-        result = search_user_memories(user_id, topic, limit=3)
+        result = await search_user_memories(user_id, topic, limit=3)
     else:
-        result = get_conversation_memory(user_id, limit=5)
+        result = await get_conversation_memory(user_id, limit=5)
 
     return result
 
@@ -506,7 +583,8 @@ def recall_past_conversations(ctx: RunContext[StateDeps[AppState]], topic: str =
 # =====
 
 @agent.tool
-def save_user_skill(ctx: RunContext[StateDeps[AppState]], skill: str, proficiency: str = "intermediate") -> dict:
+@invalidates("profile")
+async def save_user_skill(ctx: RunContext[StateDeps[AppState]], skill: str, proficiency: str = "intermediate") -> dict:
     """Save a skill to user's profile.
 
     Call this when user mentions they have a skill (e.g., "I know Python", "I'm good at marketing").
@@ -521,7 +599,7 @@ def save_user_skill(ctx: RunContext[StateDeps[AppState]], skill: str, proficienc
 
     print(f"[Tool] Saving skill '{skill}' ({proficiency}) for user {user_id}", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="skill",
         value=skill,
@@ -540,7 +618,50 @@ def save_user_skill(ctx: RunContext[StateDeps[AppState]], skill: str, proficienc
 
 
 @agent.tool
-def save_role_preference(ctx: RunContext[StateDeps[AppState]], role: str) -> dict:
+@invalidates("profile")
+async def save_user_skills(ctx: RunContext[StateDeps[AppState]], skills: List[str], proficiency: str = "intermediate") -> dict:
+    """Save several skills to user's profile at once.
+
+    Call this instead of save_user_skill when user names more than one skill
+    (e.g., "My top 3 skills are Python, SQL and leadership").
+
+    Args:
+        skills: The skill names (e.g., ["Python", "SQL", "Leadership"])
+        proficiency: Skill level for all of them - "beginner", "intermediate", or "expert"
+    """
+    user_id = get_effective_user_id(ctx.deps.state.user)
+    if not user_id:
+        return {"success": False, "message": "User not logged in"}
+
+    skills = [s.strip() for s in skills if s and s.strip()]
+    if not skills:
+        return {"success": False, "message": "No skills given"}
+
+    print(f"[Tool] Saving {len(skills)} skills ({proficiency}) for user {user_id}", file=sys.stderr)
+
+    result = await save_profile_items(user_id, [
+        {
+            "item_type": "skill",
+            "value": skill,
+            "metadata": {"proficiency": proficiency},
+            "confirmed": True
+        }
+        for skill in skills
+    ])
+
+    if result.get("success"):
+        return {
+            "success": True,
+            "message": f"Added {', '.join(skills)} ({proficiency}) to your profile",
+            "skills": skills,
+            "proficiency": proficiency
+        }
+    return result
+
+
+@agent.tool
+@invalidates("profile")
+async def save_role_preference(ctx: RunContext[StateDeps[AppState]], role: str) -> dict:
     """Save user's target job role. Replaces any previous role.
 
     Call this when user mentions what role they're looking for (e.g., "I want to be a CTO", "Looking for marketing roles").
@@ -554,7 +675,7 @@ def save_role_preference(ctx: RunContext[StateDeps[AppState]], role: str) -> dic
 
     print(f"[Tool] Saving role preference '{role}' for user {user_id}", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="role",
         value=role,
@@ -571,7 +692,8 @@ def save_role_preference(ctx: RunContext[StateDeps[AppState]], role: str) -> dic
 
 
 @agent.tool
-def save_location_preference(ctx: RunContext[StateDeps[AppState]], location: str, remote_ok: bool = True) -> dict:
+@invalidates("profile")
+async def save_location_preference(ctx: RunContext[StateDeps[AppState]], location: str, remote_ok: bool = True) -> dict:
     """Save user's preferred work location. Replaces any previous location.
 
     Call this when user mentions where they want to work (e.g., "I'm based in London", "Looking for remote work").
@@ -586,7 +708,7 @@ def save_location_preference(ctx: RunContext[StateDeps[AppState]], location: str
 
     print(f"[Tool] Saving location '{location}' (remote_ok={remote_ok}) for user {user_id}", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="location",
         value=location,
@@ -606,7 +728,8 @@ def save_location_preference(ctx: RunContext[StateDeps[AppState]], location: str
 
 
 @agent.tool
-def save_experience_level(ctx: RunContext[StateDeps[AppState]], years: int) -> dict:
+@invalidates("profile")
+async def save_experience_level(ctx: RunContext[StateDeps[AppState]], years: int) -> dict:
     """Save user's years of experience.
 
     Args:
@@ -618,7 +741,7 @@ def save_experience_level(ctx: RunContext[StateDeps[AppState]], years: int) -> d
 
     print(f"[Tool] Saving experience years: {years} for user {user_id}", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="experience_years",
         value=str(years),
@@ -639,7 +762,8 @@ def save_experience_level(ctx: RunContext[StateDeps[AppState]], years: int) -> d
 # =====
 
 @agent.tool
-def save_career_mission(ctx: RunContext[StateDeps[AppState]], mission: str) -> dict:
+@invalidates("profile")
+async def save_career_mission(ctx: RunContext[StateDeps[AppState]], mission: str) -> dict:
     """Save user's career mission - their 'why'. This goes to Trinity character.
 
     Call this when user shares WHY they do what they do, their purpose, or career mission.
@@ -654,7 +778,7 @@ def save_career_mission(ctx: RunContext[StateDeps[AppState]], mission: str) -> d
 
     print(f"[Tool] Saving career mission for user {user_id}: {mission[:50]}...", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="career_mission",
         value=mission,
@@ -672,7 +796,8 @@ def save_career_mission(ctx: RunContext[StateDeps[AppState]], mission: str) -> d
 
 
 @agent.tool
-def save_user_values(ctx: RunContext[StateDeps[AppState]], value: str) -> dict:
+@invalidates("profile")
+async def save_user_values(ctx: RunContext[StateDeps[AppState]], value: str) -> dict:
     """Save a core value to user's profile. This goes to Trinity character.
 
     Call this when user mentions values important to them.
@@ -687,7 +812,7 @@ def save_user_values(ctx: RunContext[StateDeps[AppState]], value: str) -> dict:
 
     print(f"[Tool] Saving value '{value}' for user {user_id}", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="values",
         value=value,
@@ -705,7 +830,8 @@ def save_user_values(ctx: RunContext[StateDeps[AppState]], value: str) -> dict:
 
 
 @agent.tool
-def save_long_term_vision(ctx: RunContext[StateDeps[AppState]], vision: str) -> dict:
+@invalidates("profile")
+async def save_long_term_vision(ctx: RunContext[StateDeps[AppState]], vision: str) -> dict:
     """Save user's long-term career vision (5-10 years). This goes to Trinity character.
 
     Call this when user shares where they see themselves in the future.
@@ -720,7 +846,7 @@ def save_long_term_vision(ctx: RunContext[StateDeps[AppState]], vision: str) ->
 
     print(f"[Tool] Saving long-term vision for user {user_id}: {vision[:50]}...", file=sys.stderr)
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="long_term_vision",
         value=vision,
@@ -738,7 +864,8 @@ def save_long_term_vision(ctx: RunContext[StateDeps[AppState]], vision: str) ->
 
 
 @agent.tool
-def save_career_timeline(ctx: RunContext[StateDeps[AppState]], milestone: str, year: str = None) -> dict:
+@invalidates("profile")
+async def save_career_timeline(ctx: RunContext[StateDeps[AppState]], milestone: str, year: str = None) -> dict:
     """Save a career milestone to user's timeline. This goes to Velo character.
 
     Call this when user shares a career milestone, past job, or significant achievement.
@@ -756,7 +883,7 @@ def save_career_timeline(ctx: RunContext[StateDeps[AppState]], milestone: str, y
 
     metadata = {"year": year} if year else None
 
-    result = save_profile_item(
+    result = await save_profile_item(
         user_id=user_id,
         item_type="career_timeline",
         value=milestone,
@@ -776,7 +903,7 @@ def save_career_timeline(ctx: RunContext[StateDeps[AppState]], milestone: str, y
 
 
 @agent.tool
-def check_profile_completeness(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def check_profile_completeness(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Check how complete the user's profile is.
 
     Returns profile completeness percentage and what's missing.
@@ -788,12 +915,12 @@ def check_profile_completeness(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
     print(f"[Tool] Checking profile completeness for user {user_id}", file=sys.stderr)
 
-    result = get_profile_completeness_db(user_id)
+    result = await memo_profile_completeness(ctx, user_id)
     return result
 
 
 @agent.tool
-def get_user_skills_and_preferences(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def get_user_skills_and_preferences(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Get all of user's saved skills, role, and location preferences.
 
     Use this to see what the user has already told us about themselves.
@@ -804,12 +931,12 @@ def get_user_skills_and_preferences(ctx: RunContext[StateDeps[AppState]]) -> dic
 
     print(f"[Tool] Getting profile items for user {user_id}", file=sys.stderr)
 
-    result = get_profile_items(user_id)
+    result = await memo_profile_items(ctx, user_id)
     return result
 
 
 @agent.tool
-def show_user_profile_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def show_user_profile_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Render user's profile as a visual graph.
 
     Frontend will render this as an interactive 3D graph showing:
@@ -826,9 +953,9 @@ def show_user_profile_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
     print(f"[Tool] Rendering profile graph for user {user_id}", file=sys.stderr)
 
-    # Get profile data
-    profile = get_profile_items(user_id)
-    completeness = get_profile_completeness_db(user_id)
+    # Get profile data (the graph needs the items; completeness is counted from them)
+    profile = await memo_profile_items(ctx, user_id)
+    completeness = await get_profile_completeness_db(user_id, items=profile)
 
     if not profile.get("found"):
         return {"render": False, "message": "No profile data yet"}
@@ -886,7 +1013,7 @@ def show_user_profile_graph(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
 
 @agent.tool
-def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
+async def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
     """Assess how well the user's skills match a specific job's requirements.
 
     Returns a match score, matched skills, missing skills, and recommendations.
@@ -902,12 +1029,12 @@ def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
     print(f"[Tool] Assessing job fit: job={job_id}, user={user_id}", file=sys.stderr)
 
     # Get job details
-    job = get_job_by_id(job_id)
+    job = await get_job_by_id(job_id)
     if not job:
         return {"success": False, "message": f"Job {job_id} not found"}
 
     # Get user's skills
-    profile = get_profile_items(user_id)
+    profile = await memo_profile_items(ctx, user_id)
     if not profile.get("found"):
         return {
             "success": False,
@@ -1003,7 +1130,7 @@ def assess_job_fit(ctx: RunContext[StateDeps[AppState]], job_id: str) -> dict:
 
 
 @agent.tool
-def check_character_completion(ctx: RunContext[StateDeps[AppState]]) -> dict:
+async def check_character_completion(ctx: RunContext[StateDeps[AppState]]) -> dict:
     """Check completion status for each profile character (Repo, Trinity, Velo, Reach).
 
     Use this at the START of conversations to determine which character to work on next.
@@ -1018,8 +1145,12 @@ def check_character_completion(ctx: RunContext[StateDeps[AppState]]) -> dict:
 
     print(f"[Tool] Checking character completion for user={user_id}", file=sys.stderr)
 
-    profile = get_profile_items(user_id)
-    items = profile.get("items", {})
+    summary = await memo_profile_summary(ctx, user_id)
+    counts = summary.get("counts", {})
+    values = summary.get("values", {})
+
+    def first(item_type: str) -> Optional[str]:
+        return (values.get(item_type) or [None])[0]
 
     # Calculate completion for each character
     characters = {
@@ -1027,29 +1158,29 @@ def check_character_completion(ctx: RunContext[StateDeps[AppState]]) -> dict:
             "name": "Repo",
             "title": "Your Foundation",
             "color": "cyan",
-            "complete": bool(items.get("location")) and bool(items.get("role")),
-            "has_location": bool(items.get("location")),
-            "has_role": bool(items.get("role")),
-            "location": items.get("location", [{}])[0].get("value") if items.get("location") else None,
-            "role": items.get("role", [{}])[0].get("value") if items.get("role") else None,
+            "complete": bool(counts.get("location")) and bool(counts.get("role")),
+            "has_location": bool(counts.get("location")),
+            "has_role": bool(counts.get("role")),
+            "location": first("location"),
+            "role": first("role"),
         },
         "trinity": {
             "name": "Trinity",
             "title": "Your Identity",
             "color": "purple",
-            "complete": len(items.get("skill", [])) >= 2,
-            "skills_count": len(items.get("skill", [])),
-            "skills": [s.get("value") for s in items.get("skill", [])],
-            "has_career_goal": bool(items.get("career_goal")),
+            "complete": counts.get("skill", 0) >= 2,
+            "skills_count": counts.get("skill", 0),
+            "skills": values.get("skill", []),
+            "has_career_goal": bool(counts.get("career_goal")),
         },
         "velo": {
             "name": "Velo",
             "title": "Your Velocity",
             "color": "pink",
-            "complete": bool(items.get("experience_years")),
-            "has_experience": bool(items.get("experience_years")),
-            "experience_years": items.get("experience_years", [{}])[0].get("value") if items.get("experience_years") else None,
-            "has_history": len(items.get("career_history", [])) > 0,
+            "complete": bool(counts.get("experience_years")),
+            "has_experience": bool(counts.get("experience_years")),
+            "experience_years": first("experience_years"),
+            "has_history": counts.get("career_history", 0) > 0,
         },
         "reach": {
             "name": "Reach",
@@ -1124,53 +1255,31 @@ main_app.add_middleware(
 # =====
 # Middleware to Extract User Context from CopilotKit Instructions
 # =====
-@main_app.middleware("http")
-async def extract_user_middleware(request: Request, call_next):
-    """Extract user context from CopilotKit instructions before processing."""
-    global _cached_user_context
-
-    # Only process POST requests that might contain messages
-    if request.method == "POST":
-        try:
-            # Read and restore body
-            body_bytes = await request.body()
-            if body_bytes:
-                body = json.loads(body_bytes)
-
-                # AG-UI protocol: User context is in state.user
-                state = body.get("state", {})
-                state_user = state.get("user", {})
-                if state_user and state_user.get("id"):
-                    _cached_user_context = {
-                        "user_id": state_user.get("id"),
-                        "name": state_user.get("firstName") or state_user.get("name"),
-                        "email": state_user.get("email")
-                    }
-                    print(f"[Middleware] AG-UI cached user: {_cached_user_context.get('name')}", file=sys.stderr)
-
-                # CLM protocol: User context might be in system messages
-                # Check for Name:, Email:, or ID: patterns (VoiceInput uses these)
-                messages = body.get("messages", [])
-                for msg in messages:
-                    role = msg.get("role", "")
-                    content = msg.get("content", "")
-
-                    if role == "system" and ("Name:" in content or "ID:" in content or "Email:" in content):
-                        extracted = extract_user_from_instructions(content)
-                        if extracted.get("user_id") or extracted.get("name"):
-                            _cached_user_context = extracted
-                            print(f"[Middleware] CLM cached user: {extracted.get('name')} (ID: {extracted.get('user_id')})", file=sys.stderr)
-                            break
-
-                # Reconstruct request with body
-                async def receive():
-                    return {"type": "http.request", "body": body_bytes}
-
-                request = Request(request.scope, receive)
-        except Exception as e:
-            print(f"[Middleware] Error extracting user: {e}", file=sys.stderr)
-
-    return await call_next(request)
+def remember_request_user(state_user: Optional[dict], instructions: Optional[str]) -> None:
+    """Remember the user found in a request body (see tools/request_identity.py).
+
+    Called from inside the handler's body read, so the contextvar is set in
+    the request's own context and inherited by the agent run.
+    """
+    # AG-UI protocol: User context is in state.user
+    if state_user:
+        set_request_user_context({
+            "user_id": state_user.get("id"),
+            "name": state_user.get("firstName") or state_user.get("name"),
+            "email": state_user.get("email")
+        })
+        print(f"[Middleware] AG-UI request user: {request_user_context().get('name')}", file=sys.stderr)
+
+    # CLM protocol: User context might be in system messages
+    # (Name:, Email:, or ID: patterns - VoiceInput uses these)
+    if instructions:
+        extracted = extract_user_from_instructions(instructions)
+        if extracted.get("user_id") or extracted.get("name"):
+            print(f"[Middleware] CLM request user: {extracted.get('name')} (ID: {extracted.get('user_id')})", file=sys.stderr)
+
+
+# Scans POST bodies as the handlers read them - no buffering, no extra JSON parse
+main_app.add_middleware(UserIdentityMiddleware, on_identity=remember_request_user)
 
 
 # Startup event - ensure tables exist
@@ -1178,14 +1287,34 @@ async def extract_user_middleware(request: Request, call_next):
 async def startup_event():
     """Initialize database tables on startup."""
     print("[Startup] Ensuring profile_items table exists...", file=sys.stderr)
-    ensure_profile_items_table()
+    await ensure_profile_items_table()
+    print("[Startup] Loading job catalog...", file=sys.stderr)
+    await job_catalog.catalog.start()
+    await company_store.store.start()
+    await profile_snapshot.listener.start()
+    init_zep_client()
     print("[Startup] Ready!", file=sys.stderr)
 
 
+@main_app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background refreshes and release database connections."""
+    await job_catalog.catalog.stop()
+    await company_store.store.stop()
+    await profile_snapshot.listener.stop()
+    await close_zep_client()
+    await db.close()
+
+
 # Health check
 @main_app.get("/health")
 async def health():
-    return {"status": "ok", "agent": "mvp-actor", "version": "2.0"}
+    return {"status": "ok", "agent": "mvp-actor", "version": "2.0", "db": db.transport_stats(),
+            "job_catalog": job_catalog.catalog.stats(), "lookup_cache": job_lookup_cache.stats(),
+            "companies": company_store.store.stats(), "intents": intent_router.stats(),
+            "response_cache": response_cache.stats(),
+            "profile_snapshots": {**profile_snapshot.snapshots.stats(),
+                                  "listener": profile_snapshot.listener.stats()}}
 
 
 @main_app.get("/")
@@ -1211,61 +1340,61 @@ class ChatCompletionRequest(BaseModel):
     stream: Optional[bool] = True
 
 
-async def stream_sse_response(content: str, msg_id: str):
-    """Stream OpenAI-compatible SSE chunks for Hume EVI."""
-    words = content.split(' ')
-    for i, word in enumerate(words):
-        chunk = {
-            "id": msg_id,
-            "object": "chat.completion.chunk",
-            "created": int(time.time()),
-            "model": "esports-agent",
-            "choices": [{
-                "index": 0,
-                "delta": {"content": word + (' ' if i < len(words) - 1 else '')},
-                "finish_reason": None
-            }]
-        }
-        yield f"data: {json.dumps(chunk)}\n\n"
-        await asyncio.sleep(0.01)
+CLM_FALLBACK_TEXT = "Sorry, I couldn't process that request. Try asking about esports jobs!"
 
-    final = {
-        "id": msg_id,
-        "object": "chat.completion.chunk",
-        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
-    }
-    yield f"data: {json.dumps(final)}\n\n"
-    yield "data: [DONE]\n\n"
+
+async def stream_sse_response(content: Union[str, AsyncIterator[str]], msg_id: str):
+    """Stream OpenAI-compatible SSE chunks for Hume EVI.
+
+    ``content`` is either finished text or an async iterator of text deltas
+    (see stream_agent_for_clm); deltas are framed by tools.sse as they arrive.
+    """
+    encoder = SSEEncoder(msg_id, model="esports-agent")
+    if isinstance(content, str):
+        yield encoder.chunk(content)
+        yield encoder.finish()
+        return
+    async for frame in encoder.encode(content):
+        yield frame
+
+
+def _clm_deps(user_message: str) -> StateDeps:
+    """Build agent deps for a CLM request (user comes from the Hume system prompt)."""
+    print(f"[CLM] Starting agent run for: {user_message[:50]}", file=sys.stderr)
+    cached = request_user_context()
+    print(f"[CLM] Request user context: {cached}", file=sys.stderr)
+
+    # Build state with the request's user if available
+    state = AppState()
+    if cached.get("name") or cached.get("user_id"):
+        state.user = UserProfile(
+            id=cached.get("user_id"),
+            name=cached.get("name"),
+            firstName=cached.get("name"),
+            email=cached.get("email")
+        )
+        print(f"[CLM] State user set: {state.user.name}", file=sys.stderr)
+    return StateDeps(state)
 
 
-async def run_agent_for_clm(user_message: str, system_prompt: str = None) -> str:
+async def run_agent_for_clm(user_message: str) -> str:
     """Run the Pydantic AI agent and return text response."""
+    cache_key = response_cache.key(user_message)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        print(f"[CLM] Response cache hit: {cache_key[0]!r}", file=sys.stderr)
+        return cached
     try:
-        # Extract user context from system prompt if provided
-        if system_prompt:
-            extract_user_from_instructions(system_prompt)
-
-        print(f"[CLM] Starting agent run for: {user_message[:50]}", file=sys.stderr)
-        print(f"[CLM] Cached user context: {_cached_user_context}", file=sys.stderr)
-
-        # Build state with cached user if available
-        state = AppState()
-        if _cached_user_context.get("name") or _cached_user_context.get("user_id"):
-            state.user = UserProfile(
-                id=_cached_user_context.get("user_id"),
-                name=_cached_user_context.get("name"),
-                firstName=_cached_user_context.get("name"),
-                email=_cached_user_context.get("email")
-            )
-            print(f"[CLM] State user set: {state.user.name}", file=sys.stderr)
-
-        deps = StateDeps(state)
+        deps = _clm_deps(user_message)
         result = await agent.run(user_message, deps=deps)
         print(f"[CLM] Agent result type: {type(result)}", file=sys.stderr)
 
         # Pydantic AI returns result.output for the text response
         if hasattr(result, 'output') and result.output:
-            return str(result.output)
+            text = str(result.output)
+            tools = [p.tool_name for m in result.all_messages() for p in m.parts if isinstance(p, ToolCallPart)]
+            response_cache.put(cache_key, text, tools)
+            return text
         if hasattr(result, 'data') and result.data:
             return str(result.data)
         return str(result)
@@ -1273,7 +1402,77 @@ async def run_agent_for_clm(user_message: str, system_prompt: str = None) -> str
         import traceback
         print(f"[CLM] Agent error: {e}", file=sys.stderr)
         print(f"[CLM] Traceback: {traceback.format_exc()}", file=sys.stderr)
-        return "Sorry, I couldn't process that request. Try asking about esports jobs!"
+        return CLM_FALLBACK_TEXT
+
+
+def _text_delta(event) -> str:
+    """Text carried by a model stream event ('' for tool calls, thinking, etc.)."""
+    if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+        return event.part.content
+    if isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+        return event.delta.content_delta
+    return ""
+
+
+async def stream_agent_for_clm(user_message: str) -> AsyncIterator[str]:
+    """Run the agent and yield its text as the model produces it.
+
+    The run is driven node by node: model requests are streamed and their
+    text parts forwarded immediately; tool calls run between them without
+    emitting anything, and text from the next model response continues the
+    same reply. If the run fails before any text was sent the caller still
+    gets the fallback message; after that the reply simply ends.
+
+    Answers to public questions come from (and go to) the response cache.
+    """
+    cache_key = response_cache.key(user_message)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        print(f"[CLM] Response cache hit: {cache_key[0]!r}", file=sys.stderr)
+        yield cached
+        return
+
+    started = time.monotonic()
+    first_token = None
+    sent = 0
+    parts: list[str] = []
+    tools_called: list[str] = []
+    try:
+        deps = _clm_deps(user_message)
+        async with agent.iter(user_message, deps=deps) as run:
+            async for node in run:
+                if Agent.is_model_request_node(node):
+                    separate = sent > 0  # continuing after a tool phase
+                    async with node.stream(run.ctx) as request_stream:
+                        async for event in request_stream:
+                            text = _text_delta(event)
+                            if not text:
+                                continue
+                            if separate and not text[0].isspace():
+                                text = " " + text
+                            separate = False
+                            if first_token is None:
+                                first_token = time.monotonic() - started
+                            sent += len(text)
+                            parts.append(text)
+                            yield text
+                elif Agent.is_call_tools_node(node):
+                    tools = [p.tool_name for p in node.model_response.parts if isinstance(p, ToolCallPart)]
+                    if tools:
+                        tools_called.extend(tools)
+                        print(f"[CLM] Running tools: {', '.join(tools)}", file=sys.stderr)
+    except Exception as e:
+        import traceback
+        print(f"[CLM] Agent error: {e}", file=sys.stderr)
+        print(f"[CLM] Traceback: {traceback.format_exc()}", file=sys.stderr)
+        cache_key = None  # never cache a partial reply
+
+    if not sent:
+        yield CLM_FALLBACK_TEXT
+        return
+    response_cache.put(cache_key, "".join(parts), tools_called)
+    print(f"[CLM] Streamed {sent} chars, first token after {first_token:.2f}s, "
+          f"done after {time.monotonic() - started:.2f}s", file=sys.stderr)
 
 
 @main_app.post("/chat/completions")
@@ -1310,17 +1509,30 @@ async def clm_endpoint(
             break
     print(f"[CLM] Query: {user_message[:80]}", file=sys.stderr)
 
-    # Run agent with system prompt for user context
-    response_text = await run_agent_for_clm(user_message, system_prompt)
-    print(f"[CLM] Response: {response_text[:80]}", file=sys.stderr)
+    # Extract user context from system prompt if provided
+    if system_prompt:
+        extract_user_from_instructions(system_prompt)
+
+    # Answer deterministic questions from data without running the model
+    response_text = None
+    intent = intent_router.classify(user_message)
+    if intent:
+        response_text = await answer_intent(intent, request_user_context())
+        print(f"[CLM] Fast path '{intent}': {'answered' if response_text else 'passed to agent'}",
+              file=sys.stderr)
 
+    # Otherwise stream tokens straight from the agent run
     if request.stream:
         msg_id = f"chatcmpl-{uuid.uuid4().hex[:8]}"
+        content = response_text if response_text else stream_agent_for_clm(user_message)
         return StreamingResponse(
-            stream_sse_response(response_text, msg_id),
+            stream_sse_response(content, msg_id),
             media_type="text/event-stream"
         )
     else:
+        if not response_text:
+            response_text = await run_agent_for_clm(user_message)
+        print(f"[CLM] Response: {response_text[:80]}", file=sys.stderr)
         return {
             "id": f"chatcmpl-{uuid.uuid4().hex[:8]}",
             "object": "chat.completion",
@@ -1335,7 +1547,7 @@ async def clm_endpoint(
 
 
 # Mount AG-UI at /agui for CopilotKit
-main_app.mount("/agui", ag_ui_app)
+main_app.mount("/agui", AGUIResponseCache(ag_ui_app))
 
 # Export app
 app = main_app
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from tools import response_cache as rc
+
+
+def _run_app(wrapper, chunks, headers=()):
+    """Drive ``wrapper`` with ``chunks`` as the body; return (body chunks the app saw, response)."""
+    received = []
+    sent = []
+    queue = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+             for i, c in enumerate(chunks)]
+
+    async def receive():
+        return queue.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "headers": list(headers), "path": "/"}
+    asyncio.run(wrapper(scope, receive, send))
+    return received, sent
+
+
+def _events_app(received, calls):
+    async def app(scope, receive, send):
+        calls.append(len(calls))
+        while True:
+            message = await receive()
+            received.append((message["body"], message.get("more_body", False)))
+            if not message.get("more_body"):
+                break
+        events = [{"type": "RUN_STARTED", "threadId": "t", "runId": "r"},
+                  {"type": "TOOL_CALL_START", "toolCallId": "c", "toolCallName": "get_categories"},
+                  {"type": "RUN_FINISHED", "threadId": "t", "runId": "r"}]
+        body = "".join(f"data: {json.dumps(e)}\n\n" for e in events).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def test_small_first_turn_is_cached_and_replayed(monkeypatch):
+    monkeypatch.setattr(rc, "response_cache", rc.ResponseCache(enabled=True))
+    received, calls = [], []
+    wrapper = rc.AGUIResponseCache(_events_app(received, calls))
+    body = json.dumps({"threadId": "t1", "runId": "r1",
+                       "messages": [{"role": "user", "content": "list job categories"}]}).encode()
+
+    _run_app(wrapper, [body[:10], body[10:]])
+    assert received == [(body, False)]
+    _, sent = _run_app(wrapper, [body])
+    assert len(calls) == 1  # served from the cache
+    assert b"RUN_FINISHED" in sent[-1]["body"]
+
+
+def test_large_body_streams_through_unbuffered(monkeypatch):
+    monkeypatch.setattr(rc, "response_cache", rc.ResponseCache(enabled=True))
+    monkeypatch.setattr(rc, "AGUI_CACHE_MAX_BODY", 100)
+    received, calls = [], []
+    wrapper = rc.AGUIResponseCache(_events_app(received, calls))
+    chunks = [b"x" * 80, b"y" * 80, b"z" * 80]
+
+    _run_app(wrapper, chunks)
+    # What was read before giving up is handed over as one piece, the rest as it arrives
+    assert received == [(chunks[0] + chunks[1], True), (chunks[2], False)]
+
+
+def test_large_content_length_is_not_read_at_all(monkeypatch):
+    monkeypatch.setattr(rc, "response_cache", rc.ResponseCache(enabled=True))
+    monkeypatch.setattr(rc, "AGUI_CACHE_MAX_BODY", 100)
+    received, calls = [], []
+    wrapper = rc.AGUIResponseCache(_events_app(received, calls))
+    chunks = [b"x" * 80, b"y" * 80]
+
+    _run_app(wrapper, chunks, headers=[(b"content-length", b"160")])
+    assert received == [(chunks[0], True), (chunks[1], False)]
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from tools.cache import TTLCache
+
+
+def _loader(calls, value="v", delay=0.0, error=None):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return value
+    return load
+
+
+def test_concurrent_misses_share_one_load():
+    cache, calls = TTLCache("t", ttl=60), []
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("k", _loader(calls, delay=0.01)) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["v"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get("k") == "v"
+
+
+def test_expired_value_is_served_while_one_refresh_runs():
+    cache, calls = TTLCache("t", ttl=0), []
+
+    async def run():
+        await cache.get_or_load("k", _loader(calls, value="old"))
+        stale = await asyncio.gather(*(cache.get_or_load("k", _loader(calls, value="new", delay=0.01))
+                                       for _ in range(3)))
+        await asyncio.sleep(0.02)
+        return stale
+
+    assert asyncio.run(run()) == ["old"] * 3
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 3
+
+
+def test_errors_propagate_to_waiters_and_are_not_cached():
+    cache, calls = TTLCache("t", ttl=60), []
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_load("k", _loader(calls, delay=0.01, error=RuntimeError("db down"))) for _ in range(2)),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+    assert cache.stats()["errors"] == 1
+    assert asyncio.run(cache.get_or_load("k", _loader(calls))) == "v"
+
+
+def test_cancelled_loader_caller_does_not_cancel_waiters():
+    cache, calls = TTLCache("t", ttl=60), []
+
+    async def run():
+        loading = asyncio.create_task(cache.get_or_load("k", _loader(calls, delay=0.02)))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(cache.get_or_load("k", _loader(calls)))
+        await asyncio.sleep(0)
+        loading.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loading
+        return await waiting
+
+    assert asyncio.run(run()) == "v"
+    assert len(calls) == 1
+    assert cache.get("k") == "v"
+
+
+def test_wait_for_timeout_keeps_the_load_running():
+    cache, calls = TTLCache("t", ttl=60), []
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get_or_load("k", _loader(calls, delay=0.02)), 0.001)
+        return await cache.get_or_load("k", _loader(calls))
+
+    assert asyncio.run(run()) == "v"
+    assert len(calls) == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from tools.company_lookup import CompanyIndex, ESPORTS_COMPANIES, lookup_company, normalize_name
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Team Liquid", "Team Liquid"),
+    ("team liquid", "Team Liquid"),
+    ("liquid", "Team Liquid"),
+    ("G2", "G2 Esports"),
+    ("Cloud 9", "Cloud9"),
+    ("Riot", "Riot Games"),
+    ("100 thieves", "100 Thieves"),
+])
+def test_exact_and_substring_matches(query, expected):
+    assert lookup_company(query).name == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Team Liqiud", "Team Liquid"),
+    ("clod9", "Cloud9"),
+    ("fnatik", "Fnatic"),
+])
+def test_fuzzy_matches_typos(query, expected):
+    assert lookup_company(query).name == expected
+
+
+@pytest.mark.parametrize("query", ["t1", "EA Sports", "g3", "c8", "team", "esports", "", "   "])
+def test_short_and_generic_queries_do_not_match(query):
+    assert lookup_company(query) is None
+
+
+def test_normalize_name_strips_accents_and_punctuation():
+    assert normalize_name("  Fnätic!! Esports ") == "fnatic esports"
+
+
+def test_by_game():
+    index = CompanyIndex(ESPORTS_COMPANIES)
+    names = {p.name for p in index.by_game("valorant")}
+    assert names and all(isinstance(n, str) for n in names)
+    assert index.by_game("") == []
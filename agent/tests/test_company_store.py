@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import pytest
+
+from tools import company_lookup, company_store
+from tools.company_store import CompanyStore
+
+
+@pytest.fixture(autouse=True)
+def restore_index():
+    index = company_lookup.get_index()
+    yield
+    company_lookup.set_index(index)
+
+
+def _write(path, *names):
+    path.write_text(json.dumps([{"name": name} for name in names]))
+
+
+def test_reload_skips_unchanged_file(tmp_path):
+    path = tmp_path / "companies.json"
+    _write(path, "Alpha Gaming")
+    store = CompanyStore(str(path))
+    assert asyncio.run(store.reload()) is True
+    assert asyncio.run(store.reload()) is False
+    assert store.companies == 1
+
+
+def test_failed_reload_is_retried_on_next_poll(tmp_path, monkeypatch):
+    path = tmp_path / "companies.json"
+    _write(path, "Alpha Gaming")
+    store = CompanyStore(str(path))
+    asyncio.run(store.reload())
+    first_version = store.version
+
+    _write(path, "Alpha Gaming", "Beta Esports")
+
+    def broken_index(companies):
+        raise RuntimeError("index build failed")
+
+    monkeypatch.setattr(company_store, "CompanyIndex", broken_index)
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.reload())
+    assert store.version == first_version
+
+    monkeypatch.undo()
+    # The file has not changed since the failure, but the new content was never loaded
+    assert asyncio.run(store.reload()) is True
+    assert store.companies == 2
+    assert company_lookup.lookup_company("Beta Esports").name == "Beta Esports"
@@ -0,0 +1,157 @@
+import asyncio
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from tools import db
+from tools.db import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def fetchall(self):
+        return [(1,)]
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    conns = []
+
+    def connect(*args, **kwargs):
+        conns.append(FakeConn())
+        return conns[-1]
+
+    monkeypatch.setattr(db.psycopg2, "connect", connect)
+    return conns
+
+
+def _pool(**kwargs):
+    return ConnectionPool("postgresql://test", **{"min_size": 0, "max_size": 2, "timeout": 0.05, **kwargs})
+
+
+def test_connections_are_reused_lifo(opened):
+    pool = _pool()
+    with pool.connection() as first, pool.connection():
+        pass
+    # first was returned last, so it is handed out next
+    with pool.connection() as conn:
+        assert conn is first
+    stats = pool.stats()
+    assert (stats["created"], stats["checkouts"], stats["idle"]) == (2, 3, 2)
+
+
+def test_connections_past_their_lifetime_are_recycled(opened):
+    pool = _pool(max_lifetime=0)
+    with pool.connection():
+        pass
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    assert opened[0].closed
+    assert pool.stats()["recycled"] == 1
+
+
+def test_idle_connections_are_pinged_and_dead_ones_replaced(opened):
+    pool = _pool(max_idle=0)
+    with pool.connection() as conn:
+        pass
+    conn.dead = True
+    with pool.connection() as replacement:
+        assert replacement is opened[1]
+    assert opened[0].closed and pool.stats()["size"] == 1
+
+
+def test_open_transactions_are_rolled_back_on_return(opened):
+    pool = _pool()
+    with pool.connection() as conn:
+        conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    assert conn.rollbacks == 1 and not conn.closed
+
+
+def test_broken_connections_are_dropped(opened):
+    pool = _pool()
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("SSL connection has been closed unexpectedly")
+    assert opened[0].closed
+    assert pool.stats()["size"] == 0
+
+
+def test_query_errors_keep_the_connection(opened):
+    pool = _pool()
+    with pytest.raises(psycopg2.ProgrammingError):
+        with pool.connection():
+            raise psycopg2.errors.UndefinedTable("no such table")
+    assert not opened[0].closed and pool.stats()["idle"] == 1
+
+
+def test_checkout_times_out_when_exhausted(opened):
+    pool = _pool()
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_failed_connect_frees_its_slot(monkeypatch):
+    def connect(*args, **kwargs):
+        raise psycopg2.OperationalError("could not connect")
+
+    monkeypatch.setattr(db.psycopg2, "connect", connect)
+    pool = _pool()
+    for _ in range(3):
+        with pytest.raises(psycopg2.OperationalError):
+            with pool.connection():
+                pass
+    assert pool.stats()["size"] == 0
+
+
+def test_fetch_ends_the_read_transaction(monkeypatch, opened):
+    pool = _pool()
+    monkeypatch.setattr(db, "DB_TRANSPORT", "tcp")
+    monkeypatch.setattr(db, "get_pool", lambda: pool)
+    monkeypatch.setattr(db, "_executor", None)
+    try:
+        assert asyncio.run(db.fetch_all("SELECT 1")) == [(1,)]
+        assert asyncio.run(db.fetch_one("SELECT 1")) == (1,)
+    finally:
+        db.close_pool()
+    assert opened[0].rollbacks == 2 and opened[0].status == extensions.TRANSACTION_STATUS_IDLE
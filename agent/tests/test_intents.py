@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tools import intents
+from tools.intents import IntentRouter, answer, normalize
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("What's my name?", "user_name"),
+    ("who am I", "user_name"),
+    ("Which page am I on?", "current_page"),
+    ("How many jobs are there right now?", "job_count"),
+    ("what's my preferred location", "my_location"),
+    ("List all the categories", "list_categories"),
+    ("what are the job categories", "list_categories"),
+])
+def test_classify(message, intent):
+    assert IntentRouter().classify(message) == intent
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("Hey, please tell me how many jobs are there", "job_count"),
+    ("ok so what page is this, please?", "current_page"),
+    ("um, please... who am I now", "user_name"),
+    ("Hi! what's my name then", "user_name"),
+])
+def test_filler_around_the_question(message, intent):
+    assert IntentRouter().classify(message) == intent
+
+
+@pytest.mark.parametrize("message", [
+    "how many jobs are there in Germany",
+    "what's my name and find me coaching jobs",
+    "show me marketing jobs",
+    "",
+    None,
+])
+def test_anything_more_passes_to_the_agent(message):
+    assert IntentRouter().classify(message) is None
+
+
+def test_stats():
+    router = IntentRouter()
+    router.classify("who am i")
+    router.classify("who am i?")
+    router.classify("find me jobs")
+    stats = router.stats()
+    assert stats["routed"]["user_name"] == 2
+    assert stats["passed_to_agent"] == 1
+    assert stats["route_ratio"] == 0.667
+
+
+def test_normalize():
+    assert normalize("  What's   MY name?! ") == "whats my name"
+
+
+def test_answers_from_request_data():
+    assert "Sam" in asyncio.run(answer("user_name", {"name": "Sam"}))
+    assert "Sign in" in asyncio.run(answer("user_name", {}))
+    page = SimpleNamespace(pageId="coaching", title="Coaching Jobs", location="London")
+    assert "Coaching Jobs page in London" in asyncio.run(answer("current_page", page=page))
+    assert "Sign in" in asyncio.run(answer("my_location", {}))
+
+
+def test_answers_from_data_or_fall_back(monkeypatch):
+    async def count():
+        return 42
+
+    async def categories():
+        return ["marketing", "coaching", "analytics"]
+
+    async def no_count():
+        return None
+
+    monkeypatch.setattr(intents, "count_active_jobs", count)
+    monkeypatch.setattr(intents, "get_available_categories", categories)
+    assert "42 esports jobs" in asyncio.run(answer("job_count"))
+    assert "analytics, coaching and marketing" in asyncio.run(answer("list_categories"))
+
+    monkeypatch.setattr(intents, "count_active_jobs", no_count)
+    assert asyncio.run(answer("job_count")) is None
+
+
+def test_saved_location(monkeypatch):
+    async def profile_items(user_id, item_type):
+        return {"found": True, "items": {"location": [{"value": "Berlin", "metadata": {"remote_ok": True}}]}}
+
+    monkeypatch.setattr(intents, "get_profile_items", profile_items)
+    reply = asyncio.run(answer("my_location", {"user_id": "u1"}))
+    assert "Berlin (remote is fine too)" in reply
+
+
+def test_errors_pass_to_the_agent(monkeypatch):
+    async def broken():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(intents, "count_active_jobs", broken)
+    assert asyncio.run(answer("job_count")) is None
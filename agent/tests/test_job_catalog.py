@@ -0,0 +1,145 @@
+import asyncio
+import math
+from datetime import date, datetime, timedelta
+
+from tools import job_catalog, job_search
+from tools.job_catalog import CatalogSnapshot, JobCatalog, _timestamp
+
+
+def _row(job_id, title="Coach", country="United Kingdom", job_type="Full-time", category="coaching"):
+    return (job_id, title, "Fnatic", "London", country, job_type, None, "", [], category, None)
+
+
+def _snapshot():
+    rows = [
+        _row("old", country="Germany"),
+        _row("new", job_type="Part-time", category="marketing"),
+        _row("undated"),
+        _row("mid"),
+    ]
+    posted = [date(2024, 1, 1), datetime(2024, 6, 1, 12, 0), None, date(2024, 3, 1)]
+    return CatalogSnapshot(rows, posted, version=1)
+
+
+def test_timestamp_accepts_dates():
+    assert _timestamp(date(2024, 3, 1)) == datetime(2024, 3, 1).timestamp()
+    assert math.isnan(_timestamp(None))
+
+
+def test_search_orders_by_recency_with_undated_last():
+    ids = [row[0] for row in _snapshot().search(limit=10)]
+    assert ids == ["new", "mid", "old", "undated"]
+
+
+def test_search_filters():
+    snapshot = _snapshot()
+    assert [r[0] for r in snapshot.search(category="COACHING", limit=10)] == ["mid", "old", "undated"]
+    assert [r[0] for r in snapshot.search(country="germany")] == ["old"]
+    assert [r[0] for r in snapshot.search(job_type="part")] == ["new"]
+    assert snapshot.search(category="unknown") == []
+    assert len(snapshot.search(limit=2)) == 2
+
+
+def test_publish_builds_snapshot_off_the_loop(monkeypatch):
+    calls = []
+
+    async def to_thread(func, *args):
+        calls.append(func)
+        return func(*args)
+
+    monkeypatch.setattr(job_catalog.asyncio, "to_thread", to_thread)
+    catalog = JobCatalog()
+    catalog._rows = {"a": (_row("a"), date(2024, 1, 1))}
+    asyncio.run(catalog._publish())
+    assert calls == [CatalogSnapshot]
+    assert catalog.snapshot().get("a")[0] == "a"
+
+
+def test_free_text_search_skips_the_catalog(monkeypatch):
+    snapshot = _snapshot()
+    monkeypatch.setattr(job_catalog, "snapshot", lambda: snapshot)
+    monkeypatch.setattr(job_search.db, "is_configured", lambda: True)
+    seen = []
+
+    async def fetch_all(sql, params=None):
+        seen.append(sql)
+        return []
+
+    monkeypatch.setattr(job_search.db, "fetch_all", fetch_all)
+    assert asyncio.run(job_search.search_jobs(query="coach")) == []
+    assert seen and "jobs" in seen[0]
+
+    seen.clear()
+    assert [j.id for j in asyncio.run(job_search.search_jobs(limit=1))] == ["new"]
+    assert seen == []
+
+
+def _db_row(job_id, mark, is_active=True, title="Coach"):
+    return _row(job_id, title=title) + (mark.date(), is_active, mark)
+
+
+class FakeJobs:
+    """Stands in for db.fetch_all/fetch_one over a jobs table with updated_at."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetch_one(self, sql, params=None):
+        return (1,)
+
+    async def fetch_all(self, sql, params=None):
+        self.queries.append(params)
+        if "is_active = true" in sql:
+            return [r for r in self.rows if r[-2]]
+        if params:
+            return [r for r in self.rows if r[-1] >= params[0]]
+        return list(self.rows)
+
+
+def _catalog(monkeypatch, jobs):
+    monkeypatch.setattr(job_catalog.db, "fetch_one", jobs.fetch_one)
+    monkeypatch.setattr(job_catalog.db, "fetch_all", jobs.fetch_all)
+    catalog = JobCatalog()
+    asyncio.run(catalog.load())
+    return catalog
+
+
+def test_refresh_merges_changes_since_the_watermark(monkeypatch):
+    t0 = datetime(2024, 6, 1, 12, 0)
+    jobs = FakeJobs([_db_row("a", t0), _db_row("b", t0)])
+    catalog = _catalog(monkeypatch, jobs)
+    assert catalog.snapshot().size == 2
+
+    later = t0 + timedelta(minutes=30)
+    jobs.rows = [_db_row("a", later, title="Head coach"), _db_row("b", later, is_active=False),
+                 _db_row("c", later)]
+    asyncio.run(catalog.refresh())
+    snapshot = catalog.snapshot()
+    assert snapshot.size == 2 and snapshot.get("c") is not None
+    assert snapshot.get("b") is None
+    assert snapshot.get("a")[1] == "Head coach"
+    assert catalog._watermark == later
+    assert jobs.queries[-1] == (t0 - timedelta(seconds=job_catalog.JOB_CATALOG_WATERMARK_OVERLAP_SECONDS),)
+
+
+def test_refresh_catches_rows_committed_behind_the_watermark(monkeypatch):
+    t0 = datetime(2024, 6, 1, 12, 0)
+    jobs = FakeJobs([_db_row("a", t0)])
+    catalog = _catalog(monkeypatch, jobs)
+
+    # A transaction that started before t0 commits only now
+    jobs.rows.append(_db_row("late", t0 - timedelta(seconds=30)))
+    asyncio.run(catalog.refresh())
+    assert catalog.snapshot().get("late") is not None
+    assert catalog._watermark == t0
+
+
+def test_unchanged_refresh_keeps_the_snapshot(monkeypatch):
+    t0 = datetime(2024, 6, 1, 12, 0)
+    jobs = FakeJobs([_db_row("a", t0)])
+    catalog = _catalog(monkeypatch, jobs)
+    before = catalog.snapshot()
+    asyncio.run(catalog.refresh())
+    assert catalog.snapshot() is before
+    assert catalog.refreshes == 1
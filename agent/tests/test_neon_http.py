@@ -0,0 +1,113 @@
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from tools.neon_http import NeonHTTPClient, NeonHTTPError, decode_result, to_positional, _encode_param, _parse_array
+
+
+def test_to_positional():
+    assert to_positional("SELECT %s, %s WHERE name LIKE 'a%%'") == "SELECT $1, $2 WHERE name LIKE 'a%'"
+
+
+@pytest.mark.parametrize("value, encoded", [
+    (None, None),
+    (True, "true"),
+    (3, "3"),
+    ({"remote": True}, '{"remote": true}'),
+    (date(2024, 6, 1), "2024-06-01"),
+    (["a", None, 'say "hi"', "back\\slash"], '{"a",NULL,"say \\"hi\\"","back\\\\slash"}'),
+])
+def test_encode_param(value, encoded):
+    assert _encode_param(value) == encoded
+
+
+@pytest.mark.parametrize("text, items", [
+    ("{}", []),
+    ("{a,b}", ["a", "b"]),
+    ('{"a,b",NULL,"NULL",""}', ["a,b", None, "NULL", ""]),
+    ('{"say \\"hi\\"","back\\\\slash"}', ['say "hi"', "back\\slash"]),
+])
+def test_parse_array(text, items):
+    assert _parse_array(text) == items
+
+
+def test_encoded_arrays_round_trip():
+    values = ["a,b", None, 'q"uote', "back\\slash", "NULL", ""]
+    assert _parse_array(_encode_param(values)) == values
+
+
+def _result(rows, *types):
+    return {"fields": [{"name": name, "dataTypeID": oid} for name, oid in types], "rows": rows}
+
+
+def test_decode_result_by_type_oid():
+    result = _result(
+        [["t", "42", "1.5", "9.99", '{"a": 1}', "2024-06-01", "2024-06-01 12:30:00+00", "{1,NULL,3}", "{x,y}", "abc", None]],
+        ("ok", 16), ("n", 23), ("f", 701), ("price", 1700), ("meta", 3802), ("day", 1082),
+        ("at", 1184), ("ids", 1007), ("tags", 1009), ("name", 25), ("missing", 23),
+    )
+    assert decode_result(result) == [(
+        True, 42, 1.5, Decimal("9.99"), {"a": 1}, date(2024, 6, 1),
+        datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc), [1, None, 3], ["x", "y"], "abc", None,
+    )]
+
+
+def test_decode_result_dict_rows_and_unparseable_dates():
+    result = _result([["infinity", "u1"]], ("at", 1114), ("id", 2950))
+    assert decode_result(result, dict_rows=True) == [{"at": "infinity", "id": "u1"}]
+    assert decode_result({"fields": [], "rows": []}) == []
+
+
+def _client(handler):
+    client = NeonHTTPClient("postgresql://user:pw@ep-test.neon.tech/db")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_query_sends_positional_params_and_decodes():
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json=_result([["7"]], ("count", 20)))
+
+    client = _client(handler)
+    assert asyncio.run(client.query("SELECT count(*) FROM jobs WHERE id = %s", ("j1",))) == [(7,)]
+    assert sent == [{"query": "SELECT count(*) FROM jobs WHERE id = $1", "params": ["j1"]}]
+
+
+def test_batch_runs_statements_in_one_request():
+    sent = []
+
+    def handler(request):
+        sent.append((json.loads(request.content), request.headers.get("Neon-Batch-Read-Only")))
+        return httpx.Response(200, json={"results": [_result([["1"]], ("a", 23)), _result([], ("b", 25))]})
+
+    rows = asyncio.run(_client(handler).batch([("SELECT %s", (1,)), ("SELECT 'b'", None)], read_only=True))
+    assert rows == [[(1,)], []]
+    assert len(sent) == 1 and sent[0][1] == "true"
+    assert [q["query"] for q in sent[0][0]["queries"]] == ["SELECT $1", "SELECT 'b'"]
+
+
+@pytest.mark.parametrize("response, message, code", [
+    (httpx.Response(400, json={"message": 'relation "jobz" does not exist', "code": "42P01"}),
+     'relation "jobz" does not exist', "42P01"),
+    (httpx.Response(502, text="bad gateway"), "bad gateway", None),
+])
+def test_errors_raise_neon_http_error(response, message, code):
+    client = _client(lambda request: response)
+    with pytest.raises(NeonHTTPError) as info:
+        asyncio.run(client.execute("SELECT 1"))
+    assert str(info.value) == message
+    assert info.value.status_code == response.status_code
+    assert info.value.code == code
+
+
+def test_client_needs_a_host():
+    with pytest.raises(ValueError):
+        NeonHTTPClient("")
+    assert NeonHTTPClient("postgresql://u@ep-x.neon.tech/db").endpoint == "https://ep-x.neon.tech/sql"
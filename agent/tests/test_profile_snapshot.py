@@ -0,0 +1,123 @@
+import asyncio
+import importlib
+
+import pytest
+
+from tools import profile_snapshot
+from tools.profile_snapshot import ProfileSnapshot, ProfileSnapshotCache
+
+ROWS = [
+    ("skill", "shoutcasting", None, True, "2024-06-01"),
+    ("location", "London", {"remote": True}, True, "2024-05-01"),
+    ("skill", "video editing", None, False, "2024-04-01"),
+]
+
+
+def _counting_loader(rows=ROWS, delay=0.0):
+    calls = []
+
+    async def load(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(delay)
+        return ProfileSnapshot(user_id, rows)
+
+    return load, calls
+
+
+def test_snapshot_groups_items_newest_first():
+    snapshot = ProfileSnapshot("u1", ROWS)
+    assert snapshot.count("skill") == 2
+    assert snapshot.values("skill") == ["shoutcasting", "video editing"]
+    assert snapshot.first("location") == "London"
+    assert snapshot.items_result("location")["items"]["location"][0]["metadata"] == {"remote": True}
+    assert snapshot.summary() == {
+        "found": True,
+        "counts": {"skill": 2, "location": 1},
+        "values": {"skill": ["shoutcasting", "video editing"], "location": ["London"]},
+        "total": 3,
+    }
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ProfileSnapshotCache(ttl=60, max_users=10, enabled=True)
+    load, calls = _counting_loader(delay=0.01)
+
+    async def run():
+        return await asyncio.gather(*(cache.get("u1", load) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == ["u1"]
+    assert all(r is results[0] for r in results)
+    assert cache.peek("u1") is results[0]
+
+
+def test_invalidation_during_load_is_not_cached():
+    cache = ProfileSnapshotCache(ttl=60, max_users=10, enabled=True)
+    load, calls = _counting_loader(delay=0.01)
+
+    async def run():
+        task = asyncio.create_task(cache.get("u1", load))
+        await asyncio.sleep(0)
+        cache.invalidate("u1")
+        await task
+        return cache.peek("u1")
+
+    assert asyncio.run(run()) is None
+    assert cache._generations == {}
+    asyncio.run(cache.get("u1", load))
+    assert calls == ["u1", "u1"]
+
+
+def test_cancelled_caller_does_not_cancel_shared_load():
+    cache = ProfileSnapshotCache(ttl=60, max_users=10, enabled=True)
+    load, calls = _counting_loader(delay=0.01)
+
+    async def run():
+        first = asyncio.create_task(cache.get("u1", load))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get("u1", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        snapshot = await second
+        assert first.cancelled()
+        return snapshot
+
+    snapshot = asyncio.run(run())
+    assert calls == ["u1"]
+    assert cache.peek("u1") is snapshot
+
+
+def test_ttl_and_capacity():
+    cache = ProfileSnapshotCache(ttl=0, max_users=10, enabled=True)
+    load, calls = _counting_loader()
+    asyncio.run(cache.get("u1", load))
+    asyncio.run(cache.get("u1", load))
+    assert calls == ["u1", "u1"]
+
+    cache = ProfileSnapshotCache(ttl=60, max_users=2, enabled=True)
+    for user_id in ("u1", "u2", "u3"):
+        asyncio.run(cache.get(user_id, load))
+    assert cache.peek("u1") is None
+    assert cache.stats()["users"] == 2
+
+
+def test_load_errors_propagate_and_are_not_cached():
+    cache = ProfileSnapshotCache(ttl=60, max_users=10, enabled=True)
+
+    async def failing(user_id):
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get("u1", failing))
+    assert cache.peek("u1") is None
+
+
+@pytest.mark.parametrize("channel, ttl", [("", 5.0), ("profile_changes", 300.0)])
+def test_default_ttl_depends_on_channel(monkeypatch, channel, ttl):
+    monkeypatch.delenv("PROFILE_SNAPSHOT_TTL", raising=False)
+    monkeypatch.setenv("PROFILE_SNAPSHOT_CHANNEL", channel)
+    try:
+        assert importlib.reload(profile_snapshot).PROFILE_SNAPSHOT_TTL == ttl
+    finally:
+        monkeypatch.undo()
+        importlib.reload(profile_snapshot)
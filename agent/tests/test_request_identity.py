@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+from tools.request_identity import UserIdentityMiddleware, UserIdentityScanner
+
+INSTRUCTIONS = "You are a coach.\nName: Dan\nID: 1234-abcd\nEmail: dan@example.com"
+
+
+def _body(**extra) -> bytes:
+    body = {
+        "threadId": "t1",
+        "state": {"page": "home", "user": {"id": "u-1", "firstName": "Dan", "email": "d@x.com"}},
+        "messages": [
+            {"role": "system", "content": INSTRUCTIONS},
+            {"role": "user", "content": "hi " * 2000},
+        ],
+    }
+    body.update(extra)
+    return json.dumps(body).encode()
+
+
+def _scan(data: bytes, size: int) -> UserIdentityScanner:
+    scanner = UserIdentityScanner()
+    for i in range(0, len(data), size):
+        scanner.feed(data[i:i + size])
+    return scanner
+
+
+@pytest.mark.parametrize("size", [7, 64, 1000, 1 << 20])
+def test_finds_state_user_and_instructions_across_chunks(size):
+    scanner = _scan(_body(), size)
+    assert scanner.state_user == {"id": "u-1", "firstName": "Dan", "email": "d@x.com"}
+    assert scanner.instructions == INSTRUCTIONS
+
+
+def test_content_before_role():
+    data = json.dumps({"messages": [{"content": INSTRUCTIONS, "role": "system"}]}).encode()
+    assert _scan(data, 50).instructions == INSTRUCTIONS
+
+
+def test_ignores_system_messages_without_markers_and_user_text():
+    data = json.dumps({"messages": [
+        {"role": "system", "content": "Be nice."},
+        {"role": "user", "content": 'my "user": {"id": "fake"} says Name: Eve'},
+    ]}).encode()
+    scanner = _scan(data, 16)
+    assert scanner.instructions is None
+    assert scanner.state_user is None
+
+
+def test_user_without_id_is_ignored():
+    data = json.dumps({"state": {"user": {"firstName": "Dan"}}}).encode()
+    assert _scan(data, 8).state_user is None
+
+
+def test_middleware_reports_identity_and_passes_body_through():
+    seen = []
+    data = _body()
+    chunks = [data[i:i + 500] for i in range(0, len(data), 500)]
+    queue = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+             for i, c in enumerate(chunks)]
+    received = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message["body"])
+            if not message["more_body"]:
+                break
+
+    async def receive():
+        return queue.pop(0)
+
+    middleware = UserIdentityMiddleware(app, on_identity=lambda u, i: seen.append((u, i)))
+    scope = {"type": "http", "method": "POST", "headers": []}
+    asyncio.run(middleware(scope, receive, None))
+
+    assert b"".join(received) == data
+    assert seen == [(json.loads(data)["state"]["user"], INSTRUCTIONS)]
+    assert scope["state"]["user_identity"] == seen[0]
+
+
+@pytest.mark.parametrize("size", [5, 999, 1 << 20])
+def test_instructions_longer_than_any_window(size):
+    long_prompt = "You are a coach. " * 5000 + '"quoted" \\ backé \n' + INSTRUCTIONS
+    for message in ({"role": "system", "content": long_prompt}, {"content": long_prompt, "role": "system"}):
+        for ascii_only in (True, False):
+            body = {"messages": [message, {"role": "user", "content": "hi"}]}
+            data = json.dumps(body, ensure_ascii=ascii_only).encode()
+            assert _scan(data, size).instructions == long_prompt
+
+
+def test_user_only_counts_directly_under_state():
+    decoy = {"id": "attacker", "firstName": "Eve"}
+    data = json.dumps({
+        "messages": [{"role": "assistant", "toolCalls": [{"args": {"user": decoy}}]}],
+        "context": {"user": decoy},
+        "state": {"page": {"user": decoy}, "user": {"id": "u-1", "prefs": {"remote": True}}},
+    }).encode()
+    for size in (3, 64, 1 << 20):
+        assert _scan(data, size).state_user == {"id": "u-1", "prefs": {"remote": True}}
+
+
+def test_user_outside_state_is_ignored():
+    data = json.dumps({"forwardedProps": {"user": {"id": "x"}}, "user": {"id": "y"}}).encode()
+    assert _scan(data, 10).state_user is None
+
+
+def test_user_messages_with_markers_are_not_instructions():
+    data = json.dumps({"messages": [{"role": "user", "content": INSTRUCTIONS}]}).encode()
+    assert _scan(data, 10).instructions is None
+
+
+@pytest.mark.parametrize("size", [1, 2, 3])
+def test_escapes_split_across_chunks(size):
+    prompt = 'a\\\\"b\\" \\\\\\" {"user": {"id": "x"}} ' + INSTRUCTIONS
+    data = json.dumps({"state": {"user": {"id": "u-1", "note": 'q"}\\'}},
+                       "messages": [{"role": "system", "content": prompt}]}).encode()
+    scanner = _scan(data, size)
+    assert scanner.instructions == prompt
+    assert scanner.state_user == {"id": "u-1", "note": 'q"}\\'}
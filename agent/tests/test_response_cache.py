@@ -0,0 +1,66 @@
+import json
+
+from tools.response_cache import ResponseCache, _agui_key, _replay, normalize_query
+
+
+def test_normalize_query_ignores_filler_order_and_plurals():
+    assert normalize_query("Show me jobs in the UK!") == normalize_query("uk jobs for me please")
+    assert normalize_query("coaching roles") == "coaching role"
+
+
+def test_normalize_query_keeps_country_codes():
+    assert normalize_query("Show me jobs in the US") != normalize_query("show me jobs")
+    assert "us" in normalize_query("jobs in the US").split()
+
+
+def test_normalize_query_keeps_pronouns():
+    keys = {normalize_query(q) for q in ("show me jobs", "show my jobs", "show your jobs", "show jobs")}
+    assert len(keys) == 4
+
+
+def test_pure_filler_has_no_key():
+    cache = ResponseCache(enabled=True)
+    assert normalize_query("hey, please show the...") == ""
+    assert cache.key("hey, please show the...") is None
+
+
+def test_put_only_stores_public_tool_runs():
+    cache = ResponseCache(enabled=True)
+    key = cache.key("coaching jobs in the UK")
+    assert not cache.put(key, "answer", [])
+    assert not cache.put(key, "answer", ["search_esports_jobs", "get_my_profile"])
+    assert cache.get(key) is None
+    assert cache.put(key, "answer", ["search_esports_jobs"])
+    assert cache.get(key) == "answer"
+    assert cache.stats()["hits"] == 1
+
+
+def test_disabled_cache_has_no_keys():
+    assert ResponseCache(enabled=False).key("coaching jobs") is None
+
+
+def test_agui_key_only_for_first_turn():
+    first = {"messages": [{"role": "user", "content": "jobs in the US"}], "state": {}}
+    later = {"messages": [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"},
+                          {"role": "user", "content": "jobs in the US"}]}
+    assert _agui_key(first, "text/event-stream") is not None
+    assert _agui_key(later, "text/event-stream") is None
+
+
+def test_agui_key_covers_state_and_accept():
+    body = {"messages": [{"role": "user", "content": "jobs in the US"}], "state": {"page": "a"}}
+    other_state = dict(body, state={"page": "b"})
+    assert _agui_key(body, "text/event-stream") != _agui_key(other_state, "text/event-stream")
+    assert _agui_key(body, "text/event-stream") != _agui_key(body, "application/json")
+
+
+def test_replay_gives_fresh_ids():
+    events = [
+        {"type": "RUN_STARTED", "threadId": "t0", "runId": "r0"},
+        {"type": "TEXT_MESSAGE_START", "messageId": "m0"},
+        {"type": "TEXT_MESSAGE_END", "messageId": "m0"},
+        {"type": "RUN_FINISHED", "threadId": "t0", "runId": "r0"},
+    ]
+    frames = [json.loads(f[6:]) for f in _replay(events, "t1", "r1").decode().split("\n\n") if f]
+    assert frames[0]["threadId"] == "t1" and frames[0]["runId"] == "r1"
+    assert frames[1]["messageId"] == frames[2]["messageId"] != "m0"
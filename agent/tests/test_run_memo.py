@@ -0,0 +1,116 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tools.run_memo import RunMemo, invalidates
+
+
+def _loader(calls, value=None, delay=0.0):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"n": len(calls)} if value is None else value
+    return load
+
+
+def test_concurrent_loads_share_one_call():
+    memo, calls = RunMemo(), []
+
+    async def run():
+        return await asyncio.gather(*(memo.load("k", _loader(calls, delay=0.01)) for _ in range(4)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == {"n": 1} for r in results)
+    assert (memo.hits, memo.misses) == (3, 1)
+
+
+def test_invalidate_by_tag():
+    memo, calls = RunMemo(), []
+
+    async def run():
+        await memo.load("profile", _loader(calls), tags=("profile",))
+        await memo.load("jobs", _loader(calls), tags=("jobs",))
+        memo.invalidate("profile")
+        await memo.load("profile", _loader(calls), tags=("profile",))
+        await memo.load("jobs", _loader(calls), tags=("jobs",))
+        memo.invalidate()
+        await memo.load("jobs", _loader(calls), tags=("jobs",))
+
+    asyncio.run(run())
+    assert len(calls) == 4
+
+
+def test_error_results_and_exceptions_are_not_cached():
+    memo, calls = RunMemo(), []
+
+    async def failing():
+        calls.append(1)
+        raise RuntimeError("db down")
+
+    async def run():
+        await memo.load("k", _loader(calls, value={"error": "timeout"}))
+        await memo.load("k", _loader(calls, value={"error": "timeout"}))
+        with pytest.raises(RuntimeError):
+            await memo.load("x", failing)
+        with pytest.raises(RuntimeError):
+            await memo.load("x", failing)
+
+    asyncio.run(run())
+    assert len(calls) == 4
+
+
+def test_waiters_see_the_loaders_exception():
+    memo = RunMemo()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def run():
+        return await asyncio.gather(memo.load("k", failing), memo.load("k", failing),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_invalidates_decorator_drops_tags_even_when_the_write_fails():
+    memo, calls = RunMemo(), []
+    ctx = SimpleNamespace(deps=SimpleNamespace(state=SimpleNamespace(memo=memo)))
+
+    @invalidates("profile")
+    async def save(ctx, value):
+        if value is None:
+            raise ValueError("nothing to save")
+        return {"saved": value}
+
+    async def run():
+        await memo.load("profile", _loader(calls), tags=("profile",))
+        assert await save(ctx, "coach") == {"saved": "coach"}
+        await memo.load("profile", _loader(calls), tags=("profile",))
+        with pytest.raises(ValueError):
+            await save(ctx, None)
+        await memo.load("profile", _loader(calls), tags=("profile",))
+
+    asyncio.run(run())
+    assert len(calls) == 3
+    assert save.__name__ == "save"
+
+
+def test_cancelled_caller_does_not_cancel_waiters():
+    memo, calls = RunMemo(), []
+
+    async def run():
+        loading = asyncio.create_task(memo.load("k", _loader(calls, delay=0.02)))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(memo.load("k", _loader(calls)))
+        await asyncio.sleep(0)
+        loading.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loading
+        return await waiting
+
+    assert asyncio.run(run()) == {"n": 1}
+    assert len(calls) == 1
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+
+from tools.sse import DONE_FRAME, SSEEncoder, escape
+
+
+def _events(frames):
+    data = b"".join(frames).decode()
+    events = [e[len("data: "):] for e in data.split("\n\n") if e]
+    assert events[-1] == "[DONE]"
+    return [json.loads(e) for e in events[:-1]]
+
+
+def _content(events):
+    return "".join(e["choices"][0]["delta"].get("content", "") for e in events)
+
+
+async def _deltas(*parts, pause=0.0):
+    for part in parts:
+        if pause:
+            await asyncio.sleep(pause)
+        yield part
+
+
+def _encode(encoder, deltas):
+    async def run():
+        return [frame async for frame in encoder.encode(deltas)]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("text", ['say "hi"\n', "back\\slash", "émoji 🎮", "\x00ctl\t", ""])
+def test_escape_matches_json(text):
+    assert json.loads(b'"' + escape(text) + b'"') == text
+
+
+def test_escaped_pieces_concatenate():
+    parts = ['he said "', "caf", "é\\", "\n", "🎮"]
+    assert b"".join(escape(p) for p in parts) == escape("".join(parts))
+
+
+def test_chunk_and_finish_are_openai_chunks():
+    encoder = SSEEncoder("msg-1", model="esports-agent", created=123, first_role="assistant")
+    first, second = encoder.chunk('a "b"'), encoder.chunk("c")
+    events = _events([first, second, encoder.finish()])
+    assert events[0]["id"] == "msg-1" and events[0]["created"] == 123
+    assert events[0]["model"] == "esports-agent"
+    assert events[0]["choices"][0]["delta"] == {"role": "assistant", "content": 'a "b"'}
+    assert events[1]["choices"][0]["delta"] == {"content": "c"}
+    assert events[2]["choices"][0] == {"index": 0, "delta": {}, "finish_reason": "stop"}
+    assert encoder.finish().endswith(DONE_FRAME)
+
+
+def test_fast_deltas_are_coalesced_after_the_first():
+    encoder = SSEEncoder("m", model="x", max_bytes=1024, max_delay_ms=50)
+    frames = _encode(encoder, _deltas("Hello", " ", "world", "", "!"))
+    events = _events(frames)
+    assert _content(events[:1]) == "Hello"  # first delta on its own
+    assert len(events) == 3  # first, one coalesced chunk, finish
+    assert _content(events) == "Hello world!"
+
+
+def test_byte_budget_flushes():
+    encoder = SSEEncoder("m", model="x", max_bytes=4, max_delay_ms=1000)
+    events = _events(_encode(encoder, _deltas("a", "bb", "cc", "dddd", "e")))
+    assert [_content([e]) for e in events[:-1]] == ["a", "bbcc", "dddd", "e"]
+
+
+def test_delay_budget_flushes_while_producer_is_slow():
+    encoder = SSEEncoder("m", model="x", max_bytes=1024, max_delay_ms=5)
+    events = _events(_encode(encoder, _deltas("a", "b", "c", pause=0.03)))
+    assert [_content([e]) for e in events[:-1]] == ["a", "b", "c"]
+
+
+def test_coalescing_disabled_sends_every_delta():
+    encoder = SSEEncoder("m", model="x", max_delay_ms=0)
+    events = _events(_encode(encoder, _deltas("a", "b", "", "c")))
+    assert [_content([e]) for e in events[:-1]] == ["a", "b", "c"]
+
+
+def test_producer_errors_propagate():
+    async def broken():
+        yield "a"
+        raise RuntimeError("model failed")
+
+    encoder = SSEEncoder("m", model="x")
+    with pytest.raises(RuntimeError):
+        _encode(encoder, broken())
@@ -0,0 +1,175 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import psycopg2
+import pytest
+
+from tools import user_context
+from tools.profile_snapshot import ProfileSnapshot
+
+
+def test_ensure_profile_items_table_sends_one_statement_per_query(monkeypatch):
+    batches = []
+
+    async def execute_batch(statements):
+        batches.append(statements)
+        return [[] for _ in statements]
+
+    monkeypatch.setattr(user_context.db, "is_configured", lambda: True)
+    monkeypatch.setattr(user_context.db, "execute_batch", execute_batch)
+    assert asyncio.run(user_context.ensure_profile_items_table()) is True
+    (statements,) = batches
+    assert len(statements) == 3
+    assert all(";" not in sql for sql, _ in statements)
+
+
+def test_profile_summary_aggregates_in_sql_without_a_snapshot(monkeypatch):
+    queries = []
+
+    async def fetch_one(sql, params=None):
+        queries.append((sql, params))
+        return ({"skill": {"count": 7, "values": ["a", "b", "c", "d", "e", "f", "g"]},
+                 "location": {"count": 1, "values": ["London"]}},)
+
+    monkeypatch.setattr(user_context.db, "is_configured", lambda: True)
+    monkeypatch.setattr(user_context.db, "fetch_one", fetch_one)
+    monkeypatch.setattr(user_context.snapshots, "peek", lambda user_id: None)
+    summary = asyncio.run(user_context.get_profile_summary("u1"))
+    assert "json_object_agg" in queries[0][0] and queries[0][1] == ("u1",)
+    assert summary["counts"] == {"skill": 7, "location": 1}
+    assert len(summary["values"]["skill"]) == 7
+    assert summary["total"] == 8
+
+
+def test_profile_summary_uses_a_cached_snapshot(monkeypatch):
+    snapshot = ProfileSnapshot("u1", [("skill", "casting", None, True, "2024-01-01")])
+
+    async def fetch_one(sql, params=None):
+        raise AssertionError("no query expected")
+
+    monkeypatch.setattr(user_context.db, "is_configured", lambda: True)
+    monkeypatch.setattr(user_context.db, "fetch_one", fetch_one)
+    monkeypatch.setattr(user_context.snapshots, "peek", lambda user_id: snapshot)
+    assert asyncio.run(user_context.get_profile_summary("u1"))["values"] == {"skill": ["casting"]}
+
+
+def test_profile_completeness_keeps_full_items():
+    items = {"found": True, "items": {
+        "skill": [{"value": f"s{i}", "metadata": {}} for i in range(8)],
+        "location": [{"value": "London", "metadata": {"remote_ok": True}}],
+    }}
+    result = asyncio.run(user_context.get_profile_completeness("u1", items=items))
+    assert result["items"] == items["items"]
+    assert result["skills_count"] == 8
+    assert result["missing"] == ["role", "experience"]
+    assert result["percent"] == 50
+
+
+def test_full_context_interest_timestamps_are_datetimes(monkeypatch):
+    async def fetch_one(sql, params=None):
+        return ({"id": "u1", "name": "Sam"},
+                [{"job_id": "j1", "interest_type": "viewed", "created_at": "2024-06-01T12:30:00.123456+00:00",
+                  "title": "Coach", "company": "Fnatic", "location": "London", "category": "coaching"}])
+
+    async def no_memory(user_id, limit=10):
+        return {"found": False}
+
+    monkeypatch.setattr(user_context.db, "is_configured", lambda: True)
+    monkeypatch.setattr(user_context.db, "fetch_one", fetch_one)
+    monkeypatch.setattr(user_context, "get_conversation_memory", no_memory)
+    context = asyncio.run(user_context.get_full_user_context("u1"))
+    assert context["profile"]["name"] == "Sam"
+    assert context["job_interests"][0]["created_at"] == datetime(2024, 6, 1, 12, 30, 0, 123456, tzinfo=timezone.utc)
+
+
+def _capture_writes(monkeypatch, result=((2, 1),), error=None):
+    batches = []
+
+    async def execute_batch(statements):
+        batches.append(statements)
+        if error:
+            raise error
+        return [list(result)]
+
+    invalidated = []
+    monkeypatch.setattr(user_context.db, "is_configured", lambda: True)
+    monkeypatch.setattr(user_context.db, "execute_batch", execute_batch)
+    monkeypatch.setattr(user_context.snapshots, "invalidate", lambda user_id: invalidated.append(user_id))
+    monkeypatch.setattr(user_context.listener, "channel", "profile_changes")
+    return batches, invalidated
+
+
+def test_save_profile_items_sends_one_statement_with_columns(monkeypatch):
+    batches, invalidated = _capture_writes(monkeypatch)
+    result = asyncio.run(user_context.save_profile_items("u1", [
+        {"item_type": "skill", "value": "casting", "metadata": {"level": "pro"}},
+        {"item_type": "location", "value": "London", "confirmed": True},
+        {"item_type": "skill", "value": "editing", "replace_existing": True},
+    ]))
+    (sql, params), notify = batches[0]
+    assert sql == user_context._SAVE_PROFILE_ITEMS_SQL
+    assert params == (
+        ["skill", "location", "skill"], ["casting", "London", "editing"],
+        ['{"level": "pro"}', "{}", "{}"], [False, True, False], [False, True, True], "u1", "u1",
+    )
+    assert notify == ("SELECT pg_notify(%s, %s)", ("profile_changes", "u1"))
+    assert (result["saved"], result["removed"]) == (2, 1)
+    assert [item["replaced"] for item in result["items"]] == [False, True, True]
+    assert invalidated == ["u1"]
+
+
+def test_failed_save_still_drops_the_snapshot(monkeypatch):
+    batches, invalidated = _capture_writes(monkeypatch, error=RuntimeError("db down"))
+    result = asyncio.run(user_context.save_profile_item("u1", "role", "Coach"))
+    assert result == {"success": False, "error": "db down"}
+    assert invalidated == ["u1"]
+
+
+def test_empty_save_skips_the_database(monkeypatch):
+    batches, _ = _capture_writes(monkeypatch)
+    assert asyncio.run(user_context.save_profile_items("u1", []))["saved"] == 0
+    assert batches == []
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (a scratch Postgres)")
+def test_save_profile_items_sql_applies_items_in_order():
+    conn = psycopg2.connect(os.environ["TEST_DATABASE_URL"])
+    try:
+        with conn.cursor() as cur:
+            # A temp table shadows any real one for this session only
+            cur.execute("""
+                CREATE TEMP TABLE user_profile_items (
+                    id SERIAL PRIMARY KEY, user_id TEXT NOT NULL, item_type TEXT NOT NULL,
+                    value TEXT NOT NULL, metadata JSONB DEFAULT '{}', confirmed BOOLEAN DEFAULT false,
+                    created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW(),
+                    UNIQUE(user_id, item_type, value)
+                )
+            """)
+            cur.execute("""
+                INSERT INTO user_profile_items (user_id, item_type, value) VALUES
+                ('u1', 'location', 'Paris'), ('u1', 'skill', 'casting'), ('u2', 'location', 'Berlin')
+            """)
+
+            def save(*items):
+                columns = [list(column) for column in zip(*items)]
+                cur.execute(user_context._SAVE_PROFILE_ITEMS_SQL, (*columns, "u1", "u1"))
+                return cur.fetchone()
+
+            assert save(
+                ("location", "London", '{"remote_ok": true}', False, True),
+                ("skill", "editing", "{}", False, False),
+                ("location", "Leeds", "{}", True, True),
+                ("skill", "editing", '{"level": "pro"}', True, False),
+            ) == (2, 1)
+            cur.execute("SELECT user_id, item_type, value, metadata, confirmed FROM user_profile_items "
+                        "ORDER BY user_id, item_type, value")
+            assert cur.fetchall() == [
+                ("u1", "location", "Leeds", {}, True),
+                ("u1", "skill", "casting", {}, False),
+                ("u1", "skill", "editing", {"level": "pro"}, True),
+                ("u2", "location", "Berlin", {}, False),
+            ]
+    finally:
+        conn.rollback()
+        conn.close()
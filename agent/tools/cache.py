@@ -0,0 +1,121 @@
+"""Small async TTL cache with single-flight loading.
+
+    categories = await lookup_cache.get_or_load("categories", _load_categories)
+
+On a miss only one caller runs the loader; everyone else who misses on the
+same key at the same moment awaits that call instead of issuing their own
+query. Once a value has expired, callers are served the stale value while a
+single refresh runs, so a slow database never stalls the hot path. Loader
+errors propagate to the caller that triggered the load (and to waiters when
+there is no stale value to fall back on); nothing is cached for them.
+
+Each load runs in its own task that callers await through ``asyncio.shield``,
+so a caller that is cancelled (client disconnect, ``wait_for`` timeout) stops
+waiting without cancelling the load the other callers share.
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    """Mark a load's error retrieved; callers re-raise it themselves (if any are left)."""
+    if not task.cancelled():
+        task.exception()
+
+
+class TTLCache:
+    """Bounded LRU of ``key -> value`` entries that expire after ``ttl`` seconds."""
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0  # misses that waited on another caller's load
+        self.loads = 0
+        self.errors = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for ``key``, or None. Does not count as a hit or miss."""
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when ``key`` is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _start(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start a load for ``key`` (synchronously registered, so no second one starts)."""
+        task = asyncio.create_task(self._load(key, loader))
+        task.add_done_callback(_retrieve)
+        self._inflight[key] = task
+        self.loads += 1
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception:
+            self.errors += 1
+            raise
+        else:
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for ``key``, calling ``loader()`` at most once per expiry."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            # Expired: serve stale and refresh once in the background
+            self.stale_hits += 1
+            if key not in self._inflight:
+                self._start(key, loader)  # errors: keep serving stale, the next caller retries
+            return entry[1]
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            inflight = self._start(key, loader)
+        return await asyncio.shield(inflight)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "loads": self.loads,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+        }
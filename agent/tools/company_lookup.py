@@ -1,5 +1,8 @@
 """Company lookup tool for the esports jobs agent."""
 
+import re
+import heapq
+import unicodedata
 from typing import Optional, List
 from pydantic import BaseModel
 
@@ -7,6 +10,7 @@ from pydantic import BaseModel
 ESPORTS_COMPANIES = {
     "team liquid": {
         "name": "Team Liquid",
+        "aliases": ["liquid", "tl"],
         "description": "One of the world's leading esports organizations with teams across multiple games including League of Legends, Dota 2, CS2, and Valorant.",
         "headquarters": "Netherlands / Los Angeles, USA",
         "founded": "2000",
@@ -17,6 +21,7 @@ ESPORTS_COMPANIES = {
     },
     "logitech": {
         "name": "Logitech",
+        "aliases": ["logitech g", "logi"],
         "description": "Swiss technology company and major esports peripheral sponsor. Logitech G is their gaming brand providing gear for professional players.",
         "headquarters": "Lausanne, Switzerland",
         "founded": "1981",
@@ -47,6 +52,7 @@ ESPORTS_COMPANIES = {
     },
     "riot games": {
         "name": "Riot Games",
+        "aliases": ["riot"],
         "description": "Developer of League of Legends and Valorant. Operates major global esports leagues including LCS, LEC, LCK, and VCT.",
         "headquarters": "Los Angeles, California, USA",
         "founded": "2006",
@@ -67,6 +73,7 @@ ESPORTS_COMPANIES = {
     },
     "cloud9": {
         "name": "Cloud9",
+        "aliases": ["c9", "cloud 9"],
         "description": "Major North American esports organization competing in League of Legends, Valorant, CS2, and more.",
         "headquarters": "Santa Monica, California, USA",
         "founded": "2013",
@@ -77,6 +84,7 @@ ESPORTS_COMPANIES = {
     },
     "100 thieves": {
         "name": "100 Thieves",
+        "aliases": ["100t", "hundred thieves"],
         "description": "Gaming and lifestyle brand founded by Nadeshot. Combines esports with streetwear fashion and content creation.",
         "headquarters": "Los Angeles, California, USA",
         "founded": "2017",
@@ -87,6 +95,7 @@ ESPORTS_COMPANIES = {
     },
     "g2 esports": {
         "name": "G2 Esports",
+        "aliases": ["g2"],
         "description": "European esports powerhouse with championship teams across multiple titles.",
         "headquarters": "Berlin, Germany",
         "founded": "2014",
@@ -97,6 +106,7 @@ ESPORTS_COMPANIES = {
     },
     "grand canyon university": {
         "name": "Grand Canyon University Esports",
+        "aliases": ["gcu", "gcu esports"],
         "description": "Collegiate esports program at Grand Canyon University offering varsity-level competition.",
         "headquarters": "Phoenix, Arizona, USA",
         "founded": "2018",
@@ -118,36 +128,213 @@ class CompanyProfile(BaseModel):
     notable_achievements: List[str]
     careers_url: str
     culture: str
+    aliases: List[str] = []
+
+
+# =====
+# Company index
+# =====
+# Words that do not identify an org on their own ("G2 Esports" -> "g2")
+_GENERIC_WORDS = {"esports", "esport", "gaming", "games", "gg", "team", "the", "club"}
+# Trigram similarity needed for a fuzzy match (same scale as pg_trgm)
+FUZZY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 32
+# Shorter queries are never matched fuzzily
+FUZZY_MIN_LENGTH = 4
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returning limit + 1) past ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _name_variants(key: str, data: dict) -> tuple[list[str], list[str]]:
+    """(primary names, derived aliases) for one company, all normalized."""
+    primary = [normalize_name(key), normalize_name(data["name"])]
+    primary += [normalize_name(a) for a in data.get("aliases", [])]
+    derived = []
+    for name in primary:
+        words = name.split()
+        significant = [w for w in words if w not in _GENERIC_WORDS]
+        if significant and len(significant) < len(words):
+            derived.append(" ".join(significant))  # "riot games" -> "riot"
+        if len(words) > 1:
+            derived.append("".join(words))  # "team liquid" -> "teamliquid"
+    return primary, derived
+
+
+class CompanyIndex:
+    """Immutable lookup structures over a company directory.
+
+    Profiles are validated once at build time. Lookups go: exact
+    name/alias, then substring, then fuzzy (trigram similarity with an edit
+    distance tiebreak); game searches go through an inverted index.
+    """
+
+    def __init__(self, companies: dict):
+        self.profiles: list[CompanyProfile] = []
+        self.aliases: dict[str, int] = {}
+        self._alias_trigrams: dict[str, set[str]] = {}
+        self._trigram_postings: dict[str, list[str]] = {}
+        self.games: dict[str, set[int]] = {}
+
+        derived_aliases = []
+        for key, data in companies.items():
+            idx = len(self.profiles)
+            self.profiles.append(CompanyProfile(**data))
+            primary, derived = _name_variants(key, data)
+            for alias in primary:
+                self.aliases.setdefault(alias, idx)
+            derived_aliases += [(alias, idx) for alias in derived]
+            for game in data.get("games", []):
+                self.games.setdefault(normalize_name(game), set()).add(idx)
+        # Derived aliases never shadow a real name or alias
+        for alias, idx in derived_aliases:
+            self.aliases.setdefault(alias, idx)
+
+        for alias in self.aliases:
+            grams = _trigrams(alias)
+            self._alias_trigrams[alias] = grams
+            for gram in grams:
+                self._trigram_postings.setdefault(gram, []).append(alias)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def names(self) -> list[str]:
+        return [p.name for p in self.profiles]
+
+    def _candidates(self, grams: set[str]) -> dict[str, int]:
+        """Aliases sharing the query's more selective trigrams -> count shared.
+
+        Trigrams that occur in a large share of all aliases ("  t", "tea" in
+        a directory full of "Team ...") only add noise and cost, so they are
+        skipped unless nothing rarer is available.
+        """
+        postings = sorted((self._trigram_postings.get(g, ()) for g in grams), key=len)
+        common = max(64, len(self.aliases) // 20)
+        selective = [p for p in postings if len(p) <= common] or postings[:1]
+        shared: dict[str, int] = {}
+        for posting in selective:
+            for alias in posting:
+                shared[alias] = shared.get(alias, 0) + 1
+        return shared
+
+    def lookup(self, company_name: str) -> Optional[CompanyProfile]:
+        query = normalize_name(company_name)
+        if not query:
+            return None
+
+        idx = self.aliases.get(query)
+        if idx is not None:
+            return self.profiles[idx]
+
+        # "team" or "esports" alone names no company in particular
+        if all(word in _GENERIC_WORDS for word in query.split()):
+            return None
+
+        grams = _trigrams(query)
+        candidates = self._candidates(grams)
+
+        # Substring ("liquid" inside "team liquid"); shortest alias wins
+        substring_hits = [alias for alias in candidates if query in alias]
+        if substring_hits:
+            return self.profiles[self.aliases[min(substring_hits, key=len)]]
+
+        # Fuzzy: a match needs both enough trigram similarity and a small
+        # edit distance; similarity ranks, closer edit distance breaks ties.
+        # Very short queries ("t1", "c8") are one typo away from too many
+        # names, so they only match exactly or as a substring.
+        if len(query) < FUZZY_MIN_LENGTH:
+            return None
+        limit = max(1, len(query) // 4)
+        best = None
+        for alias, _ in heapq.nlargest(FUZZY_CANDIDATES, candidates.items(), key=lambda c: c[1]):
+            alias_grams = self._alias_trigrams[alias]
+            shared = len(grams & alias_grams)
+            similarity = shared / (len(grams) + len(alias_grams) - shared)
+            if similarity < FUZZY_THRESHOLD:
+                continue
+            distance = _edit_distance(query, alias, limit)
+            if distance > limit:
+                continue
+            rank = (similarity, -distance)
+            if best is None or rank > best[0]:
+                best = (rank, alias)
+        if best:
+            return self.profiles[self.aliases[best[1]]]
+        return None
+
+    def by_game(self, game: str) -> list[CompanyProfile]:
+        query = normalize_name(game)
+        if not query:
+            return []
+        matched: set[int] = set()
+        for name, companies in self.games.items():
+            if query in name:
+                matched |= companies
+        return [self.profiles[i] for i in sorted(matched)]
+
+
+_index: Optional[CompanyIndex] = None
+
+
+def get_index() -> CompanyIndex:
+    """The current company index (built from ESPORTS_COMPANIES on first use)."""
+    global _index
+    if _index is None:
+        _index = CompanyIndex(ESPORTS_COMPANIES)
+    return _index
+
+
+def set_index(index: CompanyIndex) -> None:
+    """Replace the live index (a single assignment, so readers never block)."""
+    global _index
+    _index = index
 
 
 def lookup_company(company_name: str) -> Optional[CompanyProfile]:
     """
     Look up information about an esports company.
 
+    Matches names and aliases exactly, then as a substring, then fuzzily
+    (so "Team Liqiud" or "clod9" still resolve).
+
     Args:
         company_name: Name of the company to look up
 
     Returns:
         Company profile if found, None otherwise
     """
-    company_lower = company_name.lower()
-
-    # Direct match
-    if company_lower in ESPORTS_COMPANIES:
-        data = ESPORTS_COMPANIES[company_lower]
-        return CompanyProfile(**data)
-
-    # Partial match
-    for key, data in ESPORTS_COMPANIES.items():
-        if company_lower in key or company_lower in data["name"].lower():
-            return CompanyProfile(**data)
-
-    return None
+    return get_index().lookup(company_name)
 
 
 def get_all_companies() -> List[str]:
     """Get a list of all known esports companies."""
-    return [data["name"] for data in ESPORTS_COMPANIES.values()]
+    return get_index().names()
 
 
 def search_companies_by_game(game: str) -> List[CompanyProfile]:
@@ -160,13 +347,4 @@ def search_companies_by_game(game: str) -> List[CompanyProfile]:
     Returns:
         List of companies involved with that game
     """
-    game_lower = game.lower()
-    results = []
-
-    for data in ESPORTS_COMPANIES.values():
-        for company_game in data["games"]:
-            if game_lower in company_game.lower():
-                results.append(CompanyProfile(**data))
-                break
-
-    return results
+    return get_index().by_game(game)
@@ -0,0 +1,191 @@
+"""Company directory source with hot reload.
+
+The directory behind ``lookup_esports_company`` can come from:
+    - ``COMPANY_SOURCE=builtin`` (default): ESPORTS_COMPANIES in company_lookup
+    - ``COMPANY_SOURCE=db``: the ``companies`` table
+      (scripts/create-companies-table.sql)
+    - ``COMPANY_SOURCE=/path/to/companies.json`` or ``.parquet``
+
+The store loads the source at startup and polls it every
+COMPANY_RELOAD_SECONDS. A file is re-read only when its checksum changes; the
+table only when ``count(*)`` or ``max(updated_at)`` moves. A changed source
+is built into a fresh CompanyIndex off the event loop and swapped in with one
+assignment (``company_lookup.set_index``), so lookups never wait on a reload
+and never see a half-built index. If a reload fails the previous index stays.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import hashlib
+from typing import Optional
+
+from . import db
+from .company_lookup import ESPORTS_COMPANIES, CompanyIndex, normalize_name, set_index
+
+# Parquet support is optional (pip install pyarrow)
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+COMPANY_SOURCE = os.getenv("COMPANY_SOURCE", "builtin")
+COMPANY_RELOAD_SECONDS = float(os.getenv("COMPANY_RELOAD_SECONDS", "60"))
+
+_TEXT_FIELDS = ("description", "headquarters", "founded", "careers_url", "culture")
+_LIST_FIELDS = ("games", "notable_achievements", "aliases")
+
+
+def _to_company(record: dict) -> tuple[str, dict]:
+    """Normalize one source record to a (key, ESPORTS_COMPANIES-style dict) pair."""
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError(f"Company record without a name: {record!r}")
+    data = {"name": name}
+    for field in _TEXT_FIELDS:
+        value = record.get(field)
+        data[field] = "" if value is None else str(value)
+    for field in _LIST_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            value = json.loads(value) if value.startswith("[") else [value]
+        data[field] = [str(v) for v in (value or [])]
+    key = normalize_name(str(record.get("slug") or record.get("key") or name))
+    return key, data
+
+
+def _to_directory(records) -> dict:
+    """Accept ``{key: record}`` or ``[record, ...]``; skip malformed records."""
+    if isinstance(records, dict):
+        records = [{"key": key, **value} for key, value in records.items()]
+    companies = {}
+    for record in records:
+        try:
+            key, data = _to_company(record)
+        except (ValueError, TypeError) as e:
+            print(f"[CompanyStore] Skipping record: {e}", file=sys.stderr)
+            continue
+        companies[key] = data
+    return companies
+
+
+def _read_file(path: str) -> dict:
+    if path.endswith(".parquet"):
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet company source needs pyarrow installed")
+        return _to_directory(pq.read_table(path).to_pylist())
+    with open(path, "rb") as f:
+        return _to_directory(json.loads(f.read()))
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CompanyStore:
+    """Loads the configured company source and keeps the live index current."""
+
+    def __init__(self, source: str = COMPANY_SOURCE):
+        self.source = source
+        self.version: Optional[str] = None  # checksum or table watermark
+        self.companies = 0
+        self.reloads = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+        self._file_stat: Optional[tuple] = None
+
+    # --- change detection ---
+    async def _current_version(self) -> tuple[Optional[str], Optional[tuple]]:
+        """Source version plus, for files, the ``(mtime, size)`` it was taken at."""
+        if self.source == "builtin":
+            return "builtin", None
+        if self.source == "db":
+            row = await db.fetch_one("SELECT COUNT(*), MAX(updated_at) FROM companies")
+            return f"{row[0]}:{row[1]}", None
+        # Only hash the file when mtime or size moved
+        stat = os.stat(self.source)
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        if file_stat == self._file_stat and self.version is not None:
+            return self.version, file_stat
+        return await asyncio.to_thread(_file_checksum, self.source), file_stat
+
+    async def _read_source(self) -> dict:
+        if self.source == "builtin":
+            return ESPORTS_COMPANIES
+        if self.source == "db":
+            rows = await db.fetch_all("""
+                SELECT slug, name, description, headquarters, founded, games,
+                       notable_achievements, careers_url, culture, aliases
+                FROM companies
+                WHERE is_active = true
+            """, dict_rows=True)
+            return _to_directory([dict(r) for r in rows])
+        return await asyncio.to_thread(_read_file, self.source)
+
+    # --- loading ---
+    async def reload(self, force: bool = False) -> bool:
+        """Swap in a new index if the source changed. Returns True if it did."""
+        version, file_stat = await self._current_version()
+        if not force and version == self.version:
+            self._file_stat = file_stat
+            return False
+        companies = await self._read_source()
+        if not companies:
+            raise ValueError(f"Company source {self.source!r} is empty")
+        index = await asyncio.to_thread(CompanyIndex, companies)
+        set_index(index)
+        # Only now: a failed reload must be retried on the next poll
+        self.version = version
+        self._file_stat = file_stat
+        self.companies = len(index)
+        self.reloads += 1
+        print(f"[CompanyStore] Loaded {len(index)} companies from {self.source}", file=sys.stderr)
+        return True
+
+    async def _reload_loop(self) -> None:
+        while True:
+            await asyncio.sleep(COMPANY_RELOAD_SECONDS)
+            try:
+                await self.reload()
+            except Exception as e:
+                self.failures += 1
+                print(f"[CompanyStore] Reload failed, keeping current index: {e}", file=sys.stderr)
+
+    async def start(self) -> None:
+        """Initial load (falling back to the built-in list) plus polling."""
+        try:
+            await self.reload(force=True)
+        except Exception as e:
+            self.failures += 1
+            print(f"[CompanyStore] Could not load {self.source}, using built-in companies: {e}",
+                  file=sys.stderr)
+            set_index(CompanyIndex(ESPORTS_COMPANIES))
+        if self.source != "builtin" and self._task is None:
+            self._task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "source": self.source,
+            "companies": self.companies,
+            "version": self.version,
+            "reloads": self.reloads,
+            "failures": self.failures,
+        }
+
+
+store = CompanyStore()
@@ -0,0 +1,442 @@
+"""Shared Postgres connection pool for the agent tools.
+
+Every tool used to open (and close) its own psycopg2 connection. Against Neon
+the TLS handshake plus auth costs more than most of our queries, so all tools
+now borrow connections from one process-wide pool instead.
+
+Async code (agent tools, request handlers) should use the coroutine helpers
+at the bottom of this module, which run queries on a dedicated executor sized
+to the pool so a slow query never stalls the event loop:
+
+    rows = await db.fetch_all("SELECT id, title FROM jobs LIMIT %s", (5,))
+
+``DB_TRANSPORT=http`` routes those helpers through Neon's serverless HTTP
+endpoint (``tools.neon_http``) instead of the TCP pool - a better fit for
+short-lived or cold-starting deployments. ``DB_TRANSPORT=tcp`` (the default)
+keeps the pool. ``run()`` always uses the pool since it needs a connection.
+
+Blocking code can borrow a connection directly:
+
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Optional, Sequence
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+
+from . import neon_http
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+# "tcp" (psycopg2 pool) or "http" (Neon serverless /sql endpoint)
+DB_TRANSPORT = os.getenv("DB_TRANSPORT", "tcp").lower()
+
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Seconds a caller waits for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Connections idle longer than this are pinged before reuse (Neon drops
+# connections when the compute suspends)
+POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "60"))
+# Connections older than this are recycled regardless of health
+POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+# Errors that mean the connection itself is unusable, not just the query
+_BROKEN_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the checkout timeout."""
+
+
+class _PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs."""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool with health checks, recycling and metrics."""
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        timeout: float = POOL_TIMEOUT,
+        max_idle: float = POOL_MAX_IDLE,
+        max_lifetime: float = POOL_MAX_LIFETIME,
+    ):
+        self.dsn = dsn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._size = 0  # open connections, idle + in use
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._latencies_ms: deque[float] = deque(maxlen=1000)
+
+        for _ in range(self.min_size):
+            try:
+                self._idle.append(self._open())
+                self._size += 1
+            except Exception as e:
+                print(f"[DB] Pool warm-up failed: {e}", file=sys.stderr)
+                break
+
+    def _open(self) -> _PooledConnection:
+        conn = psycopg2.connect(
+            self.dsn,
+            connect_timeout=CONNECT_TIMEOUT,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+        )
+        self._created += 1
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled: _PooledConnection) -> None:
+        """Close a connection that is no longer usable. Caller holds no lock."""
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._recycled += 1
+            self._cond.notify()
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        """Check a connection before handing it out."""
+        conn = pooled.conn
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - pooled.created_at > self.max_lifetime:
+            return False
+        if now - pooled.last_used > self.max_idle:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def _acquire(self) -> _PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            pooled = None
+            should_open = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._waiting += 1
+                try:
+                    while not self._idle and self._size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeout(
+                                f"No database connection free after {self.timeout}s "
+                                f"({self._size}/{self.max_size} in use)"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+                if self._idle:
+                    pooled = self._idle.pop()  # LIFO keeps hot connections hot
+                else:
+                    self._size += 1  # reserve the slot before connecting
+                    should_open = True
+
+            if should_open:
+                try:
+                    pooled = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(pooled):
+                self._discard(pooled)
+                continue
+
+            latency_ms = (time.monotonic() - started) * 1000
+            with self._cond:
+                self._checkouts += 1
+                self._latencies_ms.append(latency_ms)
+            return pooled
+
+    def _release(self, pooled: _PooledConnection, broken: bool = False) -> None:
+        conn = pooled.conn
+        if not broken and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    broken = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    # Never hand the next caller someone else's open transaction
+                    conn.rollback()
+            except Exception:
+                broken = True
+
+        if broken or conn.closed or self._closed:
+            self._discard(pooled)
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block.
+
+        Uncommitted work is rolled back on return. Connections that raised a
+        connection-level error are dropped rather than returned to the pool.
+        """
+        pooled = self._acquire()
+        broken = False
+        try:
+            yield pooled.conn
+        except _BROKEN_CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._release(pooled, broken=broken)
+
+    def stats(self) -> dict:
+        """Snapshot of pool metrics for health checks and logging."""
+        with self._cond:
+            latencies = sorted(self._latencies_ms)
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "max_size": self.max_size,
+                "in_use": self._size - idle,
+                "idle": idle,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "checkout_ms_avg": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                "checkout_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 2) if latencies else 0.0,
+                "checkout_ms_max": round(latencies[-1], 2) if latencies else 0.0,
+            }
+
+    def close(self) -> None:
+        """Close all idle connections; in-use ones are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            try:
+                pooled.conn.close()
+            except Exception:
+                pass
+
+
+# =====
+# Process-wide pool
+# =====
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def is_configured() -> bool:
+    """Whether a database URL is available."""
+    return bool(DATABASE_URL)
+
+
+def get_pool() -> ConnectionPool:
+    """Get (or lazily create) the shared connection pool."""
+    global _pool
+    if _pool is None:
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL is not configured")
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_URL)
+                print(f"[DB] Connection pool ready (max {_pool.max_size})", file=sys.stderr)
+    return _pool
+
+
+def connection():
+    """Borrow a connection from the shared pool (context manager)."""
+    return get_pool().connection()
+
+
+def pool_stats() -> dict:
+    """Metrics for the shared pool, or an empty dict if it was never used."""
+    if _pool is None:
+        return {}
+    return _pool.stats()
+
+
+def close_pool() -> None:
+    """Close the shared pool and its executor (called on shutdown)."""
+    global _pool, _executor
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+# =====
+# Async API
+# =====
+# One worker per pooled connection: queries beyond the pool size queue here
+# (without holding a thread hostage on the pool condition) instead of on the
+# event loop.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=POOL_MAX_SIZE, thread_name_prefix="db")
+    return _executor
+
+
+def _with_connection(fn: Callable, args: tuple, kwargs: dict):
+    with connection() as conn:
+        return fn(conn, *args, **kwargs)
+
+
+async def run(fn: Callable, *args, **kwargs) -> Any:
+    """Run ``fn(conn, *args, **kwargs)`` with a pooled connection, off the event loop.
+
+    Use this for multi-statement work that must share one connection or
+    transaction; ``fn`` is responsible for committing.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(_with_connection, fn, args, kwargs))
+
+
+def _fetch(conn, sql: str, params: Optional[Sequence], dict_rows: bool, one: bool):
+    cursor_factory = RealDictCursor if dict_rows else None
+    with conn.cursor(cursor_factory=cursor_factory) as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchone() if one else cur.fetchall()
+    conn.rollback()  # end the implicit read transaction
+    return rows
+
+
+def _execute(conn, sql: str, params: Optional[Sequence], returning: bool):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        result = cur.fetchone() if returning else cur.rowcount
+    conn.commit()
+    return result
+
+
+def _execute_batch(conn, statements: Sequence[tuple]):
+    results = []
+    with conn.cursor() as cur:
+        for sql, params in statements:
+            cur.execute(sql, params)
+            results.append(cur.fetchall() if cur.description else [])
+    conn.commit()
+    return results
+
+
+def uses_http() -> bool:
+    """Whether queries go over Neon's HTTP endpoint rather than the TCP pool."""
+    return DB_TRANSPORT == "http"
+
+
+async def fetch_all(sql: str, params: Optional[Sequence] = None, dict_rows: bool = False) -> list:
+    """Run a query and return all rows (tuples, or dicts if ``dict_rows``)."""
+    if uses_http():
+        return await neon_http.get_client().query(sql, params, dict_rows=dict_rows)
+    return await run(_fetch, sql, params, dict_rows, False)
+
+
+async def fetch_one(sql: str, params: Optional[Sequence] = None, dict_rows: bool = False):
+    """Run a query and return the first row, or None."""
+    if uses_http():
+        rows = await neon_http.get_client().query(sql, params, dict_rows=dict_rows)
+        return rows[0] if rows else None
+    return await run(_fetch, sql, params, dict_rows, True)
+
+
+async def execute(sql: str, params: Optional[Sequence] = None, returning: bool = False):
+    """Run a write and commit. Returns the rowcount, or the first row if ``returning``."""
+    if uses_http():
+        client = neon_http.get_client()
+        if returning:
+            rows = await client.query(sql, params)
+            return rows[0] if rows else None
+        return await client.execute(sql, params)
+    return await run(_execute, sql, params, returning)
+
+
+async def execute_batch(statements: Sequence[tuple]) -> list[list]:
+    """Run ``(sql, params)`` statements in one transaction and one round trip.
+
+    Over TCP they share a pooled connection; over HTTP they go as a single
+    batch request. Returns the (tuple) rows of each statement, in order.
+    """
+    if uses_http():
+        return await neon_http.get_client().batch(statements)
+    return await run(_execute_batch, statements)
+
+
+async def close() -> None:
+    """Release every transport (called on shutdown)."""
+    close_pool()
+    await neon_http.close_client()
+
+
+def transport_stats() -> dict:
+    """Transport name plus pool metrics, for health checks."""
+    return {
+        "transport": DB_TRANSPORT,
+        "http2": neon_http.HTTP2_AVAILABLE if uses_http() else None,
+        "pool": pool_stats(),
+    }
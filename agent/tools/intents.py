@@ -0,0 +1,171 @@
+"""Fast-path intent routing for the CLM endpoint.
+
+Short, deterministic questions ("how many jobs", "what page am I on", "what's
+my location", "list categories") are answered straight from data instead of
+running the model:
+
+    intent = router.classify(user_message)
+    if intent:
+        text = await answer(intent, user, page)  # None -> fall back to the agent
+
+All intent patterns are compiled into one anchored regex with a named group
+per intent, so classifying is a single ``fullmatch``. Patterns only match when
+the whole message is the question (plus filler like "hey" or "please"); a
+message that asks for anything more goes to the agent.
+"""
+
+import re
+import sys
+from typing import Optional
+
+from .job_search import count_active_jobs, get_available_categories
+from .user_context import get_profile_items
+
+# Intent -> alternatives, matched against normalize(message)
+INTENT_PATTERNS: dict[str, list[str]] = {
+    "user_name": [
+        r"what(?: is|s)? my name",
+        r"who am i",
+        r"what am i called",
+        r"do you know (?:my name|who i am)",
+    ],
+    "current_page": [
+        r"(?:what|which) page (?:am i|are we|is this)(?: on| looking at)?",
+        r"what(?: is|s)? (?:this|the current|the) page",
+        r"where are we",
+        r"current page",
+    ],
+    "job_count": [
+        r"how many (?:jobs|roles|positions|openings)"
+        r"(?: are there| do you have| are (?:listed|available|open))?"
+        r"(?: (?:here|right now|in total|altogether|on (?:this|the) (?:page|site)))?",
+    ],
+    "my_location": [
+        r"what(?: is|s)? my (?:preferred )?location",
+        r"where am i (?:based|located)",
+        r"what location (?:did i (?:pick|choose|set|save)|have i (?:picked|chosen|set|saved)|am i in)",
+    ],
+    "list_categories": [
+        r"(?:list|show|name|give)(?: me)?(?: all)?(?: the| your)? (?:job )?categories",
+        r"what (?:job )?categories (?:are there|do you have|are available|exist)",
+        r"what (?:are )?(?:the|your) (?:job )?categories",
+    ],
+}
+
+_FILLER_BEFORE = r"(?:(?:hey|hi|hello|ok|okay|so|um|uh|and|please|can you tell me|could you tell me|tell me|do you know)\s+)*"
+_FILLER_AFTER = r"(?:\s+(?:please|then|again|now))*"
+
+# Per-intent answers; the "unknown" variants are used when the data is missing
+TEMPLATES = {
+    "user_name": {
+        "known": "You're {name}! I picked that up when you signed in.",
+        "unknown": "I don't know your name yet. Sign in and I'll remember you!",
+    },
+    "current_page": {
+        "known": "You're on the {title} page{location}. Want me to find jobs that match it?",
+        "unknown": "You're on the MVP Actor homepage. Want me to find esports jobs for you?",
+    },
+    "job_count": {
+        "known": "There are {count} esports jobs open right now. Want me to narrow them down by category or country?",
+    },
+    "my_location": {
+        "known": "Your preferred location is {location}{remote}. Want me to find jobs there?",
+        "unknown": "You haven't told me where you'd like to work yet. Where are you based?",
+        "signed_out": "I don't know where you're based yet. Sign in and tell me, and I'll remember it!",
+    },
+    "list_categories": {
+        "known": "We have jobs in {categories}. Which one interests you?",
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """Lower-case, drop punctuation and apostrophes, collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", "", text.lower()).split())
+
+
+def _spoken_list(values: list[str]) -> str:
+    if len(values) <= 1:
+        return "".join(values)
+    return f"{', '.join(values[:-1])} and {values[-1]}"
+
+
+class IntentRouter:
+    """Classifies a message as one of ``intents`` or None with a single regex."""
+
+    def __init__(self, intents: dict[str, list[str]] = INTENT_PATTERNS):
+        groups = "|".join(
+            f"(?P<{name}>{'|'.join(patterns)})" for name, patterns in intents.items()
+        )
+        self._pattern = re.compile(f"{_FILLER_BEFORE}(?:{groups}){_FILLER_AFTER}")
+        self.routed = {name: 0 for name in intents}
+        self.passed = 0
+
+    def classify(self, text: str) -> Optional[str]:
+        match = self._pattern.fullmatch(normalize(text or ""))
+        if match is None:
+            self.passed += 1
+            return None
+        self.routed[match.lastgroup] += 1
+        return match.lastgroup
+
+    def stats(self) -> dict:
+        routed = sum(self.routed.values())
+        total = routed + self.passed
+        return {
+            "routed": dict(self.routed),
+            "passed_to_agent": self.passed,
+            "route_ratio": round(routed / total, 3) if total else 0.0,
+        }
+
+
+router = IntentRouter()
+
+
+async def _saved_location(user_id: str) -> Optional[dict]:
+    result = await get_profile_items(user_id, "location")
+    items = result.get("items", {}).get("location") if result.get("found") else None
+    return items[0] if items else None
+
+
+async def answer(intent: str, user: Optional[dict] = None, page=None) -> Optional[str]:
+    """Reply for ``intent`` from data, or None to let the agent handle it.
+
+    ``user`` is a dict with ``user_id``/``name`` (see extract_user_from_instructions),
+    ``page`` the request's PageContext if any.
+    """
+    user = user or {}
+    templates = TEMPLATES[intent]
+    try:
+        if intent == "user_name":
+            if user.get("name"):
+                return templates["known"].format(name=user["name"])
+            return templates["unknown"]
+
+        if intent == "current_page":
+            if page is not None and getattr(page, "pageId", None):
+                location = f" in {page.location}" if page.location else ""
+                return templates["known"].format(title=page.title or page.pageId, location=location)
+            return templates["unknown"]
+
+        if intent == "job_count":
+            count = await count_active_jobs()
+            return None if count is None else templates["known"].format(count=count)
+
+        if intent == "my_location":
+            if not user.get("user_id"):
+                return templates["signed_out"]
+            item = await _saved_location(user["user_id"])
+            if item is None:
+                return templates["unknown"]
+            remote = " (remote is fine too)" if (item.get("metadata") or {}).get("remote_ok") else ""
+            return templates["known"].format(location=item["value"], remote=remote)
+
+        if intent == "list_categories":
+            categories = await get_available_categories()
+            if not categories:
+                return None
+            return templates["known"].format(categories=_spoken_list(sorted(categories)))
+    except Exception as e:
+        print(f"[Intents] Could not answer {intent}, passing to agent: {e}", file=sys.stderr)
+    return None
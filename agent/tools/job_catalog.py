@@ -0,0 +1,295 @@
+"""In-process catalog of active jobs.
+
+The active jobs set changes a few times an hour at most, yet nearly every
+agent turn searches it. The catalog keeps every active job in memory in
+columnar form and answers filter-only ``search_jobs`` calls,
+``get_job_by_id`` and the category/country lists without a database round
+trip. Free-text searches stay on the GIN-indexed full-text query in
+job_search.
+
+Loading and refreshing:
+    - ``start()`` loads the full set at startup and schedules a background
+      refresh every JOB_CATALOG_REFRESH_SECONDS.
+    - Refreshes are incremental: only rows whose watermark column
+      (``updated_at`` if the table has it, else ``posted_date``) moved past
+      the last one seen, less JOB_CATALOG_WATERMARK_OVERLAP_SECONDS, are
+      fetched and merged. ``updated_at`` is stamped when a transaction
+      starts, not when it commits, so a slow writer can commit a row older
+      than the watermark; the overlap re-reads that window every refresh.
+      Deactivated rows drop out.
+    - Every JOB_CATALOG_FULL_RELOAD_SECONDS a full reload catches deletes
+      (and edits, when only ``posted_date`` is available).
+
+Each load builds a new immutable ``CatalogSnapshot`` in a worker thread and
+swaps it in with a single assignment, so readers never see a half-applied
+refresh and the event loop is not blocked while a large catalog is indexed. Callers
+fall back to Neon while ``snapshot()`` is None (disabled, or not loaded).
+"""
+
+import os
+import sys
+import time
+import math
+import asyncio
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Optional, Sequence
+
+from . import db
+
+JOB_CATALOG_ENABLED = os.getenv("JOB_CATALOG_ENABLED", "true").lower() == "true"
+JOB_CATALOG_REFRESH_SECONDS = float(os.getenv("JOB_CATALOG_REFRESH_SECONDS", "60"))
+JOB_CATALOG_FULL_RELOAD_SECONDS = float(os.getenv("JOB_CATALOG_FULL_RELOAD_SECONDS", "3600"))
+# How far before the watermark each refresh re-reads, to catch late commits
+JOB_CATALOG_WATERMARK_OVERLAP_SECONDS = float(os.getenv("JOB_CATALOG_WATERMARK_OVERLAP_SECONDS", "300"))
+
+# Same column order as the SELECTs in job_search, so rows feed _row_to_job
+JOB_COLUMNS = (
+    "id", "title", "company", "location", "country", "type",
+    "salary", "description", "skills", "category", "external_url",
+)
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    # posted_date may be a DATE column
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    return math.nan
+
+
+class CatalogSnapshot:
+    """Immutable columnar view of the active jobs.
+
+    Text columns are plain lists; category and country are dictionary
+    encoded (``array('H')`` codes into a small list of distinct values);
+    posting times are an ``array('d')`` with NaN for unknown dates.
+    """
+
+    __slots__ = (
+        "version", "loaded_at", "size",
+        "ids", "titles", "companies", "locations", "countries", "types",
+        "salaries", "descriptions", "skills", "categories", "urls",
+        "category_values", "category_codes", "country_values", "country_codes",
+        "posted", "by_recency", "_index",
+        "_country_lc", "_type_lc",
+    )
+
+    def __init__(self, rows: Sequence[tuple], posted: Sequence, version: int):
+        self.version = version
+        self.loaded_at = time.time()
+        self.size = len(rows)
+
+        columns = list(zip(*rows)) if rows else [()] * len(JOB_COLUMNS)
+        (self.ids, self.titles, self.companies, self.locations, self.countries,
+         self.types, self.salaries, self.descriptions, self.skills,
+         self.categories, self.urls) = (list(c) for c in columns)
+
+        self.category_values, self.category_codes = self._encode(self.categories)
+        self.country_values, self.country_codes = self._encode(self.countries)
+
+        self.posted = array("d", (_timestamp(p) for p in posted))
+        # Newest first, unknown dates last (like NULLS LAST)
+        self.by_recency = sorted(
+            range(self.size),
+            key=lambda i: math.inf if math.isnan(self.posted[i]) else -self.posted[i],
+        )
+        self._index = {job_id: i for i, job_id in enumerate(self.ids)}
+
+        # Lower-cased filter columns, computed once per snapshot
+        self._country_lc = [(c or "").lower() for c in self.countries]
+        self._type_lc = [(t or "").lower() for t in self.types]
+
+    @staticmethod
+    def _encode(values: list) -> tuple[list, array]:
+        distinct: dict = {}
+        codes = array("H", (distinct.setdefault(v, len(distinct)) for v in values))
+        return list(distinct), codes
+
+    def row(self, i: int) -> tuple:
+        """Row ``i`` as a tuple in JOB_COLUMNS order."""
+        return (
+            self.ids[i], self.titles[i], self.companies[i], self.locations[i],
+            self.countries[i], self.types[i], self.salaries[i], self.descriptions[i],
+            self.skills[i], self.categories[i], self.urls[i],
+        )
+
+    def get(self, job_id: str) -> Optional[tuple]:
+        i = self._index.get(job_id)
+        return self.row(i) if i is not None else None
+
+    def distinct_categories(self) -> list[str]:
+        return [v for v in self.category_values if v is not None]
+
+    def distinct_countries(self) -> list[str]:
+        return [v for v in self.country_values if v is not None]
+
+    def search(self, category: Optional[str] = None, country: Optional[str] = None,
+               job_type: Optional[str] = None, limit: int = 5) -> list[tuple]:
+        """Newest jobs matching the filters, like ``job_search.search_jobs`` without a query."""
+        allowed_category = None
+        if category:
+            wanted = category.lower()
+            allowed_category = {
+                code for code, v in enumerate(self.category_values)
+                if v is not None and v.lower() == wanted
+            }
+            if not allowed_category:
+                return []
+        country_lc = country.lower() if country else None
+        type_lc = job_type.lower() if job_type else None
+
+        results = []
+        for i in self.by_recency:
+            if allowed_category is not None and self.category_codes[i] not in allowed_category:
+                continue
+            if country_lc and country_lc not in self._country_lc[i]:
+                continue
+            if type_lc and type_lc not in self._type_lc[i]:
+                continue
+            results.append(self.row(i))
+            if len(results) >= limit:
+                break
+        return results
+
+
+class JobCatalog:
+    """Owns the current snapshot and keeps it fresh."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._rows: dict[str, tuple] = {}  # id -> (row, posted_date)
+        self._watermark_column: Optional[str] = None
+        self._watermark = None
+        self._version = 0
+        self._last_full_load = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    async def _detect_watermark(self) -> str:
+        row = await db.fetch_one("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'jobs' AND column_name = 'updated_at'
+        """)
+        return "updated_at" if row else "posted_date"
+
+    def _select(self) -> str:
+        return f"SELECT {', '.join(JOB_COLUMNS)}, posted_date, is_active, {self._watermark_column} FROM jobs"
+
+    async def _publish(self) -> None:
+        self._version += 1
+        entries = list(self._rows.values())
+        # Indexing thousands of rows takes long enough to stall other requests
+        self._snapshot = await asyncio.to_thread(
+            CatalogSnapshot,
+            [row for row, _ in entries], [posted for _, posted in entries], self._version,
+        )
+
+    def _merge(self, rows: list) -> int:
+        changed = 0
+        for r in rows:
+            row, posted, is_active, mark = tuple(r[:len(JOB_COLUMNS)]), r[-3], r[-2], r[-1]
+            if is_active:
+                if self._rows.get(row[0]) != (row, posted):
+                    self._rows[row[0]] = (row, posted)
+                    changed += 1
+            elif self._rows.pop(row[0], None) is not None:
+                changed += 1
+            if mark is not None and (self._watermark is None or mark > self._watermark):
+                self._watermark = mark
+        return changed
+
+    async def load(self) -> None:
+        """Full reload of every active job."""
+        async with self._lock:
+            if self._watermark_column is None:
+                self._watermark_column = await self._detect_watermark()
+            rows = await db.fetch_all(self._select() + " WHERE is_active = true")
+            self._rows = {}
+            self._watermark = None
+            self._merge(rows)
+            await self._publish()
+            self._last_full_load = time.monotonic()
+            print(f"[JobCatalog] Loaded {len(self._rows)} active jobs "
+                  f"(v{self._version}, watermark {self._watermark_column})", file=sys.stderr)
+
+    async def refresh(self) -> None:
+        """Pull rows changed since the last watermark (or reload if due)."""
+        if self._snapshot is None or time.monotonic() - self._last_full_load > JOB_CATALOG_FULL_RELOAD_SECONDS:
+            await self.load()
+            return
+        async with self._lock:
+            if self._watermark is None:
+                rows = await db.fetch_all(self._select())
+            else:
+                # Re-read an overlap window so rows from transactions that
+                # committed after the last refresh, with an earlier timestamp,
+                # are not missed; merging is idempotent
+                since = self._watermark - timedelta(seconds=JOB_CATALOG_WATERMARK_OVERLAP_SECONDS)
+                rows = await db.fetch_all(
+                    self._select() + f" WHERE {self._watermark_column} >= %s",
+                    (since,),
+                )
+            changed = self._merge(rows)
+            self.refreshes += 1
+            if changed:
+                await self._publish()
+                print(f"[JobCatalog] {changed} job(s) changed (v{self._version})", file=sys.stderr)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_CATALOG_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving the last good snapshot
+                self.failures += 1
+                print(f"[JobCatalog] Refresh failed: {e}", file=sys.stderr)
+
+    async def start(self) -> None:
+        """Initial load plus the background refresh task."""
+        if not JOB_CATALOG_ENABLED or not db.is_configured():
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            self.failures += 1
+            print(f"[JobCatalog] Initial load failed, using Neon until next refresh: {e}", file=sys.stderr)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": JOB_CATALOG_ENABLED,
+            "loaded": snapshot is not None,
+            "version": snapshot.version if snapshot else 0,
+            "jobs": snapshot.size if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 1) if snapshot else None,
+            "watermark_column": self._watermark_column,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+catalog = JobCatalog()
+
+
+def snapshot() -> Optional[CatalogSnapshot]:
+    """Current catalog snapshot, or None when callers should query Neon."""
+    return catalog.snapshot()
@@ -0,0 +1,291 @@
+"""Neon serverless HTTP transport (the ``/sql`` endpoint).
+
+Runs queries over HTTPS instead of the Postgres wire protocol. On cold or
+short-lived workers this skips the TCP + TLS + auth handshake entirely, and a
+persistent HTTP/2 client multiplexes concurrent queries over one connection.
+
+Queries use the same ``%s`` placeholders as psycopg2 and rows come back as
+tuples (or dicts) decoded to the same Python types, so ``tools.db`` can route
+any query through either transport.
+"""
+
+import os
+import re
+import sys
+import json
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+from urllib.parse import urlparse
+
+import httpx
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+NEON_HTTP_TIMEOUT = float(os.getenv("NEON_HTTP_TIMEOUT", "10"))
+NEON_HTTP_MAX_CONNECTIONS = int(os.getenv("NEON_HTTP_MAX_CONNECTIONS", "20"))
+
+
+class NeonHTTPError(Exception):
+    """A query failed on the Neon HTTP endpoint."""
+
+    def __init__(self, message: str, status_code: int = 0, code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+# =====
+# Parameter encoding / row decoding
+# =====
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+
+def to_positional(sql: str) -> str:
+    """Convert psycopg2 ``%s`` placeholders to Postgres ``$n`` ones."""
+    counter = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal counter
+        if match.group(0) == "%%":
+            return "%"
+        counter += 1
+        return f"${counter}"
+
+    return _PLACEHOLDER.sub(replace, sql)
+
+
+def _array_literal(values: Sequence) -> str:
+    parts = []
+    for v in values:
+        if v is None:
+            parts.append("NULL")
+        elif isinstance(v, (list, tuple)):
+            parts.append(_array_literal(v))
+        else:
+            text = _encode_param(v)
+            parts.append('"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _encode_param(value: Any) -> Optional[str]:
+    """Encode a Python value as Postgres text input."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return _array_literal(value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _parse_array(text: str) -> list:
+    """Parse a one-dimensional Postgres array literal into a list of strings."""
+    if text in ("{}", ""):
+        return []
+    items: list = []
+    buf: list[str] = []
+    quoted = False
+    was_quoted = False
+    i = 1  # skip the opening brace
+    end = len(text) - 1  # and the closing one
+    while i < end:
+        ch = text[i]
+        if quoted:
+            if ch == "\\":
+                i += 1
+                buf.append(text[i])
+            elif ch == '"':
+                quoted = False
+            else:
+                buf.append(ch)
+        elif ch == '"':
+            quoted = was_quoted = True
+        elif ch == ",":
+            token = "".join(buf)
+            items.append(None if token == "NULL" and not was_quoted else token)
+            buf, was_quoted = [], False
+        else:
+            buf.append(ch)
+        i += 1
+    token = "".join(buf)
+    items.append(None if token == "NULL" and not was_quoted else token)
+    return items
+
+
+def _parse_bool(text: str) -> bool:
+    return text in ("t", "true")
+
+
+def _parse_timestamp(text: str):
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text  # infinity, BC dates - leave as text
+
+
+def _parse_date(text: str):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+# Postgres type OIDs -> text-format parsers
+_SCALAR_PARSERS = {
+    16: _parse_bool,          # bool
+    20: int, 21: int, 23: int, 26: int,  # int8, int2, int4, oid
+    700: float, 701: float,   # float4, float8
+    1700: Decimal,            # numeric
+    114: json.loads, 3802: json.loads,  # json, jsonb
+    1082: _parse_date,        # date
+    1114: _parse_timestamp,   # timestamp
+    1184: _parse_timestamp,   # timestamptz
+}
+# Array type OID -> element type OID
+_ARRAY_ELEMENTS = {
+    1000: 16, 1005: 21, 1007: 23, 1016: 20, 1021: 700, 1022: 701, 1231: 1700,
+    1009: 25, 1015: 1043, 1014: 1042, 2951: 2950, 199: 114, 3807: 3802,
+    1182: 1082, 1115: 1114, 1185: 1184,
+}
+
+
+def _decoder(type_id: int):
+    parser = _SCALAR_PARSERS.get(type_id)
+    if parser:
+        return parser
+    element = _ARRAY_ELEMENTS.get(type_id)
+    if element is not None:
+        element_parser = _SCALAR_PARSERS.get(element)
+        if element_parser:
+            return lambda text: [None if v is None else element_parser(v) for v in _parse_array(text)]
+        return _parse_array
+    return None  # text, varchar, uuid, ... stay strings
+
+
+def decode_result(result: dict, dict_rows: bool = False) -> list:
+    """Turn one raw-text, array-mode result into typed tuples or dicts."""
+    fields = result.get("fields") or []
+    decoders = [_decoder(f.get("dataTypeID", 25)) for f in fields]
+    rows = []
+    for raw in result.get("rows") or []:
+        values = tuple(
+            None if v is None else (dec(v) if dec else v)
+            for v, dec in zip(raw, decoders)
+        )
+        if dict_rows:
+            rows.append({f["name"]: v for f, v in zip(fields, values)})
+        else:
+            rows.append(values)
+    return rows
+
+
+# =====
+# Client
+# =====
+class NeonHTTPClient:
+    """Persistent client for Neon's ``/sql`` endpoint."""
+
+    def __init__(self, database_url: str = DATABASE_URL):
+        host = urlparse(database_url).hostname
+        if not host:
+            raise ValueError("DATABASE_URL has no host")
+        self.database_url = database_url
+        self.endpoint = f"https://{host}/sql"
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=NEON_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=NEON_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=NEON_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+            headers={
+                "Content-Type": "application/json",
+                "Neon-Connection-String": database_url,
+                # Rows as arrays of Postgres text values; decoded by type OID below
+                "Neon-Array-Mode": "true",
+                "Neon-Raw-Text-Output": "true",
+            },
+        )
+
+    async def _post(self, payload: dict, headers: Optional[dict] = None) -> dict:
+        response = await self._client.post(self.endpoint, json=payload, headers=headers)
+        if response.status_code != 200:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text[:200]}
+            raise NeonHTTPError(
+                body.get("message", f"HTTP {response.status_code}"),
+                status_code=response.status_code,
+                code=body.get("code"),
+            )
+        return response.json()
+
+    @staticmethod
+    def _statement(sql: str, params: Optional[Sequence]) -> dict:
+        return {
+            "query": to_positional(sql) if params else sql,
+            "params": [_encode_param(p) for p in (params or [])],
+        }
+
+    async def query(self, sql: str, params: Optional[Sequence] = None, dict_rows: bool = False) -> list:
+        """Run one statement and return its decoded rows."""
+        result = await self._post(self._statement(sql, params))
+        return decode_result(result, dict_rows)
+
+    async def execute(self, sql: str, params: Optional[Sequence] = None) -> int:
+        """Run one write statement and return the affected row count."""
+        result = await self._post(self._statement(sql, params))
+        return result.get("rowCount") or 0
+
+    async def batch(self, statements: Sequence[tuple], dict_rows: bool = False,
+                    read_only: bool = False) -> list[list]:
+        """Run several statements in one round trip, inside one transaction.
+
+        Args:
+            statements: ``(sql, params)`` pairs
+            read_only: Run the transaction READ ONLY
+
+        Returns:
+            Decoded rows for each statement, in order
+        """
+        headers = {"Neon-Batch-Read-Only": "true"} if read_only else None
+        payload = {"queries": [self._statement(sql, params) for sql, params in statements]}
+        data = await self._post(payload, headers=headers)
+        return [decode_result(r, dict_rows) for r in data.get("results", [])]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[NeonHTTPClient] = None
+
+
+def get_client() -> NeonHTTPClient:
+    """Get (or lazily create) the shared Neon HTTP client."""
+    global _client
+    if _client is None:
+        _client = NeonHTTPClient(DATABASE_URL)
+        protocol = "HTTP/2" if HTTP2_AVAILABLE else "HTTP/1.1"
+        print(f"[DB] Neon HTTP transport ready ({protocol})", file=sys.stderr)
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client (called on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,321 @@
+"""In-process snapshots of each user's profile items.
+
+Nearly every turn reads ``user_profile_items`` (get_profile_items,
+check_character_completion, assess_job_fit, show_user_profile_graph), yet a
+profile only changes when the user tells us something. The first read for a
+user loads all of their rows into a ProfileSnapshot, grouped by item type;
+later reads are dictionary lookups until the snapshot is invalidated:
+
+    snapshot = await snapshots.get(user_id, load_snapshot)
+    snapshot.count("skill"), snapshot.first("location"), snapshot.items_result()
+
+Writes through tools.user_context (save_profile_item(s), delete_profile_item)
+invalidate the user's snapshot in this process. Other workers, and the
+agent-new service, which writes the same table, find out through Postgres
+LISTEN/NOTIFY when PROFILE_SNAPSHOT_CHANNEL is set: writers send
+``pg_notify(channel, user_id)`` in the write's transaction, and every
+process's ProfileChangeListener drops that user's snapshot on commit. Without
+a channel, PROFILE_SNAPSHOT_TTL (default 5s, 300s with a channel) bounds how
+stale another worker's write can look, and startup logs a warning. A load
+that was in flight during an invalidation is returned to its callers but not
+cached.
+
+LISTEN needs a session-level connection: on Neon point
+PROFILE_SNAPSHOT_LISTEN_URL at the direct (non "-pooler") endpoint if
+DATABASE_URL goes through PgBouncer.
+"""
+
+import os
+import sys
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import psycopg2
+from psycopg2 import sql
+
+from . import db
+
+PROFILE_SNAPSHOT_ENABLED = os.getenv("PROFILE_SNAPSHOT", "on").lower() != "off"
+PROFILE_SNAPSHOT_MAX_USERS = int(os.getenv("PROFILE_SNAPSHOT_MAX_USERS", "5000"))
+# Empty disables cross-process invalidation
+PROFILE_SNAPSHOT_CHANNEL = os.getenv("PROFILE_SNAPSHOT_CHANNEL", "")
+# Without notifications the TTL is all that bounds staleness, so keep it short
+PROFILE_SNAPSHOT_TTL = float(os.getenv("PROFILE_SNAPSHOT_TTL", "300" if PROFILE_SNAPSHOT_CHANNEL else "5"))
+PROFILE_SNAPSHOT_LISTEN_URL = os.getenv("PROFILE_SNAPSHOT_LISTEN_URL", "") or db.DATABASE_URL
+_LISTEN_MAX_BACKOFF = 60.0
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    """Mark a load's error retrieved; callers re-raise it themselves (if any are left)."""
+    if not task.cancelled():
+        task.exception()
+
+
+class ProfileItem:
+    """One ``user_profile_items`` row."""
+
+    __slots__ = ("value", "metadata", "confirmed", "created_at")
+
+    def __init__(self, value: str, metadata: Optional[dict], confirmed: bool, created_at: Any):
+        self.value = value
+        self.metadata = metadata or {}
+        self.confirmed = confirmed
+        self.created_at = created_at
+
+    def as_dict(self) -> dict:
+        return {
+            "value": self.value,
+            "metadata": self.metadata,
+            "confirmed": self.confirmed,
+            "created_at": str(self.created_at),
+        }
+
+
+class ProfileSnapshot:
+    """A user's profile items grouped by type, newest first. Read-only."""
+
+    __slots__ = ("user_id", "items", "total", "loaded_at")
+
+    def __init__(self, user_id: str, rows: list):
+        """``rows`` are ``(item_type, value, metadata, confirmed, created_at)``, newest first."""
+        grouped: dict[str, list[ProfileItem]] = {}
+        for item_type, value, metadata, confirmed, created_at in rows:
+            grouped.setdefault(item_type, []).append(ProfileItem(value, metadata, confirmed, created_at))
+        self.user_id = user_id
+        self.items: dict[str, tuple[ProfileItem, ...]] = {t: tuple(v) for t, v in grouped.items()}
+        self.total = len(rows)
+        self.loaded_at = time.monotonic()
+
+    def count(self, item_type: str) -> int:
+        return len(self.items.get(item_type, ()))
+
+    def values(self, item_type: str, limit: Optional[int] = None) -> list[str]:
+        return [item.value for item in self.items.get(item_type, ())[:limit]]
+
+    def first(self, item_type: str) -> Optional[str]:
+        items = self.items.get(item_type)
+        return items[0].value if items else None
+
+    def items_result(self, item_type: Optional[str] = None) -> dict:
+        """Same shape as get_profile_items."""
+        types = [item_type] if item_type else sorted(self.items)
+        grouped = {t: [item.as_dict() for item in self.items[t]] for t in types if t in self.items}
+        return {
+            "found": True,
+            "items": grouped,
+            "total": sum(len(v) for v in grouped.values())
+        }
+
+    def summary(self) -> dict:
+        """Same shape as get_profile_summary."""
+        return {
+            "found": True,
+            "counts": {t: len(v) for t, v in self.items.items()},
+            "values": {t: self.values(t) for t in self.items},
+            "total": self.total
+        }
+
+
+class ProfileSnapshotCache:
+    """Bounded ``user_id -> ProfileSnapshot`` map with single-flight loading."""
+
+    def __init__(self, ttl: float = PROFILE_SNAPSHOT_TTL, max_users: int = PROFILE_SNAPSHOT_MAX_USERS,
+                 enabled: bool = PROFILE_SNAPSHOT_ENABLED):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.enabled = enabled
+        self._entries: OrderedDict[str, ProfileSnapshot] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def peek(self, user_id: str) -> Optional[ProfileSnapshot]:
+        """The cached snapshot, if fresh. Does not load or count."""
+        snapshot = self._entries.get(user_id)
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        return None
+
+    async def get(self, user_id: str, loader: Callable[[str], Awaitable[ProfileSnapshot]]) -> ProfileSnapshot:
+        if not self.enabled:
+            return await loader(user_id)
+
+        snapshot = self.peek(user_id)
+        if snapshot is not None:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        # Shielded: a cancelled caller must not cancel the load others await
+        return await asyncio.shield(self._inflight.get(user_id) or self._start(user_id, loader))
+
+    def _start(self, user_id: str, loader: Callable[[str], Awaitable[ProfileSnapshot]]) -> asyncio.Task:
+        generation = self._generations.get(user_id, 0)
+        task = asyncio.create_task(self._load(user_id, loader, generation))
+        task.add_done_callback(_retrieve)
+        self._inflight[user_id] = task
+        return task
+
+    async def _load(self, user_id: str, loader: Callable[[str], Awaitable[ProfileSnapshot]],
+                    generation: int) -> ProfileSnapshot:
+        try:
+            snapshot = await loader(user_id)
+        finally:
+            self._inflight.pop(user_id, None)
+            # The counter only matters while a load is in flight
+            invalidated = self._generations.pop(user_id, 0) != generation
+        if not invalidated:
+            self._entries[user_id] = snapshot
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, *user_ids: Optional[str]) -> None:
+        for user_id in user_ids:
+            if not user_id:
+                continue
+            self.invalidations += 1
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            # Only in-flight loads need the counter; keep the map small
+            if user_id not in self._inflight:
+                self._generations.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Forget every user (e.g. after notifications may have been missed)."""
+        self.invalidate(*list(self._entries), *list(self._inflight))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "users": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class ProfileChangeListener:
+    """LISTENs on PROFILE_SNAPSHOT_CHANNEL and calls ``on_change(user_id)`` per notification.
+
+    ``on_change(None)`` means "anything may have changed": it is sent on every
+    (re)connect, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, on_change: Callable[[Optional[str]], None],
+                 channel: str = PROFILE_SNAPSHOT_CHANNEL, url: str = PROFILE_SNAPSHOT_LISTEN_URL):
+        self.on_change = on_change
+        self.channel = channel
+        self.url = url
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.channel and self.url)
+
+    def notify_statements(self, user_id: str) -> list[tuple]:
+        """Statements to run in a write's transaction so other processes hear about it."""
+        if not self.channel:
+            return []
+        return [("SELECT pg_notify(%s, %s)", (self.channel, user_id))]
+
+    def _connect(self):
+        conn = psycopg2.connect(self.url, connect_timeout=db.CONNECT_TIMEOUT,
+                                keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+        return conn
+
+    async def _listen(self) -> None:
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
+        while True:
+            try:
+                conn = await loop.run_in_executor(None, self._connect)
+            except Exception as e:
+                print(f"[ProfileSnapshot] LISTEN connect failed, retrying in {backoff:.0f}s: {e}", file=sys.stderr)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _LISTEN_MAX_BACKOFF)
+                continue
+            backoff = 1.0
+
+            lost = loop.create_future()
+
+            def on_readable():
+                try:
+                    conn.poll()
+                except Exception as e:
+                    if not lost.done():
+                        lost.set_exception(e)
+                    return
+                while conn.notifies:
+                    note = conn.notifies.pop(0)
+                    self.notifications += 1
+                    self.on_change(note.payload or None)
+
+            fd = conn.fileno()
+            loop.add_reader(fd, on_readable)
+            self.connected = True
+            self.on_change(None)
+            print(f"[ProfileSnapshot] Listening on {self.channel}", file=sys.stderr)
+            try:
+                await lost
+            except Exception as e:
+                print(f"[ProfileSnapshot] LISTEN connection lost: {e}", file=sys.stderr)
+            finally:
+                self.connected = False
+                loop.remove_reader(fd)
+                conn.close()
+            self.reconnects += 1
+
+    async def start(self) -> None:
+        if not self.enabled:
+            if PROFILE_SNAPSHOT_ENABLED:
+                print("[ProfileSnapshot] WARNING: PROFILE_SNAPSHOT_CHANNEL is not set; profile writes "
+                      f"from other processes show up only after PROFILE_SNAPSHOT_TTL ({PROFILE_SNAPSHOT_TTL:g}s)",
+                      file=sys.stderr)
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "channel": self.channel or None,
+            "connected": self.connected,
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+        }
+
+
+snapshots = ProfileSnapshotCache()
+
+
+def _on_profile_change(user_id: Optional[str]) -> None:
+    if user_id is None:
+        snapshots.clear()
+    else:
+        snapshots.invalidate(user_id)
+
+
+listener = ProfileChangeListener(_on_profile_change)
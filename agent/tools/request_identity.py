@@ -0,0 +1,254 @@
+"""Find who a request is for without buffering or parsing its body.
+
+AG-UI requests carry the user in ``state.user``; CopilotKit instructions and
+Hume system prompts carry "Name: / ID: / Email:" lines in a system message.
+UserIdentityMiddleware watches the body chunks as the handler reads them and
+follows the JSON structure across them to pick out those two values (see
+UserIdentityScanner). The body is passed through untouched, so the handler
+still does the only JSON parse and there is no second copy of a long
+conversation (the AG-UI response cache buffers small first-turn bodies only,
+see tools/response_cache.py).
+
+When the last chunk has been read the middleware calls
+``on_identity(state_user, instructions)`` and stores the same pair in
+``request.state.user_identity``. ``state_user`` is the parsed ``state.user``
+object (or None); ``instructions`` the first system message that contains
+one of ``markers`` (or None), however long it is.
+"""
+
+import re
+import sys
+import json
+from typing import Callable, Iterable, Optional
+
+# state.user is a small flat profile; anything bigger is not it
+MAX_USER_OBJECT = 4096
+# Values worth keeping while scanning: keys, message roles and contents
+_CAPTURED_VALUES = (b"role", b"content")
+
+_TOKEN = re.compile(rb'[{}\[\]:,"]')
+_STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.S)
+
+
+def _closing_quote(data: bytes, pos: int) -> tuple[int, bool]:
+    """Offset of the ``"`` ending the string whose bytes start at ``pos``.
+
+    Returns ``(offset, False)``, or ``(len(data), escaped)`` when the string
+    runs past ``data`` (``escaped``: it ends on a backslash whose escaped
+    byte is in the next chunk).
+    """
+    quote = data.find(b'"', pos)
+    if quote >= 0 and data.find(b"\\", pos, quote) < 0:
+        return quote, False  # the common case: no escapes before the quote
+    end = _STRING_REST.match(data, pos).end()
+    if end < len(data) and data[end] == 0x22:
+        return end, False
+    return len(data), end < len(data)
+
+
+def _decode(raw: bytes) -> Optional[str]:
+    if b"\\" not in raw:
+        return raw.decode("utf-8", "replace")
+    try:
+        return json.loads(b'"' + raw + b'"')
+    except ValueError:
+        return None
+
+
+class _Frame:
+    """One open object or array while scanning."""
+
+    __slots__ = ("is_object", "key", "expect_key", "role", "content")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        self.key: Optional[bytes] = None
+        self.expect_key = is_object
+        self.role: Optional[str] = None
+        self.content: Optional[str] = None
+
+
+class UserIdentityScanner:
+    """Incremental scan of a JSON body for ``state.user`` and instructions.
+
+    A small tokenizer follows the body's structure across chunks, jumping
+    from bracket to bracket and over whole strings, and keeps only object
+    keys, ``role`` and ``content`` strings and the ``state.user`` object. A
+    string that runs past the end of a chunk is followed to its closing
+    quote however long it is, and ``user`` only counts directly under the
+    top-level ``state``. Scanning stops once both values are found.
+    """
+
+    def __init__(self, markers: Iterable[str] = ("Name:", "ID:", "Email:")):
+        self.markers = tuple(markers)
+        self.state_user: Optional[dict] = None
+        self.instructions: Optional[str] = None
+        self._stack: list[_Frame] = []
+        # A string split across chunks: whether we are in one, whether the
+        # last chunk ended on an escaping backslash, and its bytes if wanted
+        self._in_string = False
+        self._escaped = False
+        self._string: Optional[bytearray] = None
+        self._string_is_key = False
+        self._user: Optional[bytearray] = None  # state.user bytes so far
+        self._user_depth = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.state_user is not None and self.instructions is not None
+
+    def feed(self, chunk: bytes) -> None:
+        if self.complete or not chunk:
+            return
+        size = len(chunk)
+        pos = self._continue_string(chunk, 0) if self._in_string else 0
+        user_from = 0
+        stack = self._stack
+        while not self._in_string:
+            match = _TOKEN.search(chunk, pos)
+            if match is None:
+                pos = size
+                break
+            pos = match.end()
+            token = chunk[match.start()]
+            if token == 0x22:  # "
+                end, _ = _closing_quote(chunk, pos)
+                if end == size:  # runs past this chunk
+                    self._start_string()
+                    pos = self._continue_string(chunk, pos)
+                    break
+                is_key, wanted = self._string_target()
+                if wanted:
+                    self._end_string(chunk[pos:end], is_key)
+                pos = end + 1
+            elif token == 0x7B:  # {
+                if self._at_state_user():
+                    self._user, self._user_depth, user_from = bytearray(), 0, match.start()
+                if self._user is not None:
+                    self._user_depth += 1
+                stack.append(_Frame(True))
+            elif token == 0x7D:  # }
+                frame = stack.pop() if stack else None
+                if self._user is not None:
+                    self._user_depth -= 1
+                    if self._user_depth == 0:
+                        self._user += chunk[user_from:pos]
+                        self._finish_user()
+                if frame is not None and frame.role == "system" and frame.content is not None:
+                    self.instructions = self.instructions or frame.content
+                if self.complete:
+                    return
+            elif token == 0x5B:  # [
+                if self._user is not None:
+                    self._user_depth += 1
+                stack.append(_Frame(False))
+            elif token == 0x5D:  # ]
+                if self._user is not None:
+                    self._user_depth -= 1
+                if stack:
+                    stack.pop()
+            elif stack and stack[-1].is_object:
+                if token == 0x3A:  # :
+                    stack[-1].expect_key = False
+                else:  # ,
+                    stack[-1].expect_key, stack[-1].key = True, None
+        if self._user is not None:
+            self._user += chunk[user_from:pos]
+            if len(self._user) > MAX_USER_OBJECT:
+                self._user = None
+
+    def _at_state_user(self) -> bool:
+        stack = self._stack
+        return (self.state_user is None and self._user is None and len(stack) == 2
+                and stack[0].is_object and stack[0].key == b"state"
+                and stack[1].is_object and stack[1].key == b"user")
+
+    def _string_target(self) -> tuple[bool, bool]:
+        """(is the string starting now an object key, do we need its value)."""
+        top = self._stack[-1] if self._stack else None
+        if top is None or not top.is_object:
+            return False, False
+        if top.expect_key:
+            return True, True
+        # A user or assistant message's text is never needed
+        return False, top.key in _CAPTURED_VALUES and top.role in (None, "system")
+
+    def _start_string(self) -> None:
+        self._in_string = True
+        self._string_is_key, wanted = self._string_target()
+        self._string = bytearray() if wanted else None
+
+    def _continue_string(self, chunk: bytes, pos: int) -> int:
+        """Follow a split string through ``chunk``; returns the offset after it."""
+        start = pos
+        if self._escaped:
+            self._escaped = False
+            pos += 1
+        end, escaped = _closing_quote(chunk, pos)
+        if self._string is not None:
+            self._string += chunk[start:end]
+        if end == len(chunk):
+            self._escaped = escaped
+            return end
+        self._in_string = False
+        raw, self._string = self._string, None
+        if raw is not None:
+            self._end_string(bytes(raw), self._string_is_key)
+        return end + 1
+
+    def _end_string(self, raw: bytes, is_key: bool) -> None:
+        top = self._stack[-1]
+        if is_key:
+            top.key = raw
+            return
+        text = _decode(raw)
+        if text is None:
+            return
+        if top.key == b"role":
+            top.role = text
+        elif any(marker in text for marker in self.markers):
+            top.content = text
+
+    def _finish_user(self) -> None:
+        raw, self._user = self._user, None
+        try:
+            user = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(user, dict) and user.get("id"):
+            self.state_user = user
+
+
+class UserIdentityMiddleware:
+    """Pure-ASGI middleware that runs UserIdentityScanner over POST bodies."""
+
+    def __init__(self, app, on_identity: Callable[[Optional[dict], Optional[str]], None],
+                 markers: Iterable[str] = ("Name:", "ID:", "Email:")):
+        self.app = app
+        self.on_identity = on_identity
+        self.markers = tuple(markers)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        scanner = UserIdentityScanner(self.markers)
+        reported = False
+
+        async def scanning_receive():
+            nonlocal reported
+            message = await receive()
+            if message["type"] == "http.request" and not reported:
+                scanner.feed(message.get("body", b""))
+                if not message.get("more_body"):
+                    reported = True
+                    scope.setdefault("state", {})["user_identity"] = (scanner.state_user, scanner.instructions)
+                    if scanner.state_user is not None or scanner.instructions is not None:
+                        try:
+                            self.on_identity(scanner.state_user, scanner.instructions)
+                        except Exception as e:
+                            print(f"[Middleware] Error extracting user: {e}", file=sys.stderr)
+            return message
+
+        await self.app(scope, scanning_receive, send)
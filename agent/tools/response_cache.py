@@ -0,0 +1,294 @@
+"""Shared cache of agent answers to public questions.
+
+Many CLM and AG-UI questions are near-duplicates across users ("what coaching
+jobs are in the UK", "show me jobs in germany"). Answers are cached under
+
+    (normalized query, page/state context, job catalog version)
+
+so a change to the job catalog makes every older answer unreachable, and
+entries also expire after RESPONSE_CACHE_TTL (LRU-bounded by
+RESPONSE_CACHE_MAX_ENTRIES). Only answers whose run called PUBLIC_TOOLS and
+nothing else are stored: anything that read or wrote a user's profile,
+memory or saved jobs is personal and never shared.
+
+``AGUIResponseCache`` puts the same cache in front of the AG-UI app, storing
+the run's events and replaying them with fresh thread/run/message ids. Only
+bodies up to AGUI_CACHE_MAX_BODY are buffered to build a key; longer ones
+(later turns of a conversation) stream through untouched.
+"""
+
+import os
+import re
+import sys
+import json
+import uuid
+import hashlib
+from typing import Any, Iterable, Optional
+
+from . import job_catalog
+from .cache import TTLCache
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "on").lower() != "off"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+# Largest AG-UI body buffered to look for a cacheable first turn
+AGUI_CACHE_MAX_BODY = int(os.getenv("AGUI_CACHE_MAX_BODY", str(32 * 1024)))
+
+# Tools whose results are the same for every user
+PUBLIC_TOOLS = frozenset({
+    "search_esports_jobs",
+    "lookup_esports_company",
+    "get_categories",
+    "get_countries",
+    "get_current_page",
+})
+
+# Pure filler: words that never change what is being asked. Pronouns stay in
+# the key ("show me jobs" vs "show my jobs"), and so do short words like
+# "us" or "uk" that are country codes.
+_STOPWORDS = frozenset("""
+    a an the and or of for to in on at with about
+    please can could would will do does is are was be there any some show find
+    tell give get list what which whats hey hi hello ok okay so um uh just
+""".split())
+
+
+def normalize_query(text: str) -> str:
+    """Order-insensitive content words: 'Show me jobs in the UK!' -> 'job uk'."""
+    words = set()
+    for word in re.sub(r"[^\w\s]", "", (text or "").lower()).split():
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]  # jobs -> job, roles -> role
+        words.add(word)
+    return " ".join(sorted(words))
+
+
+def _digest(value: Any) -> str:
+    if not value:
+        return ""
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Answers keyed on normalized query + context, bounded by catalog version."""
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.enabled = enabled
+        self._entries = TTLCache("responses", ttl=ttl, max_entries=max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0  # runs not stored: personal tools, or no tools at all
+
+    def key(self, query: str, context: Any = None) -> Optional[tuple]:
+        """Cache key, or None when the query can't be cached."""
+        if not self.enabled:
+            return None
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        snapshot = job_catalog.snapshot()
+        return (normalized, _digest(context), snapshot.version if snapshot else 0)
+
+    def get(self, key: Optional[tuple]) -> Optional[Any]:
+        if key is None:
+            return None
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: Optional[tuple], value: Any, tools: Iterable[str]) -> bool:
+        """Store ``value`` if the run that produced it used public tools only.
+
+        Runs that called no tool at all aren't stored either: the answer
+        isn't backed by data and may be small talk about this user.
+        """
+        if key is None or not value:
+            return False
+        tools = set(tools)
+        if not tools or not tools <= PUBLIC_TOOLS:
+            self.skipped += 1
+            return False
+        self._entries.set(key, value)
+        self.stores += 1
+        return True
+
+    def invalidate(self) -> None:
+        self._entries.invalidate()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": self._entries.stats()["entries"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "skipped_personal": self.skipped,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
+
+
+# =====
+# AG-UI
+# =====
+_ID_FIELDS = ("messageId", "toolCallId", "parentMessageId")
+
+
+def _agui_key(body: dict, accept: str) -> Optional[tuple]:
+    """Key for the first question of an AG-UI thread, else None.
+
+    Later turns depend on the conversation so far and are not shared. The
+    key covers everything else the run sees: state (page, user, jobs), system
+    messages, context and the frontend's tools, plus the Accept header the
+    event encoding is negotiated from.
+    """
+    messages = body.get("messages") or []
+    if any(m.get("role") not in ("user", "system", "developer") for m in messages):
+        return None
+    questions = [m for m in messages if m.get("role") == "user"]
+    if len(questions) != 1 or not isinstance(questions[0].get("content"), str):
+        return None
+    context = {
+        "state": body.get("state"),
+        "instructions": [m.get("content") for m in messages if m.get("role") != "user"],
+        "context": body.get("context"),
+        "tools": sorted(t.get("name", "") for t in body.get("tools") or []),
+        "accept": accept,
+    }
+    return response_cache.key(questions[0]["content"], context)
+
+
+def _parse_events(body: bytes) -> Optional[list[dict]]:
+    events = []
+    for frame in body.decode().split("\n\n"):
+        if not frame.strip():
+            continue
+        if not frame.startswith("data: "):
+            return None
+        events.append(json.loads(frame[6:]))
+    return events
+
+
+def _replay(events: list[dict], thread_id: Optional[str], run_id: Optional[str]) -> bytes:
+    """Cached events re-addressed to this request's thread and run."""
+    fresh: dict[str, str] = {}
+    frames = []
+    for event in events:
+        event = dict(event)
+        if "threadId" in event and thread_id:
+            event["threadId"] = thread_id
+        if "runId" in event and run_id:
+            event["runId"] = run_id
+        for field in _ID_FIELDS:
+            if field in event:
+                event[field] = fresh.setdefault(event[field], str(uuid.uuid4()))
+        frames.append(f"data: {json.dumps(event, separators=(',', ':'))}\n\n")
+    return "".join(frames).encode()
+
+
+def _replaying(chunks: list[bytes], more_body: bool, receive, *pending: dict):
+    """``receive`` that first returns the body read so far (then ``pending``)."""
+    queue = [{"type": "http.request", "body": b"".join(chunks), "more_body": more_body}, *pending]
+
+    async def replay_receive():
+        if queue:
+            return queue.pop(0)
+        return await receive()
+
+    return replay_receive
+
+
+class AGUIResponseCache:
+    """ASGI wrapper that serves repeated AG-UI questions from ``response_cache``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not response_cache.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        # Only small bodies can be first turns worth caching; anything longer
+        # (a running conversation) streams straight through to the handler
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > AGUI_CACHE_MAX_BODY:
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                await self.app(scope, _replaying(chunks, True, receive, message), send)
+                return
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if not message.get("more_body"):
+                break
+            if size > AGUI_CACHE_MAX_BODY:
+                await self.app(scope, _replaying(chunks, True, receive), send)
+                return
+        raw = b"".join(chunks)
+
+        try:
+            body = json.loads(raw)
+            accept = dict(scope["headers"]).get(b"accept", b"").decode("latin-1")
+            key = _agui_key(body, accept)
+        except (ValueError, AttributeError, TypeError):
+            body, key = {}, None
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            headers, events = cached
+            print(f"[ResponseCache] AG-UI hit: {key[0]!r}", file=sys.stderr)
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body",
+                        "body": _replay(events, body.get("threadId"), body.get("runId"))})
+            return
+
+        replay_receive = _replaying([raw], False, receive)
+
+        if key is None:
+            await self.app(scope, replay_receive, send)
+            return
+
+        status = 0
+        headers: list = []
+        sent: list[bytes] = []
+
+        async def tee_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"content-length"]
+            elif message["type"] == "http.response.body":
+                sent.append(message.get("body", b""))
+                if not message.get("more_body") and status == 200:
+                    self._store(key, headers, b"".join(sent))
+            await send(message)
+
+        await self.app(scope, replay_receive, tee_send)
+
+    @staticmethod
+    def _store(key: tuple, headers: list, body: bytes) -> None:
+        try:
+            events = _parse_events(body)
+        except ValueError:
+            return
+        if not events or events[-1].get("type") != "RUN_FINISHED":
+            return  # errored or incomplete run
+        tools = [e.get("toolCallName", "") for e in events if e.get("type") == "TOOL_CALL_START"]
+        response_cache.put(key, (headers, events), tools)
@@ -0,0 +1,94 @@
+"""Memoization of read-only lookups within one agent run.
+
+A single turn often calls several tools that read the same rows
+(check_character_completion, get_user_skills_and_preferences and
+show_user_profile_graph all load the user's profile items). Each run's state
+carries a RunMemo, so the first read queries Neon and the rest reuse it:
+
+    items = await memo.load(("profile_items", user_id), lambda: get_profile_items(user_id),
+                            tags=("profile",))
+
+Entries are tagged with what they depend on; write tools drop the tags they
+change (``@invalidates("profile")``), so a read after a save in the same run
+sees the new data. Nothing outlives the run: a new run gets a new state and
+with it an empty memo.
+"""
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    """Mark a load's error retrieved; callers re-raise it themselves (if any are left)."""
+    if not task.cancelled():
+        task.exception()
+
+
+class RunMemo:
+    """Single-flight ``key -> result`` memo with tag-based invalidation.
+
+    Each load runs in its own task, so a tool call that is cancelled stops
+    waiting without cancelling the load other calls share.
+    """
+
+    def __init__(self):
+        self._entries: dict[Hashable, tuple[asyncio.Task, frozenset]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                   tags: Iterable[str] = ()) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return await asyncio.shield(entry[0])
+
+        self.misses += 1
+        task = asyncio.create_task(self._load(key, loader))
+        task.add_done_callback(_retrieve)
+        self._entries[key] = (task, frozenset(tags))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+        except BaseException:
+            self._drop(key, task)
+            raise
+        # Don't hold on to failed lookups; the next call should retry
+        if isinstance(value, dict) and value.get("error"):
+            self._drop(key, task)
+        return value
+
+    def _drop(self, key: Hashable, task: asyncio.Task) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is task:
+            del self._entries[key]
+
+    def invalidate(self, *tags: str) -> None:
+        """Forget entries carrying any of ``tags`` (everything if none given)."""
+        if not tags:
+            self._entries.clear()
+            return
+        wanted = set(tags)
+        for key in [k for k, (_, t) in self._entries.items() if t & wanted]:
+            del self._entries[key]
+
+
+def invalidates(*tags: str):
+    """Decorator for write tools: drop ``tags`` from the run's memo after the write.
+
+    The tool's first argument must be the RunContext; its state needs a
+    ``memo`` (see AppState).
+    """
+    def decorator(tool):
+        @functools.wraps(tool)
+        async def wrapper(ctx, *args, **kwargs):
+            try:
+                return await tool(ctx, *args, **kwargs)
+            finally:
+                ctx.deps.state.memo.invalidate(*tags)
+        return wrapper
+    return decorator
@@ -0,0 +1,151 @@
+"""OpenAI-compatible SSE encoding for the CLM endpoint.
+
+    encoder = SSEEncoder(msg_id, model="esports-agent")
+    async for frame in encoder.encode(deltas):
+        ...  # bytes, ready to write
+
+Each chunk frame is built from a prefix/suffix precomputed once per response;
+only the delta text is JSON-escaped per frame (orjson when installed). Deltas
+that arrive close together are coalesced into one frame, bounded by
+SSE_COALESCE_BYTES of escaped text and SSE_COALESCE_MS of delay, so a fast
+model doesn't cost one write per token. The first delta is always sent on its
+own, immediately. The stream ends with a ``finish_reason: "stop"`` chunk and
+``data: [DONE]``.
+"""
+
+import os
+import json
+import time
+import asyncio
+from typing import AsyncIterator, Optional
+
+# Faster JSON is optional (pip install orjson)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "512"))
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", "20"))
+
+DONE_FRAME = b"data: [DONE]\n\n"
+
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def escape(text: str) -> bytes:
+    """``text`` as the inside of a JSON string (no surrounding quotes).
+
+    Escaped pieces concatenate to the escape of the concatenated text, which
+    is what lets the encoder buffer already-escaped deltas.
+    """
+    return dumps(text)[1:-1]
+
+
+class SSEEncoder:
+    """Frames text deltas as ``chat.completion.chunk`` events for one response."""
+
+    __slots__ = ("_prefix", "_first_prefix", "_suffix", "_finish", "_started",
+                 "max_bytes", "max_delay")
+
+    def __init__(self, msg_id: str, model: str, created: Optional[int] = None,
+                 first_role: Optional[str] = None,
+                 max_bytes: int = SSE_COALESCE_BYTES, max_delay_ms: float = SSE_COALESCE_MS):
+        head = (b'data: {"id":' + dumps(msg_id)
+                + b',"object":"chat.completion.chunk","created":'
+                + str(int(time.time()) if created is None else created).encode()
+                + b',"model":' + dumps(model)
+                + b',"choices":[{"index":0,"delta":{"content":"')
+        self._prefix = head
+        self._suffix = b'"},"finish_reason":null}]}\n\n'
+        # The first chunk can carry the role (OpenAI sends it once, up front)
+        self._first_prefix = head
+        self._started = False
+        if first_role:
+            self._first_prefix = head[:-len(b'"content":"')] + b'"role":' + dumps(first_role) + b',"content":"'
+        self._finish = (b'data: {"id":' + dumps(msg_id)
+                        + b',"object":"chat.completion.chunk",'
+                        + b'"choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}\n\n'
+                        + DONE_FRAME)
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay_ms / 1000
+
+    def frame(self, escaped: bytes) -> bytes:
+        """One chunk event for already-escaped delta text."""
+        prefix = self._prefix if self._started else self._first_prefix
+        self._started = True
+        return prefix + escaped + self._suffix
+
+    def chunk(self, text: str) -> bytes:
+        return self.frame(escape(text))
+
+    def finish(self) -> bytes:
+        """The ``finish_reason: "stop"`` chunk followed by ``[DONE]``."""
+        return self._finish
+
+    async def encode(self, deltas: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        """Frames for a stream of text deltas, coalesced within the budgets."""
+        if self.max_delay <= 0 or self.max_bytes <= 0:
+            async for text in deltas:
+                if text:
+                    yield self.chunk(text)
+            yield self._finish
+            return
+
+        # A separate task drains ``deltas`` so a slow producer (e.g. a tool
+        # call mid-reply) never holds buffered text past the delay budget.
+        queue: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        async def pump():
+            try:
+                async for text in deltas:
+                    if text:
+                        queue.put_nowait(text)
+            finally:
+                queue.put_nowait(end)
+
+        producer = asyncio.create_task(pump())
+        loop = asyncio.get_running_loop()
+        buffered: list[bytes] = []
+        size = 0
+        deadline = 0.0
+        try:
+            while True:
+                if buffered:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                    except asyncio.TimeoutError:
+                        yield self.frame(b"".join(buffered))
+                        buffered.clear()
+                        size = 0
+                        continue
+                else:
+                    item = await queue.get()
+                if item is end:
+                    break
+                escaped = escape(item)
+                if not self._started:
+                    yield self.frame(escaped)  # first token goes out right away
+                    continue
+                if not buffered:
+                    deadline = loop.time() + self.max_delay
+                buffered.append(escaped)
+                size += len(escaped)
+                if size >= self.max_bytes:
+                    yield self.frame(b"".join(buffered))
+                    buffered.clear()
+                    size = 0
+            if buffered:
+                yield self.frame(b"".join(buffered))
+            await producer  # surface producer errors
+            yield self._finish
+        finally:
+            if not producer.done():
+                producer.cancel()
@@ -5,63 +5,121 @@ Provides tools for:
 - User profile (skills, experience, preferences) from Neon
 - Job interests tracking from Neon
 - Conversation memory from Zep
+
+Database helpers are coroutines backed by the shared pool in ``tools.db``.
+Profile item reads are served from per-user snapshots kept in process
+(``tools.profile_snapshot``); the write helpers here invalidate them.
+The Zep helpers are coroutines on one process-wide async client (created at
+startup, closed on shutdown). They retry transient failures within a hard
+deadline and return a degraded result rather than stall a conversation.
 """
 
 import os
 import sys
 import json
+import random
+import asyncio
+from datetime import datetime
 from typing import Optional, List
-import psycopg2
-from psycopg2.extras import RealDictCursor
+
+from . import db
+from .profile_snapshot import ProfileSnapshot, snapshots, listener
 
 # Zep Cloud client
 try:
-    from zep_cloud.client import Zep
+    import httpx
+    from zep_cloud.client import AsyncZep
+    from zep_cloud.core.api_error import ApiError as ZepApiError
     ZEP_AVAILABLE = True
 except ImportError:
     ZEP_AVAILABLE = False
     print("[UserContext] Zep not available", file=sys.stderr)
 
+ZEP_TIMEOUT = float(os.getenv("ZEP_TIMEOUT", "5"))
+ZEP_CONNECT_TIMEOUT = float(os.getenv("ZEP_CONNECT_TIMEOUT", "3"))
+ZEP_MAX_RETRIES = int(os.getenv("ZEP_MAX_RETRIES", "2"))
+ZEP_RETRY_BACKOFF = float(os.getenv("ZEP_RETRY_BACKOFF", "0.2"))  # seconds, doubles per attempt
+# Hard ceiling on a whole memory operation, retries included. Reads feed a
+# live reply, so they give up sooner than writes.
+ZEP_READ_DEADLINE = float(os.getenv("ZEP_READ_DEADLINE", "2.5"))
+ZEP_WRITE_DEADLINE = float(os.getenv("ZEP_WRITE_DEADLINE", "5"))
 
-def get_db_connection():
-    """Get database connection from environment."""
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
-        return None
-    return psycopg2.connect(db_url)
+_zep_client: Optional["AsyncZep"] = None
+_zep_http: Optional["httpx.AsyncClient"] = None
 
 
-def get_zep_client() -> Optional["Zep"]:
-    """Get Zep client if available."""
+def init_zep_client() -> Optional["AsyncZep"]:
+    """Create the process-wide Zep client (called at startup, safe to repeat)."""
+    global _zep_client, _zep_http
     if not ZEP_AVAILABLE:
         return None
     api_key = os.getenv("ZEP_API_KEY")
     if not api_key:
         return None
-    return Zep(api_key=api_key)
+    if _zep_client is None:
+        # One pooled HTTP client so the TLS session and connections are reused
+        _zep_http = httpx.AsyncClient(
+            timeout=httpx.Timeout(ZEP_TIMEOUT, connect=ZEP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        _zep_client = AsyncZep(api_key=api_key, timeout=ZEP_TIMEOUT, httpx_client=_zep_http)
+        print("[UserContext] Zep client ready", file=sys.stderr)
+    return _zep_client
+
+
+def get_zep_client() -> Optional["AsyncZep"]:
+    """Get the shared Zep client if available."""
+    if _zep_client is not None:
+        return _zep_client
+    return init_zep_client()
+
+
+async def close_zep_client() -> None:
+    """Close the shared Zep client's connections (called on shutdown)."""
+    global _zep_client, _zep_http
+    http, _zep_client, _zep_http = _zep_http, None, None
+    if http is not None:
+        await http.aclose()
+
+
+def _is_transient(error: Exception) -> bool:
+    """Errors worth retrying: timeouts, dropped connections, 429 and 5xx."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, ZepApiError):
+        return error.status_code is not None and (error.status_code == 429 or error.status_code >= 500)
+    return False
+
+
+async def _zep_call(fn, *args, **kwargs):
+    """Await a Zep API call, retrying transient failures with jittered exponential backoff."""
+    for attempt in range(ZEP_MAX_RETRIES + 1):
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= ZEP_MAX_RETRIES or not _is_transient(e):
+                raise
+            delay = ZEP_RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+            print(f"[UserContext] Zep call failed ({e}), retrying in {delay:.2f}s", file=sys.stderr)
+            await asyncio.sleep(delay)
 
 
 # =====
 # Neon DB Tools
 # =====
 
-def get_user_profile(user_id: str) -> dict:
+async def get_user_profile(user_id: str) -> dict:
     """Get user profile from Neon database."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"found": False, "error": "Database not configured"}
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT id, email, name, skills, experience_years,
-                       preferred_categories, preferred_locations, bio
-                FROM user_profiles
-                WHERE id = %s
-            """, (user_id,))
-            row = cur.fetchone()
-
-        conn.close()
+        row = await db.fetch_one("""
+            SELECT id, email, name, skills, experience_years,
+                   preferred_categories, preferred_locations, bio
+            FROM user_profiles
+            WHERE id = %s
+        """, (user_id,), dict_rows=True)
 
         if row:
             return {
@@ -74,35 +132,30 @@ def get_user_profile(user_id: str) -> dict:
         return {"found": False, "error": str(e)}
 
 
-def save_user_profile(user_id: str, email: str = None, name: str = None,
-                     skills: List[str] = None, experience_years: int = None,
-                     preferred_categories: List[str] = None,
-                     preferred_locations: List[str] = None, bio: str = None) -> dict:
+async def save_user_profile(user_id: str, email: str = None, name: str = None,
+                            skills: List[str] = None, experience_years: int = None,
+                            preferred_categories: List[str] = None,
+                            preferred_locations: List[str] = None, bio: str = None) -> dict:
     """Create or update user profile in Neon database."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"success": False, "error": "Database not configured"}
 
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO user_profiles (id, email, name, skills, experience_years,
-                                          preferred_categories, preferred_locations, bio, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (id) DO UPDATE SET
-                    email = COALESCE(EXCLUDED.email, user_profiles.email),
-                    name = COALESCE(EXCLUDED.name, user_profiles.name),
-                    skills = COALESCE(EXCLUDED.skills, user_profiles.skills),
-                    experience_years = COALESCE(EXCLUDED.experience_years, user_profiles.experience_years),
-                    preferred_categories = COALESCE(EXCLUDED.preferred_categories, user_profiles.preferred_categories),
-                    preferred_locations = COALESCE(EXCLUDED.preferred_locations, user_profiles.preferred_locations),
-                    bio = COALESCE(EXCLUDED.bio, user_profiles.bio),
-                    updated_at = NOW()
-            """, (user_id, email, name, skills, experience_years,
-                  preferred_categories, preferred_locations, bio))
-
-        conn.commit()
-        conn.close()
+        await db.execute("""
+            INSERT INTO user_profiles (id, email, name, skills, experience_years,
+                                      preferred_categories, preferred_locations, bio, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+            ON CONFLICT (id) DO UPDATE SET
+                email = COALESCE(EXCLUDED.email, user_profiles.email),
+                name = COALESCE(EXCLUDED.name, user_profiles.name),
+                skills = COALESCE(EXCLUDED.skills, user_profiles.skills),
+                experience_years = COALESCE(EXCLUDED.experience_years, user_profiles.experience_years),
+                preferred_categories = COALESCE(EXCLUDED.preferred_categories, user_profiles.preferred_categories),
+                preferred_locations = COALESCE(EXCLUDED.preferred_locations, user_profiles.preferred_locations),
+                bio = COALESCE(EXCLUDED.bio, user_profiles.bio),
+                updated_at = NOW()
+        """, (user_id, email, name, skills, experience_years,
+              preferred_categories, preferred_locations, bio))
 
         return {"success": True, "message": "Profile saved"}
     except Exception as e:
@@ -110,26 +163,21 @@ def save_user_profile(user_id: str, email: str = None, name: str = None,
         return {"success": False, "error": str(e)}
 
 
-def get_user_job_interests(user_id: str, limit: int = 10) -> dict:
+async def get_user_job_interests(user_id: str, limit: int = 10) -> dict:
     """Get jobs the user has shown interest in."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"found": False, "error": "Database not configured"}
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT ji.job_id, ji.interest_type, ji.created_at,
-                       j.title, j.company, j.location, j.category
-                FROM user_job_interests ji
-                JOIN jobs j ON j.id = ji.job_id
-                WHERE ji.user_id = %s
-                ORDER BY ji.created_at DESC
-                LIMIT %s
-            """, (user_id, limit))
-            rows = cur.fetchall()
-
-        conn.close()
+        rows = await db.fetch_all("""
+            SELECT ji.job_id, ji.interest_type, ji.created_at,
+                   j.title, j.company, j.location, j.category
+            FROM user_job_interests ji
+            JOIN jobs j ON j.id = ji.job_id
+            WHERE ji.user_id = %s
+            ORDER BY ji.created_at DESC
+            LIMIT %s
+        """, (user_id, limit), dict_rows=True)
 
         return {
             "found": True,
@@ -141,24 +189,19 @@ def get_user_job_interests(user_id: str, limit: int = 10) -> dict:
         return {"found": False, "error": str(e)}
 
 
-def save_job_interest(user_id: str, job_id: str, interest_type: str = "viewed") -> dict:
+async def save_job_interest(user_id: str, job_id: str, interest_type: str = "viewed") -> dict:
     """Save user's interest in a job."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"success": False, "error": "Database not configured"}
 
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO user_job_interests (user_id, job_id, interest_type)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (user_id, job_id) DO UPDATE SET
-                    interest_type = EXCLUDED.interest_type,
-                    created_at = NOW()
-            """, (user_id, job_id, interest_type))
-
-        conn.commit()
-        conn.close()
+        await db.execute("""
+            INSERT INTO user_job_interests (user_id, job_id, interest_type)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (user_id, job_id) DO UPDATE SET
+                interest_type = EXCLUDED.interest_type,
+                created_at = NOW()
+        """, (user_id, job_id, interest_type))
 
         return {"success": True, "message": f"Saved {interest_type} interest"}
     except Exception as e:
@@ -170,15 +213,22 @@ def save_job_interest(user_id: str, job_id: str, interest_type: str = "viewed")
 # Zep Memory Tools
 # =====
 
-def get_conversation_memory(user_id: str, limit: int = 5) -> dict:
-    """Get recent conversation history from Zep."""
+async def get_conversation_memory(user_id: str, limit: int = 5) -> dict:
+    """Get recent conversation history from Zep.
+
+    Gives up after ZEP_READ_DEADLINE seconds and returns a degraded result
+    (``{"found": False, "degraded": True}``) so callers carry on without it.
+    """
     try:
         client = get_zep_client()
         if not client:
             return {"found": False, "error": "Zep not configured"}
 
         # Get memory for user
-        memory = client.memory.get(session_id=f"esports_{user_id}")
+        memory = await asyncio.wait_for(
+            _zep_call(client.memory.get, session_id=f"esports_{user_id}"),
+            timeout=ZEP_READ_DEADLINE,
+        )
 
         if memory and memory.messages:
             messages = []
@@ -196,13 +246,16 @@ def get_conversation_memory(user_id: str, limit: int = 5) -> dict:
             }
 
         return {"found": False, "message": "No conversation history"}
+    except asyncio.TimeoutError:
+        print(f"[UserContext] Zep memory timed out after {ZEP_READ_DEADLINE}s", file=sys.stderr)
+        return {"found": False, "degraded": True, "error": "Memory service timed out"}
     except Exception as e:
         print(f"[UserContext] Zep error: {e}", file=sys.stderr)
         return {"found": False, "error": str(e)}
 
 
-def save_conversation_to_zep(user_id: str, role: str, content: str) -> dict:
-    """Save a message to Zep conversation memory."""
+async def save_conversation_to_zep(user_id: str, role: str, content: str) -> dict:
+    """Save a message to Zep conversation memory (bounded by ZEP_WRITE_DEADLINE)."""
     try:
         client = get_zep_client()
         if not client:
@@ -210,28 +263,39 @@ def save_conversation_to_zep(user_id: str, role: str, content: str) -> dict:
 
         from zep_cloud.types import Message
 
-        client.memory.add(
-            session_id=f"esports_{user_id}",
-            messages=[Message(role=role, content=content)]
+        await asyncio.wait_for(
+            _zep_call(
+                client.memory.add,
+                session_id=f"esports_{user_id}",
+                messages=[Message(role=role, content=content)]
+            ),
+            timeout=ZEP_WRITE_DEADLINE,
         )
 
         return {"success": True}
+    except asyncio.TimeoutError:
+        print(f"[UserContext] Zep save timed out after {ZEP_WRITE_DEADLINE}s", file=sys.stderr)
+        return {"success": False, "degraded": True, "error": "Memory service timed out"}
     except Exception as e:
         print(f"[UserContext] Zep error saving: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
 
 
-def search_user_memories(user_id: str, query: str, limit: int = 3) -> dict:
-    """Search user's conversation history in Zep."""
+async def search_user_memories(user_id: str, query: str, limit: int = 3) -> dict:
+    """Search user's conversation history in Zep (bounded by ZEP_READ_DEADLINE)."""
     try:
         client = get_zep_client()
         if not client:
             return {"found": False, "error": "Zep not configured"}
 
-        results = client.memory.search(
-            session_id=f"esports_{user_id}",
-            text=query,
-            limit=limit
+        results = await asyncio.wait_for(
+            _zep_call(
+                client.memory.search,
+                session_id=f"esports_{user_id}",
+                text=query,
+                limit=limit
+            ),
+            timeout=ZEP_READ_DEADLINE,
         )
 
         if results:
@@ -241,6 +305,9 @@ def search_user_memories(user_id: str, query: str, limit: int = 3) -> dict:
             }
 
         return {"found": False, "message": "No relevant memories found"}
+    except asyncio.TimeoutError:
+        print(f"[UserContext] Zep search timed out after {ZEP_READ_DEADLINE}s", file=sys.stderr)
+        return {"found": False, "degraded": True, "error": "Memory service timed out"}
     except Exception as e:
         print(f"[UserContext] Zep search error: {e}", file=sys.stderr)
         return {"found": False, "error": str(e)}
@@ -250,15 +317,15 @@ def search_user_memories(user_id: str, query: str, limit: int = 3) -> dict:
 # Profile Items (Skills, Role, Location, etc.)
 # =====
 
-def ensure_profile_items_table():
+async def ensure_profile_items_table():
     """Create user_profile_items table if it doesn't exist."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return False
 
-        with conn.cursor() as cur:
-            cur.execute("""
+        # One statement per entry: Neon's HTTP endpoint rejects multi-statement queries
+        await db.execute_batch([
+            ("""
                 CREATE TABLE IF NOT EXISTS user_profile_items (
                     id SERIAL PRIMARY KEY,
                     user_id TEXT NOT NULL,
@@ -269,12 +336,11 @@ def ensure_profile_items_table():
                     created_at TIMESTAMPTZ DEFAULT NOW(),
                     updated_at TIMESTAMPTZ DEFAULT NOW(),
                     UNIQUE(user_id, item_type, value)
-                );
-                CREATE INDEX IF NOT EXISTS idx_profile_items_user ON user_profile_items(user_id);
-                CREATE INDEX IF NOT EXISTS idx_profile_items_type ON user_profile_items(item_type);
-            """)
-        conn.commit()
-        conn.close()
+                )
+            """, None),
+            ("CREATE INDEX IF NOT EXISTS idx_profile_items_user ON user_profile_items(user_id)", None),
+            ("CREATE INDEX IF NOT EXISTS idx_profile_items_type ON user_profile_items(item_type)", None),
+        ])
         print("[UserContext] Profile items table ready", file=sys.stderr)
         return True
     except Exception as e:
@@ -282,137 +348,218 @@ def ensure_profile_items_table():
         return False
 
 
-def get_profile_items(user_id: str, item_type: str = None) -> dict:
+async def _load_profile_snapshot(user_id: str) -> ProfileSnapshot:
+    rows = await db.fetch_all("""
+        SELECT item_type, value, metadata, confirmed, created_at
+        FROM user_profile_items
+        WHERE user_id = %s
+        ORDER BY item_type, created_at DESC
+    """, (user_id,))
+    return ProfileSnapshot(user_id, rows)
+
+
+async def get_profile_snapshot(user_id: str) -> ProfileSnapshot:
+    """The user's cached ProfileSnapshot, loaded on first use (see tools/profile_snapshot.py)."""
+    return await snapshots.get(user_id, _load_profile_snapshot)
+
+
+async def _write_profile_items(user_id: str, sql: str, params: tuple) -> list:
+    """Run a user_profile_items write, announce it, and drop the user's snapshot."""
+    try:
+        results = await db.execute_batch([(sql, params), *listener.notify_statements(user_id)])
+    finally:
+        snapshots.invalidate(user_id)
+    return results[0]
+
+
+async def get_profile_items(user_id: str, item_type: str = None) -> dict:
     """Get user profile items, optionally filtered by type."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"found": False, "error": "Database not configured"}
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            if item_type:
-                cur.execute("""
-                    SELECT item_type, value, metadata, confirmed, created_at
-                    FROM user_profile_items
-                    WHERE user_id = %s AND item_type = %s
-                    ORDER BY created_at DESC
-                """, (user_id, item_type))
-            else:
-                cur.execute("""
-                    SELECT item_type, value, metadata, confirmed, created_at
-                    FROM user_profile_items
-                    WHERE user_id = %s
-                    ORDER BY item_type, created_at DESC
-                """, (user_id,))
-            rows = cur.fetchall()
-
-        conn.close()
-
-        # Group by type
-        items_by_type = {}
-        for row in rows:
-            t = row['item_type']
-            if t not in items_by_type:
-                items_by_type[t] = []
-            items_by_type[t].append({
-                'value': row['value'],
-                'metadata': row['metadata'] or {},
-                'confirmed': row['confirmed'],
-                'created_at': str(row['created_at'])
-            })
-
-        return {
-            "found": True,
-            "items": items_by_type,
-            "total": len(rows)
-        }
+        snapshot = await get_profile_snapshot(user_id)
+        return snapshot.items_result(item_type)
     except Exception as e:
         print(f"[UserContext] Error getting profile items: {e}", file=sys.stderr)
         return {"found": False, "error": str(e)}
 
 
-def save_profile_item(user_id: str, item_type: str, value: str,
-                     metadata: dict = None, confirmed: bool = False,
-                     replace_existing: bool = False) -> dict:
+# Types that hold one value per user: saving one replaces the previous value
+SINGLE_VALUE_TYPES = frozenset({'location', 'role', 'salary_min', 'salary_max', 'experience_years'})
+
+# Every item of a batch in one statement. Items apply in order, as if saved
+# one by one: a replacing item drops the user's other rows of its type,
+# including earlier items of that type in the same batch; a repeated
+# (type, value) keeps its last metadata. Kept values are upserted in place.
+_SAVE_PROFILE_ITEMS_SQL = """
+    WITH input AS (
+        SELECT * FROM unnest(%s::text[], %s::text[], %s::jsonb[], %s::boolean[], %s::boolean[])
+            WITH ORDINALITY AS t(item_type, value, metadata, confirmed, replace, ord)
+    ),
+    cutoff AS (
+        SELECT item_type, max(ord) AS ord FROM input WHERE replace GROUP BY item_type
+    ),
+    kept AS (
+        SELECT DISTINCT ON (i.item_type, i.value) i.*
+        FROM input i LEFT JOIN cutoff c USING (item_type)
+        WHERE c.ord IS NULL OR i.ord >= c.ord
+        ORDER BY i.item_type, i.value, i.ord DESC
+    ),
+    removed AS (
+        DELETE FROM user_profile_items p
+        USING cutoff c
+        WHERE p.user_id = %s AND p.item_type = c.item_type
+          AND NOT EXISTS (SELECT 1 FROM kept k WHERE k.item_type = p.item_type AND k.value = p.value)
+        RETURNING 1
+    ),
+    saved AS (
+        INSERT INTO user_profile_items (user_id, item_type, value, metadata, confirmed, updated_at)
+        SELECT %s, item_type, value, metadata, confirmed, NOW() FROM kept
+        ON CONFLICT (user_id, item_type, value) DO UPDATE SET
+            metadata = COALESCE(EXCLUDED.metadata, user_profile_items.metadata),
+            confirmed = EXCLUDED.confirmed,
+            updated_at = NOW()
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM saved), (SELECT count(*) FROM removed)
+"""
+
+
+async def save_profile_items(user_id: str, items: List[dict]) -> dict:
     """
-    Save a profile item.
+    Save several profile items in one statement (and one transaction).
 
     Args:
         user_id: User ID
-        item_type: 'skill', 'location', 'role', 'salary_min', 'salary_max', 'experience_years'
-        value: The value to save
-        metadata: Optional metadata (e.g., {proficiency: 'expert'})
-        confirmed: Whether user confirmed this (HITL)
-        replace_existing: If True, delete existing items of this type first (for single-value fields)
+        items: Dicts with ``item_type`` and ``value``, plus optional ``metadata``,
+            ``confirmed`` and ``replace_existing`` (see save_profile_item)
     """
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"success": False, "error": "Database not configured"}
+        if not items:
+            return {"success": True, "saved": 0, "removed": 0, "items": []}
 
-        # Single-value fields should replace existing
-        single_value_types = ['location', 'role', 'salary_min', 'salary_max', 'experience_years']
-        should_replace = replace_existing or item_type in single_value_types
-
-        with conn.cursor() as cur:
-            # Delete existing if this is a single-value field
-            if should_replace:
-                cur.execute("""
-                    DELETE FROM user_profile_items
-                    WHERE user_id = %s AND item_type = %s
-                """, (user_id, item_type))
-
-            # Insert new item
-            cur.execute("""
-                INSERT INTO user_profile_items (user_id, item_type, value, metadata, confirmed, updated_at)
-                VALUES (%s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (user_id, item_type, value) DO UPDATE SET
-                    metadata = COALESCE(EXCLUDED.metadata, user_profile_items.metadata),
-                    confirmed = EXCLUDED.confirmed,
-                    updated_at = NOW()
-            """, (user_id, item_type, value, json.dumps(metadata or {}), confirmed))
-
-        conn.commit()
-        conn.close()
+        columns = ([], [], [], [], [])
+        for item in items:
+            item_type = item["item_type"]
+            columns[0].append(item_type)
+            columns[1].append(item["value"])
+            columns[2].append(json.dumps(item.get("metadata") or {}))
+            columns[3].append(bool(item.get("confirmed", False)))
+            columns[4].append(bool(item.get("replace_existing")) or item_type in SINGLE_VALUE_TYPES)
+
+        rows = await _write_profile_items(user_id, _SAVE_PROFILE_ITEMS_SQL, (*columns, user_id, user_id))
+        saved, removed = rows[0]
 
         return {
             "success": True,
-            "type": item_type,
-            "value": value,
-            "confirmed": confirmed,
-            "replaced": should_replace
+            "saved": saved,
+            "removed": removed,
+            "items": [
+                {"type": t, "value": v, "confirmed": c, "replaced": r}
+                for t, v, _, c, r in zip(*columns)
+            ]
         }
     except Exception as e:
-        print(f"[UserContext] Error saving profile item: {e}", file=sys.stderr)
+        print(f"[UserContext] Error saving profile items: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
 
 
-def delete_profile_item(user_id: str, item_type: str, value: str) -> dict:
+async def save_profile_item(user_id: str, item_type: str, value: str,
+                            metadata: dict = None, confirmed: bool = False,
+                            replace_existing: bool = False) -> dict:
+    """
+    Save a profile item.
+
+    Args:
+        user_id: User ID
+        item_type: 'skill', 'location', 'role', 'salary_min', 'salary_max', 'experience_years'
+        value: The value to save
+        metadata: Optional metadata (e.g., {proficiency: 'expert'})
+        confirmed: Whether user confirmed this (HITL)
+        replace_existing: If True, delete existing items of this type first (for single-value fields)
+    """
+    result = await save_profile_items(user_id, [{
+        "item_type": item_type,
+        "value": value,
+        "metadata": metadata,
+        "confirmed": confirmed,
+        "replace_existing": replace_existing,
+    }])
+    if not result.get("success"):
+        return result
+    return {"success": True, **result["items"][0]}
+
+
+async def delete_profile_item(user_id: str, item_type: str, value: str) -> dict:
     """Delete a profile item."""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not db.is_configured():
             return {"success": False, "error": "Database not configured"}
 
-        with conn.cursor() as cur:
-            cur.execute("""
-                DELETE FROM user_profile_items
-                WHERE user_id = %s AND item_type = %s AND value = %s
-            """, (user_id, item_type, value))
-            deleted = cur.rowcount
+        deleted = await _write_profile_items(user_id, """
+            DELETE FROM user_profile_items
+            WHERE user_id = %s AND item_type = %s AND value = %s
+            RETURNING 1
+        """, (user_id, item_type, value))
 
-        conn.commit()
-        conn.close()
-
-        return {"success": True, "deleted": deleted > 0}
+        return {"success": True, "deleted": len(deleted) > 0}
     except Exception as e:
         print(f"[UserContext] Error deleting profile item: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
 
 
-def get_profile_completeness(user_id: str) -> dict:
-    """Check how complete the user's profile is."""
-    items = get_profile_items(user_id)
+# Per-type counts and values (newest first) in one aggregated row; the item
+# rows themselves (metadata, timestamps) never leave the database
+_PROFILE_SUMMARY_SQL = """
+    SELECT COALESCE(json_object_agg(item_type, json_build_object('count', n, 'values', vals)), '{}'::json)
+    FROM (
+        SELECT item_type, count(*) AS n,
+               array_agg(value ORDER BY created_at DESC, id DESC) AS vals
+        FROM user_profile_items
+        WHERE user_id = %s
+        GROUP BY item_type
+    ) t
+"""
+
+
+async def get_profile_summary(user_id: str) -> dict:
+    """Count and values (newest first) of each profile item type.
+
+    Served from the user's snapshot when one is already in memory;
+    otherwise aggregated in SQL so the items themselves aren't fetched.
+    """
+    try:
+        if not db.is_configured():
+            return {"found": False, "error": "Database not configured"}
+
+        snapshot = snapshots.peek(user_id)
+        if snapshot is not None:
+            return snapshot.summary()
+
+        row = await db.fetch_one(_PROFILE_SUMMARY_SQL, (user_id,))
+        by_type = row[0] if row else {}
+        counts = {t: s["count"] for t, s in by_type.items()}
+        return {
+            "found": True,
+            "counts": counts,
+            "values": {t: s["values"] for t, s in by_type.items()},
+            "total": sum(counts.values())
+        }
+    except Exception as e:
+        print(f"[UserContext] Error getting profile summary: {e}", file=sys.stderr)
+        return {"found": False, "error": str(e)}
+
+
+async def get_profile_completeness(user_id: str, items: Optional[dict] = None) -> dict:
+    """Check how complete the user's profile is.
+
+    ``items`` is a get_profile_items result the caller already has.
+    """
+    if items is None:
+        items = await get_profile_items(user_id)
     if not items.get("found"):
         return {"complete": False, "percent": 0, "missing": ["skills", "location", "role"]}
 
@@ -453,8 +600,53 @@ def get_profile_completeness(user_id: str) -> dict:
 # Combined Context
 # =====
 
-def get_full_user_context(user_id: str) -> dict:
-    """Get complete user context: profile + interests + memory."""
+_PROFILE_AND_INTERESTS_SQL = """
+    SELECT
+        (SELECT row_to_json(p) FROM (
+            SELECT id, email, name, skills, experience_years,
+                   preferred_categories, preferred_locations, bio
+            FROM user_profiles
+            WHERE id = %s
+        ) p) AS profile,
+        (SELECT COALESCE(json_agg(i), '[]'::json) FROM (
+            SELECT ji.job_id, ji.interest_type, ji.created_at,
+                   j.title, j.company, j.location, j.category
+            FROM user_job_interests ji
+            JOIN jobs j ON j.id = ji.job_id
+            WHERE ji.user_id = %s
+            ORDER BY ji.created_at DESC
+            LIMIT %s
+        ) i) AS interests
+"""
+
+
+async def _get_profile_and_interests(user_id: str, limit: int) -> tuple[Optional[dict], list]:
+    """Profile and recent job interests in one round trip."""
+    if not db.is_configured():
+        return None, []
+    try:
+        row = await db.fetch_one(_PROFILE_AND_INTERESTS_SQL, (user_id, user_id, limit))
+        interests = row[1] or []
+        # json_agg turns timestamps into ISO strings; callers expect datetimes
+        for interest in interests:
+            if isinstance(interest.get("created_at"), str):
+                interest["created_at"] = datetime.fromisoformat(interest["created_at"])
+        return row[0], interests
+    except Exception as e:
+        # e.g. one of the tables is missing - fetch separately so the other half still loads
+        print(f"[UserContext] Combined context query failed, querying separately: {e}", file=sys.stderr)
+        profile_result, interests_result = await asyncio.gather(
+            get_user_profile(user_id), get_user_job_interests(user_id, limit=limit)
+        )
+        return profile_result.get("profile"), interests_result.get("interests", [])
+
+
+async def get_full_user_context(user_id: str) -> dict:
+    """Get complete user context: profile + interests + memory.
+
+    Profile and interests come from one SQL round trip, fetched concurrently
+    with the Zep memory, so this takes about as long as the slower of the two.
+    """
     context = {
         "user_id": user_id,
         "profile": None,
@@ -463,18 +655,13 @@ def get_full_user_context(user_id: str) -> dict:
         "recent_messages": []
     }
 
-    # Get profile
-    profile_result = get_user_profile(user_id)
-    if profile_result.get("found"):
-        context["profile"] = profile_result["profile"]
-
-    # Get job interests
-    interests_result = get_user_job_interests(user_id, limit=5)
-    if interests_result.get("found"):
-        context["job_interests"] = interests_result["interests"]
+    (profile, interests), memory_result = await asyncio.gather(
+        _get_profile_and_interests(user_id, limit=5),
+        get_conversation_memory(user_id, limit=3),
+    )
+    context["profile"] = profile
+    context["job_interests"] = interests
 
-    # Get conversation memory
-    memory_result = get_conversation_memory(user_id, limit=3)
     if memory_result.get("found"):
         context["conversation_summary"] = memory_result.get("summary")
         context["recent_messages"] = memory_result.get("messages", [])
@@ -0,0 +1,20 @@
+-- Track row changes on jobs so the agent's job catalog can refresh incrementally
+-- (agent/tools/job_catalog.py falls back to posted_date without this column)
+-- Run this in your Neon SQL console
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION jobs_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs_updated_at_trigger ON jobs;
+CREATE TRIGGER jobs_updated_at_trigger
+  BEFORE UPDATE ON jobs
+  FOR EACH ROW EXECUTE FUNCTION jobs_touch_updated_at();
+
+-- Create index for the catalog's "changed since" query
+CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs(updated_at);
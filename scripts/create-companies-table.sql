@@ -0,0 +1,34 @@
+-- Create companies table for the agent's company directory (COMPANY_SOURCE=db)
+-- Run this in your Neon SQL console
+
+CREATE TABLE IF NOT EXISTS companies (
+  slug TEXT PRIMARY KEY,  -- lookup key, e.g. 'team liquid'
+  name TEXT NOT NULL,
+  description TEXT DEFAULT '',
+  headquarters TEXT DEFAULT '',
+  founded TEXT DEFAULT '',
+  games TEXT[] DEFAULT '{}',
+  notable_achievements TEXT[] DEFAULT '{}',
+  careers_url TEXT DEFAULT '',
+  culture TEXT DEFAULT '',
+  aliases TEXT[] DEFAULT '{}',  -- e.g. {'tl', 'liquid'}
+  is_active BOOLEAN DEFAULT true,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Keep updated_at current so agents notice edits (they poll MAX(updated_at))
+CREATE OR REPLACE FUNCTION companies_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS companies_updated_at_trigger ON companies;
+CREATE TRIGGER companies_updated_at_trigger
+  BEFORE UPDATE ON companies
+  FOR EACH ROW EXECUTE FUNCTION companies_touch_updated_at();
+
+-- Create index for the change check
+CREATE INDEX IF NOT EXISTS idx_companies_updated_at ON companies(updated_at);
@@ -0,0 +1,38 @@
+-- Full-text search index for the jobs table (used by agent/tools/job_search.py)
+-- Run this in your Neon SQL console
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Weighted document: title (A), company + skills (B), description (C).
+-- Maintained by a trigger because array_to_string() is not immutable, so it
+-- cannot be used in a generated column.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION jobs_search_vector_update() RETURNS trigger AS $$
+BEGIN
+  NEW.search_vector :=
+    setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(NEW.company, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(array_to_string(NEW.skills, ' '), '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs_search_vector_trigger ON jobs;
+CREATE TRIGGER jobs_search_vector_trigger
+  BEFORE INSERT OR UPDATE OF title, company, skills, description ON jobs
+  FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update();
+
+-- Backfill existing rows (fires the trigger)
+UPDATE jobs SET title = title WHERE search_vector IS NULL;
+
+-- Ranked full-text search
+CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN (search_vector);
+
+-- Substring / typo-tolerant matches on short fields ("riot", "coach")
+CREATE INDEX IF NOT EXISTS idx_jobs_title_trgm ON jobs USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_jobs_company_trgm ON jobs USING GIN (company gin_trgm_ops);
+
+-- Default listing order for active jobs
+CREATE INDEX IF NOT EXISTS idx_jobs_active_posted ON jobs (posted_date DESC NULLS LAST) WHERE is_active = true;